@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from collections.abc import Callable
+
+from flask import Flask
+from sqlalchemy import URL
+
+from infrastructure.mysql.mysql_repository import MySQLRepository
+from models.models import db
+from services.notes import (
+    MAX_COMMENT_LEN,
+    MAX_CONTENT_LEN,
+    MAX_TITLE_LEN,
+    MIN_COMMENT_LEN,
+    MIN_CONTENT_LEN,
+    MIN_TITLE_LEN,
+)
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua meeting todo idea "
+    "shopping project release deploy review draft follow up call notes"
+).split()
+
+
+def get_env_value(name: str) -> str:
+    # Not the one of main, importing main would start the whole application.
+    value = os.getenv(name)
+    if value is None:
+        raise RuntimeError(f"Missing required environment variable: {name}")
+    return value
+
+
+def create_app() -> tuple[Flask, MySQLRepository]:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = URL.create(
+        drivername="mysql+pymysql",
+        username=get_env_value("DB_USERNAME"),
+        password=get_env_value("DB_PASSWORD"),
+        host=get_env_value("DB_HOST"),
+        port=int(get_env_value("DB_PORT")),
+        database=get_env_value("DB_DATABASE"),
+    )
+    db.init_app(app)
+    return app, MySQLRepository(db, logging.getLogger("benchmarks"))
+
+
+def random_text(rng: random.Random, median: int, low: int, high: int) -> str:
+    # Lengths follow a log-normal distribution, which is what user-written
+    # text tends to look like: many short notes and a long tail.
+    length = int(rng.lognormvariate(0, 0.8) * median)
+    length = min(max(length, low), high)
+    words: list[str] = []
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length].strip().ljust(low, "x")
+
+
+def synthetic_note(rng: random.Random) -> dict:
+    return {
+        "title": random_text(rng, 24, MIN_TITLE_LEN, MAX_TITLE_LEN),
+        "content": random_text(rng, 220, MIN_CONTENT_LEN, MAX_CONTENT_LEN),
+        "comment": (
+            random_text(rng, 30, MIN_COMMENT_LEN, MAX_COMMENT_LEN)
+            if rng.random() < 0.3
+            else None
+        ),
+    }
+
+
+def measure(func: Callable[[], object], iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return timings
+
+
+def measure_cpu(func: Callable[[], object], iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        started_at = time.process_time()
+        func()
+        timings.append((time.process_time() - started_at) * 1000)
+    return timings
+
+
+def summarize(timings: list[float]) -> dict:
+    ordered = sorted(timings)
+    return {
+        "iterations": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p50_ms": round(percentile(ordered, 50), 4),
+        "p95_ms": round(percentile(ordered, 95), 4),
+        "p99_ms": round(percentile(ordered, 99), 4),
+    }
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = (len(ordered) - 1) * pct / 100
+    lower = int(index)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (index - lower)
+
+
+def print_table(rows: list[dict], columns: list[str]) -> None:
+    widths = {
+        column: max(len(column), *(len(str(row.get(column, ""))) for row in rows))
+        for column in columns
+    }
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    print("  ".join("-" * widths[column] for column in columns))
+    for row in rows:
+        print(
+            "  ".join(
+                str(row.get(column, "")).ljust(widths[column]) for column in columns
+            )
+        )
+
+
+def write_json(path: str, data: object) -> None:
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(data, output, indent=2)
@@ -0,0 +1,228 @@
+"""Measures how the MySQLRepository read paths scale with the size of notes.
+
+The notes table is grown step by step up to each requested size with
+synthetic notes, then every case is timed and explained:
+
+    python -m benchmarks.dataset_scaling --sizes 1000,100000,1000000 --reset
+
+Run it once more with --compression-threshold to compare the table size and
+buffer-pool hit rate with compressed note content.
+
+Requires the same DB_* environment variables as the application and a
+disposable database: --reset truncates the notes tables.
+"""
+
+import argparse
+import random
+import re
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+
+from benchmarks.common import (
+    create_app,
+    measure,
+    print_table,
+    summarize,
+    synthetic_note,
+    write_json,
+)
+from infrastructure.mysql.mysql_repository import MySQLRepository
+from models.models import db
+from models.types import set_compression_threshold
+
+DEFAULT_SIZES = "1000,10000,100000,1000000,10000000"
+LOAD_BATCH_SIZE = 5000
+BUFFER_POOL_STATUS = ("Innodb_buffer_pool_read_requests", "Innodb_buffer_pool_reads")
+EXPLAIN_ROWS_PATTERN = re.compile(
+    r"actual time=[\d.]+\.\.[\d.]+ rows=([\d.]+) loops=(\d+)"
+)
+# Only access nodes read rows from storage, the ones above them (limit,
+# filter, sort) would count the same rows again.
+EXPLAIN_ACCESS_PATTERN = re.compile(r"(scan|lookup) on ")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="dataset_scaling.json")
+    parser.add_argument("--reset", action="store_true")
+    parser.add_argument(
+        "--compression-threshold",
+        type=int,
+        default=0,
+        help="Compress loaded note content above this many bytes (0 disables).",
+    )
+    args = parser.parse_args()
+    set_compression_threshold(args.compression_threshold)
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    rng = random.Random(args.seed)
+    app, repository = create_app()
+    results = []
+
+    with app.app_context():
+        if args.reset:
+            db.session.execute(text("TRUNCATE TABLE notes"))
+            db.session.execute(text("TRUNCATE TABLE notes_daily_stats"))
+            db.session.commit()
+
+        current = repository.count_notes()
+        for size in sizes:
+            if size < current:
+                print(f"Skipping {size}, the table already holds {current} notes")
+                continue
+            load_notes(repository, rng, current, size)
+            current = size
+            db.session.execute(text("ANALYZE TABLE notes"))
+            data_mb = table_data_mb()
+
+            for name, case in cases(repository, rng, size, args.limit).items():
+                result = run_case(repository, name, case, args.iterations)
+                result["size"] = size
+                result["data_mb"] = data_mb
+                result["compression_threshold"] = args.compression_threshold
+                results.append(result)
+
+    print_table(
+        results,
+        [
+            "size",
+            "data_mb",
+            "case",
+            "p50_ms",
+            "p95_ms",
+            "p99_ms",
+            "rows_examined",
+            "table_scan",
+            "buffer_pool_reads",
+            "buffer_pool_hit_rate",
+        ],
+    )
+    write_json(args.output, results)
+    print(f"Results written to {args.output}")
+
+
+def load_notes(
+    repository: MySQLRepository, rng: random.Random, current: int, target: int
+) -> None:
+    start = datetime(2020, 1, 1)
+    for offset in range(current, target, LOAD_BATCH_SIZE):
+        rows = []
+        for index in range(offset, min(offset + LOAD_BATCH_SIZE, target)):
+            row = synthetic_note(rng)
+            row["created_at"] = start + timedelta(seconds=index * 30)
+            rows.append(row)
+        repository.add_many(rows)
+
+
+def cases(
+    repository: MySQLRepository, rng: random.Random, size: int, limit: int
+) -> dict[str, Callable[[], object]]:
+    return {
+        "get_by_id": lambda: repository.get_by_id(rng.randint(1, size)),
+        "get_notes_first_page": lambda: repository.get_notes(limit),
+        "get_notes_keyset_page": lambda: repository.get_notes(
+            limit, rng.randint(1, size)
+        ),
+    }
+
+
+def run_case(
+    repository: MySQLRepository,
+    name: str,
+    case: Callable[[], object],
+    iterations: int,
+) -> dict:
+    statements = capture_statements(case)
+    explain = [explain_analyze(statement, params) for statement, params in statements]
+
+    before = buffer_pool_status()
+    timings = measure(case, iterations)
+    after = buffer_pool_status()
+    requests = after[BUFFER_POOL_STATUS[0]] - before[BUFFER_POOL_STATUS[0]]
+    reads = after[BUFFER_POOL_STATUS[1]] - before[BUFFER_POOL_STATUS[1]]
+    db.session.rollback()
+
+    result = {"case": name, **summarize(timings)}
+    result["rows_examined"] = sum(item["rows_examined"] for item in explain)
+    result["table_scan"] = any(item["table_scan"] for item in explain)
+    result["buffer_pool_read_requests"] = requests
+    result["buffer_pool_reads"] = reads
+    result["buffer_pool_hit_rate"] = (
+        round(1 - reads / requests, 4) if requests else None
+    )
+    result["explain"] = explain
+    return result
+
+
+def capture_statements(case: Callable[[], object]) -> list[tuple[str, object]]:
+    statements: list[tuple[str, object]] = []
+
+    def before_cursor_execute(
+        conn: Connection,
+        cursor: object,
+        statement: str,
+        parameters: object,
+        context: object,
+        executemany: bool,
+    ) -> None:
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        case()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def explain_analyze(statement: str, parameters: object) -> dict:
+    connection = db.session.connection()
+    plan = connection.exec_driver_sql(
+        "EXPLAIN ANALYZE " + statement, parameters  # type: ignore[arg-type]
+    ).scalar()
+    return {
+        "statement": statement,
+        "plan": plan,
+        "rows_examined": parse_rows_examined(str(plan)),
+        "table_scan": "Table scan on" in str(plan),
+    }
+
+
+def parse_rows_examined(plan: str) -> int:
+    rows_examined = 0.0
+    for line in plan.splitlines():
+        if not EXPLAIN_ACCESS_PATTERN.search(line):
+            continue
+        for rows, loops in EXPLAIN_ROWS_PATTERN.findall(line):
+            rows_examined += float(rows) * int(loops)
+    return int(rows_examined)
+
+
+def table_data_mb() -> float:
+    data_length = db.session.execute(
+        text(
+            "SELECT data_length FROM information_schema.TABLES"
+            " WHERE table_schema = DATABASE() AND table_name = 'notes'"
+        )
+    ).scalar()
+    return round(int(data_length or 0) / 1024 / 1024, 2)
+
+
+def buffer_pool_status() -> dict[str, int]:
+    # Global counters: run the benchmark against an otherwise idle server.
+    rows = db.session.execute(
+        text("SHOW GLOBAL STATUS LIKE 'Innodb_buffer_pool_read%'")
+    ).all()
+    return {name: int(value) for name, value in rows if name in BUFFER_POOL_STATUS}
+
+
+if __name__ == "__main__":
+    main()
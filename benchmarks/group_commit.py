@@ -0,0 +1,121 @@
+"""Compares note inserts from concurrent request threads with one commit per
+note against group commit with different windows:
+
+    python -m benchmarks.group_commit --threads 16 --notes-per-thread 200 --windows 1,2,5
+
+Every thread inserts notes through services.notes.add_note, like the POST
+route does, in its own app context. Reported are the throughput, latency
+percentiles per insert and the mean batch size. It writes notes into the
+configured database, run it against a disposable one only.
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from flask import Flask
+
+from benchmarks.common import (
+    create_app,
+    percentile,
+    print_table,
+    synthetic_note,
+    write_json,
+)
+from infrastructure.mysql.mysql_repository import MySQLRepository
+from services.notes import add_note
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--notes-per-thread", type=int, default=200)
+    parser.add_argument("--windows", default="1,2,5", help="in milliseconds")
+    parser.add_argument("--max-batch", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="group_commit.json")
+    args = parser.parse_args()
+
+    app, repository = create_app()
+    results = [
+        run_case(app, repository, args.threads, args.notes_per_thread, args.seed)
+    ]
+    for window_ms in [float(window) for window in args.windows.split(",")]:
+        committer = repository.enable_group_commit(args.max_batch, window_ms / 1000)
+        result = run_case(
+            app, repository, args.threads, args.notes_per_thread, args.seed
+        )
+        result["window_ms"] = window_ms
+        result["mean_batch"] = round(
+            committer.items_total / max(committer.batches_total, 1), 1
+        )
+        results.append(result)
+    repository.group_committer = None
+
+    print_table(
+        results,
+        [
+            "window_ms",
+            "notes",
+            "notes_per_s",
+            "p50_ms",
+            "p95_ms",
+            "p99_ms",
+            "mean_batch",
+        ],
+    )
+    write_json(args.output, results)
+    print(f"Results written to {args.output}")
+
+
+def run_case(
+    app: Flask,
+    repository: MySQLRepository,
+    threads: int,
+    notes_per_thread: int,
+    seed: int,
+) -> dict:
+    latencies: list[float] = []
+    lock = threading.Lock()
+    start = threading.Barrier(threads + 1)
+
+    def insert_notes(thread_seed: int) -> None:
+        rng = random.Random(thread_seed)
+        notes = [synthetic_note(rng) for _ in range(notes_per_thread)]
+        timings = []
+        with app.app_context():
+            start.wait()
+            for note in notes:
+                started_at = time.perf_counter()
+                add_note(repository, note["title"], note["content"], note["comment"])
+                timings.append((time.perf_counter() - started_at) * 1000)
+        with lock:
+            latencies.extend(timings)
+
+    workers = [
+        threading.Thread(target=insert_notes, args=(seed + index,))
+        for index in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    start.wait()
+    started_at = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started_at
+
+    ordered = sorted(latencies)
+    return {
+        "window_ms": 0,
+        "notes": len(ordered),
+        "notes_per_s": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+        "mean_batch": 1.0,
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compares the CPU cost of rendering note pages with jsonify against
+concatenating pre-rendered per-note JSON fragments:
+
+    python -m benchmarks.json_fragments --page-sizes 5,10,500
+
+Only the rendering is timed, with process CPU time; the notes are built in
+memory and the fragments come from a dict standing in for the Redis cache,
+so no database or Redis server is needed.
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask, jsonify
+
+from benchmarks.common import (
+    measure_cpu,
+    print_table,
+    summarize,
+    synthetic_note,
+    write_json,
+)
+from models.models import Note
+from services.notes import _encode_json, _render_page, _to_dict
+
+DEFAULT_PAGE_SIZES = "5,10,100,500,1000"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--page-sizes", default=DEFAULT_PAGE_SIZES)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="json_fragments.json")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    app = Flask(__name__)
+    results = []
+    with app.app_context():
+        for page_size in [int(size) for size in args.page_sizes.split(",")]:
+            notes = synthetic_notes(rng, page_size)
+            fragments = {note.id: _encode_json(_to_dict(note)) for note in notes}
+            if render_fragments(notes, fragments) != render_jsonify(notes):
+                raise RuntimeError("Fragment rendering differs from jsonify")
+
+            baseline = summarize(
+                measure_cpu(lambda: render_jsonify(notes), args.iterations)
+            )
+            cached = summarize(
+                measure_cpu(lambda: render_fragments(notes, fragments), args.iterations)
+            )
+            results.append(
+                {
+                    "page_size": page_size,
+                    "jsonify_cpu_ms": baseline["mean_ms"],
+                    "fragments_cpu_ms": cached["mean_ms"],
+                    "cpu_saved_pct": round(
+                        100 * (1 - cached["mean_ms"] / baseline["mean_ms"]), 1
+                    ),
+                }
+            )
+
+    print_table(
+        results,
+        ["page_size", "jsonify_cpu_ms", "fragments_cpu_ms", "cpu_saved_pct"],
+    )
+    write_json(args.output, results)
+
+
+def synthetic_notes(rng: random.Random, count: int) -> list[Note]:
+    created_at = datetime(2025, 11, 3, tzinfo=timezone.utc)
+    return [
+        Note(id=count - index, created_at=created_at - timedelta(minutes=index), **note)
+        for index, note in enumerate(synthetic_note(rng) for _ in range(count))
+    ]
+
+
+def render_jsonify(notes: list[Note]) -> bytes:
+    page = {"notes": [_to_dict(note) for note in notes], "has_more": True}
+    body: bytes = jsonify(page).get_data()
+    return body
+
+
+def render_fragments(notes: list[Note], fragments: dict[int, bytes]) -> bytes:
+    body = b"[" + b",".join(fragments[note.id] for note in notes) + b"]"
+    return _render_page(body, has_more=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Measures what logging an error storm costs the threads that log, with a
+plain StreamHandler and with LogPipeline:
+
+    python -m benchmarks.log_pipeline --threads 8 --errors-per-thread 2000 --sink-delay-ms 0.2
+
+Every thread logs the same exception with exc_info=True from a stack of
+--stack-depth frames, like a route failing for every request during an
+outage. The sink sleeps --sink-delay-ms per write to stand in for a slow log
+collector or a full stdout pipe. Reported are the latency percentiles of the
+logging calls and how many records were written, suppressed or dropped.
+"""
+
+import argparse
+import logging
+import threading
+import time
+from typing import IO
+
+from benchmarks.common import percentile, print_table, write_json
+from infrastructure.logs.pipeline import LogPipeline
+
+
+class SlowSink:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.lines = 0
+
+    def write(self, text: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        self.lines += text.count("\n")
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--errors-per-thread", type=int, default=2000)
+    parser.add_argument("--stack-depth", type=int, default=30)
+    parser.add_argument("--sink-delay-ms", type=float, default=0.2)
+    parser.add_argument("--output", default="log_pipeline.json")
+    args = parser.parse_args()
+
+    delay = args.sink_delay_ms / 1000
+    cases = {
+        "stream_handler": lambda sink: logging.StreamHandler(sink),
+        "pipeline_unsampled": lambda sink: LogPipeline(sink, burst=0),
+        "pipeline": lambda sink: LogPipeline(sink),
+    }
+    results = []
+    for name, make_handler in cases.items():
+        sink = SlowSink(delay)
+        handler = make_handler(sink)
+        result = run_case(
+            handler, args.threads, args.errors_per_thread, args.stack_depth
+        )
+        result["handler"] = name
+        result["written"] = sink.lines
+        if isinstance(handler, LogPipeline):
+            result["suppressed"] = handler.suppressed_total
+            result["dropped"] = handler.dropped_total
+        results.append(result)
+
+    print_table(
+        results,
+        [
+            "handler",
+            "calls",
+            "p50_us",
+            "p99_us",
+            "max_us",
+            "written",
+            "suppressed",
+            "dropped",
+        ],
+    )
+    write_json(args.output, results)
+    print(f"Results written to {args.output}")
+
+
+def run_case(
+    handler: logging.Handler, threads: int, errors_per_thread: int, stack_depth: int
+) -> dict:
+    logger = logging.getLogger(f"benchmarks.log_pipeline.{id(handler)}")
+    logger.propagate = False
+    logger.addHandler(handler)
+    if isinstance(handler, LogPipeline):
+        handler.start()
+    latencies: list[float] = []
+    lock = threading.Lock()
+    start = threading.Barrier(threads)
+
+    def fail(depth: int) -> None:
+        if depth:
+            fail(depth - 1)
+        raise ConnectionError("MySQL server has gone away")
+
+    def log_errors() -> None:
+        timings = []
+        start.wait()
+        for _ in range(errors_per_thread):
+            try:
+                fail(stack_depth)
+            except ConnectionError as error:
+                started_at = time.perf_counter()
+                logger.error(error, exc_info=True)
+                timings.append((time.perf_counter() - started_at) * 1_000_000)
+        with lock:
+            latencies.extend(timings)
+
+    workers = [threading.Thread(target=log_errors) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    handler.close()
+    logger.removeHandler(handler)
+
+    ordered = sorted(latencies)
+    return {
+        "calls": len(ordered),
+        "p50_us": round(percentile(ordered, 50), 1),
+        "p99_us": round(percentile(ordered, 99), 1),
+        "max_us": round(ordered[-1], 1),
+        "suppressed": 0,
+        "dropped": 0,
+    }
+
+
+if __name__ == "__main__":
+    main()
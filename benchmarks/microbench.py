@@ -0,0 +1,368 @@
+"""Times every layer of the notes API in isolation, so that a slowdown can be
+pinned to the layer that caused it:
+
+    python -m benchmarks.microbench --save benchmarks/baselines/$(git rev-parse --short HEAD).json
+    python -m benchmarks.microbench --compare benchmarks/baselines/<baseline>.json
+
+Every benchmark runs --repeats rounds of --iterations calls and records the
+mean time per call of each round. --compare reports a benchmark as slower
+when its rounds are slower than the baseline's in a one-sided Mann-Whitney U
+test (p below --alpha) and its median grew by more than --threshold percent,
+and exits with status 1 if any is. The limiter and mysql layers need the
+Redis and MySQL servers of the Docker Compose stack, pick the layers to run
+with --layers.
+"""
+
+import argparse
+import inspect
+import itertools
+import json
+import logging
+import math
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from http import HTTPStatus
+from typing import cast
+from unittest.mock import MagicMock, patch
+
+from flask import Flask
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+import routes.notes
+from benchmarks.common import (
+    create_app,
+    get_env_value,
+    print_table,
+    synthetic_note,
+    write_json,
+)
+from benchmarks.dataset_scaling import load_notes
+from models.records import NoteRecord
+from routes.notes import register_notes_routes
+from services.notes import _encode_json, _render_page, _to_dict, _validate
+
+# Bumped when the layout of a baseline file changes.
+BASELINE_FORMAT = 1
+DEFAULT_LAYERS = "service,json,route,limiter,mysql"
+MYSQL_NOTES = 1000
+
+Benchmarks = dict[str, Callable[[], object]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--layers", default=DEFAULT_LAYERS)
+    parser.add_argument("--repeats", type=int, default=15)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="write the results as a baseline file")
+    parser.add_argument("--compare", help="baseline file to compare against")
+    parser.add_argument("--alpha", type=float, default=0.01)
+    parser.add_argument("--threshold", type=float, default=5.0)
+    args = parser.parse_args()
+
+    layers = args.layers.split(",")
+    unknown = set(layers) - set(LAYERS)
+    if unknown:
+        parser.error(f"Unknown layers: {', '.join(sorted(unknown))}")
+
+    results = run(layers, args.repeats, args.iterations, random.Random(args.seed))
+    print_table(
+        [
+            {"benchmark": name, **summarize_rounds(rounds)}
+            for name, rounds in results["benchmarks"].items()
+        ],
+        ["benchmark", "median_us", "min_us", "stdev_us"],
+    )
+    if args.save:
+        write_json(args.save, results)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("format") != BASELINE_FORMAT:
+            sys.exit(f"{args.compare} is not a format {BASELINE_FORMAT} baseline")
+        rows = compare(baseline, results, args.alpha, args.threshold)
+        print()
+        print_table(
+            rows,
+            [
+                "benchmark",
+                "baseline_us",
+                "current_us",
+                "change_pct",
+                "p_value",
+                "status",
+            ],
+        )
+        if any(row["status"] == "slower" for row in rows):
+            sys.exit(1)
+
+
+def run(layers: list[str], repeats: int, iterations: int, rng: random.Random) -> dict:
+    benchmarks: dict[str, list[float]] = {}
+    with ExitStack() as stack:
+        for layer in layers:
+            for name, call in LAYERS[layer](stack, rng).items():
+                benchmarks[name] = measure_rounds(call, repeats, iterations)
+    return {
+        "format": BASELINE_FORMAT,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeats": repeats,
+        "iterations": iterations,
+        "benchmarks": benchmarks,
+    }
+
+
+def measure_rounds(
+    call: Callable[[], object], repeats: int, iterations: int
+) -> list[float]:
+    # One untimed round first, for connection pools, caches and the like.
+    for _ in range(iterations):
+        call()
+    rounds = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            call()
+        rounds.append(
+            round((time.perf_counter() - started_at) / iterations * 1_000_000, 4)
+        )
+    return rounds
+
+
+def summarize_rounds(rounds: list[float]) -> dict:
+    return {
+        "median_us": round(statistics.median(rounds), 3),
+        "min_us": round(min(rounds), 3),
+        "stdev_us": round(statistics.stdev(rounds), 3) if len(rounds) > 1 else 0.0,
+    }
+
+
+def compare(
+    baseline: dict, current: dict, alpha: float, threshold_pct: float
+) -> list[dict]:
+    rows = []
+    for name, rounds in current["benchmarks"].items():
+        baseline_rounds = baseline["benchmarks"].get(name)
+        if baseline_rounds is None:
+            rows.append({"benchmark": name, "status": "new"})
+            continue
+        before = statistics.median(baseline_rounds)
+        after = statistics.median(rounds)
+        change_pct = 100 * (after / before - 1)
+        if change_pct > threshold_pct:
+            p_value = mann_whitney_greater(rounds, baseline_rounds)
+            status = "slower" if p_value < alpha else "same"
+        elif change_pct < -threshold_pct:
+            p_value = mann_whitney_greater(baseline_rounds, rounds)
+            status = "faster" if p_value < alpha else "same"
+        else:
+            p_value = 1.0
+            status = "same"
+        rows.append(
+            {
+                "benchmark": name,
+                "baseline_us": round(before, 3),
+                "current_us": round(after, 3),
+                "change_pct": round(change_pct, 1),
+                "p_value": round(p_value, 4),
+                "status": status,
+            }
+        )
+    return rows
+
+
+def mann_whitney_greater(sample: list[float], other: list[float]) -> float:
+    # One-sided p-value for sample tending to be greater than other, from the
+    # normal approximation with tie correction. Good enough from about 8
+    # rounds per side, which is why --repeats defaults to 15.
+    n1, n2 = len(sample), len(other)
+    combined = sorted(
+        [(value, 0) for value in sample] + [(value, 1) for value in other]
+    )
+    ranks_sum = 0.0
+    tie_term = 0
+    index = 0
+    while index < len(combined):
+        end = index
+        while end + 1 < len(combined) and combined[end + 1][0] == combined[index][0]:
+            end += 1
+        ties = end - index + 1
+        average_rank = (index + end) / 2 + 1
+        ranks_sum += average_rank * sum(
+            1 for _, group in combined[index : end + 1] if group == 0
+        )
+        tie_term += ties**3 - ties
+        index = end + 1
+
+    n = n1 + n2
+    u = ranks_sum - n1 * (n1 + 1) / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def service_benchmarks(stack: ExitStack, rng: random.Random) -> Benchmarks:
+    note = synthetic_note(rng)
+    record = _record(rng)
+    return {
+        "service.validate": lambda: _validate(
+            note["title"], note["content"], note["comment"]
+        ),
+        "service.to_dict": lambda: _to_dict(record),
+    }
+
+
+def json_benchmarks(stack: ExitStack, rng: random.Random) -> Benchmarks:
+    note = _to_dict(_record(rng))
+    fragments = b"[" + b",".join(_encode_json(note) for _ in range(10)) + b"]"
+    return {
+        "json.encode_note": lambda: _encode_json(note),
+        "json.render_page_10": lambda: _render_page(fragments, has_more=True),
+    }
+
+
+def route_benchmarks(stack: ExitStack, rng: random.Random) -> Benchmarks:
+    # The view functions without the rate limit and with the services stubbed
+    # out, so what is left is the request context and the argument parsing
+    # and checks of the route.
+    app = Flask(__name__)
+    app.config["RATELIMIT_ENABLED"] = False
+    register_notes_routes(
+        app, MagicMock(), MagicMock(), "memory://", logging.getLogger("benchmarks")
+    )
+    stack.enter_context(
+        patch.object(routes.notes, "get_all_notes_json", lambda *args: b"{}")
+    )
+    stack.enter_context(
+        patch.object(routes.notes, "add_note", lambda *args, **kwargs: 1)
+    )
+    get_notes = inspect.unwrap(app.view_functions["get_notes"])
+    add_note_route = inspect.unwrap(app.view_functions["add_note_route"])
+    body = synthetic_note(rng)
+
+    def request_context() -> None:
+        with app.test_request_context("/api/v1/notes"):
+            pass
+
+    def get_notes_args() -> object:
+        with app.test_request_context("/api/v1/notes?limit=10&last_id=5000"):
+            return get_notes()
+
+    def add_note_body() -> object:
+        with app.test_request_context("/api/v1/notes", method="POST", json=body):
+            return add_note_route()
+
+    # Timing an error path would say nothing about the routes.
+    for view in (get_notes_args, add_note_body):
+        response = cast(tuple, view())
+        if response[1] != HTTPStatus.OK:
+            raise RuntimeError(f"{view.__name__} answered {response[1]}")
+
+    return {
+        "route.request_context": request_context,
+        "route.get_notes_args": get_notes_args,
+        "route.add_note_body": add_note_body,
+    }
+
+
+def limiter_benchmarks(stack: ExitStack, rng: random.Random) -> Benchmarks:
+    # The same request with and without a rate limit, the difference is the
+    # limit check against Redis.
+    app = Flask(__name__)
+    limiter = Limiter(
+        key_func=get_remote_address,
+        storage_uri=_redis_url(),
+        key_prefix="microbench",
+        app=app,
+    )
+
+    @app.route("/limited")
+    @limiter.limit("1000000 per minute")
+    def limited() -> str:
+        return "ok"
+
+    @app.route("/unlimited")
+    def unlimited() -> str:
+        return "ok"
+
+    client = app.test_client()
+    return {
+        "limiter.unlimited_request": lambda: client.get("/unlimited"),
+        "limiter.limited_request": lambda: client.get("/limited"),
+    }
+
+
+def mysql_benchmarks(stack: ExitStack, rng: random.Random) -> Benchmarks:
+    app, repository = create_app()
+    stack.enter_context(app.app_context())
+    current = repository.count_notes()
+    if current < MYSQL_NOTES:
+        load_notes(repository, rng, current, MYSQL_NOTES)
+    note_ids, _ = repository.get_note_ids(MYSQL_NOTES)
+    next_id = itertools.cycle(note_ids).__next__
+    return {
+        "mysql.get_by_id": lambda: repository.get_by_id(next_id()),
+        "mysql.get_by_ids_10": lambda: repository.get_by_ids(note_ids[:10]),
+        "mysql.get_notes_10": lambda: repository.get_notes(10),
+        "mysql.get_note_ids_10": lambda: repository.get_note_ids(10),
+    }
+
+
+LAYERS: dict[str, Callable[[ExitStack, random.Random], Benchmarks]] = {
+    "service": service_benchmarks,
+    "json": json_benchmarks,
+    "route": route_benchmarks,
+    "limiter": limiter_benchmarks,
+    "mysql": mysql_benchmarks,
+}
+
+
+def _record(rng: random.Random) -> NoteRecord:
+    note = synthetic_note(rng)
+    return NoteRecord(
+        id=1,
+        title=note["title"],
+        content=note["content"],
+        created_at=datetime(2025, 11, 3, 12, 0, tzinfo=timezone.utc),
+        comment=note["comment"],
+    )
+
+
+def _redis_url() -> str:
+    return (
+        f"redis://:{get_env_value('REDIS_PASSWORD')}@{get_env_value('REDIS_HOST')}"
+        f":{get_env_value('REDIS_PORT')}/{get_env_value('REDIS_DB')}"
+    )
+
+
+def _git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compares loading note pages as ORM Note instances against the Core read
+path that returns NoteRecords, serialized to dicts in both cases:
+
+    python -m benchmarks.note_hydration --page-sizes 10,100,1000
+
+The notes live in an in-memory SQLite database, so no server is needed and
+the time left is what the client spends building statements and turning rows
+into objects. Results are reported in CPU milliseconds per 1,000 rows.
+"""
+
+import argparse
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from benchmarks.common import (
+    measure_cpu,
+    print_table,
+    summarize,
+    synthetic_note,
+    write_json,
+)
+from infrastructure.mysql.mysql_repository import MySQLRepository
+from models.models import Note, NoteArchive, db
+from services.notes import _to_dict
+
+DEFAULT_PAGE_SIZES = "10,100,1000"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--page-sizes", default=DEFAULT_PAGE_SIZES)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="note_hydration.json")
+    args = parser.parse_args()
+
+    page_sizes = [int(size) for size in args.page_sizes.split(",")]
+    # One extra row keeps every page inside the hot table.
+    engine = create_notes_engine(random.Random(args.seed), max(page_sizes) + 1)
+    repository = MySQLRepository(
+        db, logging.getLogger("benchmarks"), read_engine=engine
+    )
+
+    results = []
+    for page_size in page_sizes:
+        if load_orm(engine, page_size) != load_core(repository, page_size):
+            raise RuntimeError("ORM and Core reads return different notes")
+
+        orm = summarize(
+            measure_cpu(lambda: load_orm(engine, page_size), args.iterations)
+        )
+        core = summarize(
+            measure_cpu(lambda: load_core(repository, page_size), args.iterations)
+        )
+        results.append(
+            {
+                "page_size": page_size,
+                "orm_cpu_ms_per_1000": round(orm["mean_ms"] * 1000 / page_size, 3),
+                "core_cpu_ms_per_1000": round(core["mean_ms"] * 1000 / page_size, 3),
+                "speedup": round(orm["mean_ms"] / core["mean_ms"], 2),
+            }
+        )
+
+    print_table(
+        results,
+        ["page_size", "orm_cpu_ms_per_1000", "core_cpu_ms_per_1000", "speedup"],
+    )
+    write_json(args.output, results)
+
+
+def create_notes_engine(rng: random.Random, count: int) -> Engine:
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine, tables=[Note.__table__, NoteArchive.__table__])
+    created_at = datetime(2025, 11, 3, tzinfo=timezone.utc)
+    with engine.begin() as connection:
+        connection.execute(
+            Note.__table__.insert(),
+            [
+                {"created_at": created_at - timedelta(minutes=index), **note}
+                for index, note in enumerate(synthetic_note(rng) for _ in range(count))
+            ],
+        )
+    return engine
+
+
+def load_orm(engine: Engine, limit: int) -> list[dict]:
+    # A fresh session per page, like a request, so every row is hydrated.
+    with Session(engine, autoflush=False) as session:
+        notes = session.query(Note).order_by(Note.id.desc()).limit(limit).all()
+        return [_to_dict(note) for note in notes]
+
+
+def load_core(repository: MySQLRepository, limit: int) -> list[dict]:
+    records, _ = repository.get_notes(limit)
+    return [_to_dict(record) for record in records]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Measures what request tracing adds to every request, untraced and at 0% and
+100% sampling:
+
+    python -m benchmarks.tracing_overhead --requests 20000 --rounds 20
+
+The requests go through the Flask test client to an app shaped like the notes
+API: three before_request hooks in place of the deadline, limiter and
+admission hooks, a traced service function making --queries SQLite queries
+and --redis-calls stand-in Redis calls. Spans are exported as OTLP JSON to a
+temporary file by the exporter thread, as with TRACING_EXPORT_PATH.
+The cases take turns in --rounds rounds so that they see the same machine
+noise. Reported are the latency percentiles per request and the overhead of
+the mean over the untraced app. The SQLAlchemy event listeners of the tracer
+are global, in the untraced app they only look up the (empty) current span.
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from collections.abc import Callable
+
+from flask import Flask
+from sqlalchemy import Engine, create_engine, text
+
+from benchmarks.common import percentile, print_table, write_json
+from infrastructure.tracing.tracer import (
+    KIND_CLIENT,
+    FileSpanExporter,
+    Tracer,
+    child_span,
+    register_tracing,
+    traced,
+)
+
+CASES: dict[str, float | None] = {
+    "untraced": None,
+    "sampled_0": 0.0,
+    "sampled_100": 1.0,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=3)
+    parser.add_argument("--redis-calls", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--output", default="tracing_overhead.json")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE notes (id INTEGER PRIMARY KEY)"))
+        connection.execute(text("INSERT INTO notes (id) VALUES (1), (2), (3)"))
+
+    apps = {}
+    tracers = {}
+    directory = tempfile.TemporaryDirectory()
+    for name, sample_rate in CASES.items():
+        tracer = None
+        if sample_rate is not None:
+            tracer = tracers[name] = Tracer(
+                FileSpanExporter(os.path.join(directory.name, f"{name}.jsonl")),
+                sample_rate,
+                logging.getLogger(__name__),
+            )
+        apps[name] = create_app(engine, args.queries, args.redis_calls, tracer)
+
+    latencies: dict[str, list[float]] = {name: [] for name in CASES}
+    for _ in range(args.rounds):
+        for name, app in apps.items():
+            latencies[name].extend(run_round(app, args.requests // args.rounds))
+
+    results = []
+    for name, timings in latencies.items():
+        result = summarize(timings)
+        result["case"] = name
+        if name in tracers:
+            tracers[name].flush()
+            result["spans"] = tracers[name].exported_spans_total
+            result["dropped"] = tracers[name].dropped_total
+        results.append(result)
+    directory.cleanup()
+    engine.dispose()
+
+    untraced = results[0]["mean_us"]
+    for result in results:
+        result["overhead_us"] = round(result["mean_us"] - untraced, 1)
+    print_table(
+        results,
+        ["case", "p50_us", "p99_us", "mean_us", "overhead_us", "spans", "dropped"],
+    )
+    write_json(args.output, results)
+    print(f"Results written to {args.output}")
+
+
+def create_app(
+    engine: Engine, queries: int, redis_calls: int, tracer: Tracer | None
+) -> Flask:
+    app = Flask(__name__)
+    for hook in ("check_deadline", "check_limit", "admit_request"):
+        app.before_request(_named_hook(hook))
+
+    @traced
+    def get_notes() -> list[int]:
+        note_ids = []
+        with engine.connect() as connection:
+            for _ in range(queries):
+                note_ids = list(
+                    connection.execute(text("SELECT id FROM notes")).scalars()
+                )
+        for _ in range(redis_calls):
+            span = child_span("redis MGET", KIND_CLIENT, {"db.system": "redis"})
+            if span is not None:
+                span.end()
+        return note_ids
+
+    @app.route("/api/v1/notes")
+    def notes() -> dict:
+        return {"notes": get_notes()}
+
+    if tracer is not None:
+        register_tracing(app, tracer)
+    return app
+
+
+def run_round(app: Flask, requests: int) -> list[float]:
+    client = app.test_client()
+    for _ in range(10):
+        client.get("/api/v1/notes")
+    latencies = []
+    for _ in range(requests):
+        started_at = time.perf_counter()
+        client.get("/api/v1/notes")
+        latencies.append((time.perf_counter() - started_at) * 1_000_000)
+    return latencies
+
+
+def summarize(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "p50_us": round(percentile(ordered, 50), 1),
+        "p99_us": round(percentile(ordered, 99), 1),
+        "mean_us": round(sum(ordered) / len(ordered), 1),
+        "spans": 0,
+        "dropped": 0,
+    }
+
+
+def _named_hook(name: str) -> Callable[[], None]:
+    def hook() -> None:
+        pass
+
+    hook.__qualname__ = name
+    return hook
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+import csv
+import json
+import os
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import IO, TextIO
+
+import click
+from flask import Flask
+from flask.cli import AppGroup
+
+from infrastructure.mysql.mysql_repository import MySQLRepository
+from infrastructure.mysql.online_change import ChunkThrottle, run_backfill
+from infrastructure.redis.redis_repository import RedisRepository
+from models.types import get_compression_threshold
+from services.export import (
+    EXPORT_FORMATS,
+    export_partition,
+    plan_partitions,
+    write_manifest,
+)
+from services.notes import IMPORT_BATCH_SIZE, import_notes
+from services.stats import DEFAULT_RECONCILE_DAYS, reconcile_stats
+
+IMPORT_FORMATS = ("ndjson", "csv")
+ONLINE_PROGRESS = {"after_id": 0, "rows": 0, "chunks": 0}
+
+
+def register_notes_commands(
+    app: Flask,
+    mysql_repository: MySQLRepository,
+    redis_repository: RedisRepository,
+) -> None:
+    notes_cli = AppGroup("notes", help="Notes maintenance commands.")
+
+    @notes_cli.command("reconcile-stats")
+    @click.option(
+        "--days",
+        default=DEFAULT_RECONCILE_DAYS,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Number of most recent days to recount.",
+    )
+    @click.option(
+        "--all-days",
+        is_flag=True,
+        help="Also recount every day before them, e.g. to fill a new rollup table.",
+    )
+    def reconcile_stats_command(days: int, all_days: bool) -> None:
+        """Recount notes from MySQL and reset the rollup table and Redis counters."""
+        summary = reconcile_stats(mysql_repository, redis_repository, days, all_days)
+        click.echo(
+            f"Reconciled {summary['days']} days, total notes: {summary['total']}"
+        )
+
+    @notes_cli.command("import")
+    @click.argument("source", type=click.File("r", encoding="utf-8"), default="-")
+    @click.option(
+        "--format",
+        "input_format",
+        type=click.Choice(IMPORT_FORMATS),
+        default=None,
+        help="Input format, guessed from the file extension when omitted.",
+    )
+    @click.option(
+        "--batch-size",
+        default=IMPORT_BATCH_SIZE,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Rows per multi-row INSERT and commit.",
+    )
+    @click.option(
+        "--rejects",
+        type=click.Path(dir_okay=False, writable=True),
+        default=None,
+        help="NDJSON file for rows that failed validation.",
+    )
+    @click.option(
+        "--checkpoint",
+        type=click.Path(dir_okay=False, writable=True),
+        default=None,
+        help="Checkpoint file, an existing one resumes the import.",
+    )
+    def import_notes_command(
+        source: TextIO,
+        input_format: str | None,
+        batch_size: int,
+        rejects: str | None,
+        checkpoint: str | None,
+    ) -> None:
+        """Import notes from an NDJSON or CSV file (or stdin with -)."""
+        if input_format is None:
+            input_format = "csv" if source.name.endswith(".csv") else "ndjson"
+
+        progress = _read_checkpoint(
+            checkpoint, {"records": 0, "imported": 0, "rejected": 0}
+        )
+        if progress["records"]:
+            click.echo(f"Resuming after {progress['records']} records", err=True)
+
+        records = islice(_read_records(source, input_format), progress["records"], None)
+        rejects_file = (
+            open(rejects, "a" if progress["records"] else "w", encoding="utf-8")
+            if rejects
+            else None
+        )
+        started_at = time.monotonic()
+        imported_at_start = progress["imported"]
+
+        def on_batch(imported: int, rejected: list[tuple[object, str]]) -> None:
+            if rejects_file is not None:
+                _write_rejects(rejects_file, rejected)
+            progress["records"] += imported + len(rejected)
+            progress["imported"] += imported
+            progress["rejected"] += len(rejected)
+            if checkpoint:
+                _write_checkpoint(checkpoint, progress)
+
+            elapsed = time.monotonic() - started_at
+            rate = (progress["imported"] - imported_at_start) / max(elapsed, 1e-6)
+            click.echo(
+                f"{progress['imported']} imported, {progress['rejected']} rejected"
+                f" ({rate:.0f} rows/s)",
+                err=True,
+            )
+
+        try:
+            import_notes(
+                mysql_repository,
+                records,
+                on_batch,
+                counters=redis_repository,
+                batch_size=batch_size,
+            )
+        finally:
+            if rejects_file is not None:
+                rejects_file.close()
+
+        click.echo(
+            f"Import finished: {progress['imported']} imported,"
+            f" {progress['rejected']} rejected"
+        )
+
+    @notes_cli.command("export")
+    @click.argument("output_dir", type=click.Path(file_okay=False, writable=True))
+    @click.option(
+        "--format",
+        "export_format",
+        type=click.Choice(EXPORT_FORMATS),
+        default="ndjson",
+        show_default=True,
+    )
+    @click.option(
+        "--partitions",
+        default=8,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Number of ID ranges, each written to its own shard.",
+    )
+    @click.option(
+        "--workers",
+        default=4,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Partitions read concurrently, each on its own connection.",
+    )
+    @click.option(
+        "--since-id",
+        type=click.IntRange(min=0),
+        default=None,
+        help="Only export notes with a greater ID (incremental export).",
+    )
+    @click.option(
+        "--since-created-at",
+        type=click.DateTime(formats=["%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%d"]),
+        default=None,
+        help="Only export notes created after this UTC time (incremental export).",
+    )
+    def export_notes_command(
+        output_dir: str,
+        export_format: str,
+        partitions: int,
+        workers: int,
+        since_id: int | None,
+        since_created_at: datetime | None,
+    ) -> None:
+        """Export notes into compressed shards with a manifest."""
+        os.makedirs(output_dir, exist_ok=True)
+        started_at = time.monotonic()
+
+        bounds = mysql_repository.get_id_bounds(since_id, since_created_at)
+        ranges = plan_partitions(*bounds, partitions) if bounds else []
+
+        def export(index: int, first_id: int, last_id: int) -> dict:
+            with app.app_context():
+                return export_partition(
+                    mysql_repository,
+                    output_dir,
+                    index,
+                    first_id,
+                    last_id,
+                    export_format,
+                    since_created_at,
+                )
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(export, index, first_id, last_id)
+                for index, (first_id, last_id) in enumerate(ranges)
+            ]
+            shards = [future.result() for future in futures]
+
+        manifest = write_manifest(
+            output_dir,
+            shards,
+            export_format,
+            since_id,
+            since_created_at,
+            bounds[1] if bounds else since_id,
+        )
+        elapsed = time.monotonic() - started_at
+        click.echo(
+            f"Exported {manifest['rows']} notes into {len(shards)} shards"
+            f" in {elapsed:.1f}s ({manifest['rows'] / max(elapsed, 1e-6):.0f} rows/s)"
+        )
+
+    @notes_cli.command("compress-content")
+    @_online_options
+    @click.option(
+        "--decompress",
+        is_flag=True,
+        help="Store all content uncompressed again, e.g. before a downgrade.",
+    )
+    def compress_content_command(
+        batch_size: int,
+        sleep: float,
+        chunk_time: float,
+        max_lag: float,
+        checkpoint: str | None,
+        decompress: bool,
+    ) -> None:
+        """Rewrite stored note content to match the compression threshold."""
+        threshold = 0 if decompress else get_compression_threshold()
+        if threshold <= 0 and not decompress:
+            raise click.UsageError(
+                "NOTES_COMPRESSION_THRESHOLD is not set, use --decompress to "
+                "store content uncompressed"
+            )
+
+        bounds = mysql_repository.get_id_bounds()
+        if bounds is None:
+            click.echo("No notes to rewrite")
+            return
+
+        progress = _read_checkpoint(checkpoint, {**ONLINE_PROGRESS, "rewritten": 0})
+
+        def rewrite_chunk(after_id: int, size: int) -> tuple[int | None, int]:
+            last_id, examined, rewritten = mysql_repository.rewrite_content(
+                after_id, size, threshold
+            )
+            progress["rewritten"] += rewritten
+            return last_id, examined
+
+        _run_online(
+            mysql_repository,
+            rewrite_chunk,
+            progress,
+            bounds,
+            batch_size,
+            sleep,
+            chunk_time,
+            max_lag,
+            checkpoint,
+        )
+        click.echo(
+            f"Done: {progress['rows']} examined, {progress['rewritten']} rewritten"
+        )
+
+    @notes_cli.command("backfill-previews")
+    @_online_options
+    def backfill_previews_command(
+        batch_size: int,
+        sleep: float,
+        chunk_time: float,
+        max_lag: float,
+        checkpoint: str | None,
+    ) -> None:
+        """Fill content_preview for notes written before it existed."""
+        # The ID bounds are only for the ETA.
+        bounds = mysql_repository.get_id_bounds()
+
+        progress = _read_checkpoint(checkpoint, dict(ONLINE_PROGRESS))
+        _run_online(
+            mysql_repository,
+            mysql_repository.backfill_content_previews,
+            progress,
+            bounds,
+            batch_size,
+            sleep,
+            chunk_time,
+            max_lag,
+            checkpoint,
+        )
+        click.echo(f"Done: {progress['rows']} previews written")
+
+    @notes_cli.command("archive")
+    @click.option(
+        "--older-than-days",
+        default=90,
+        show_default=True,
+        type=click.IntRange(min=0),
+        help="Age after which notes move to the archive table.",
+    )
+    @click.option(
+        "--batch-size",
+        default=1000,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Notes moved per transaction.",
+    )
+    @click.option(
+        "--sleep",
+        default=0.1,
+        show_default=True,
+        type=click.FloatRange(min=0),
+        help="Seconds to pause between batches.",
+    )
+    def archive_notes_command(
+        older_than_days: int, batch_size: int, sleep: float
+    ) -> None:
+        """Move old notes from the notes table into notes_archive."""
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+            days=older_than_days
+        )
+        boundary = mysql_repository.get_archive_boundary(cutoff)
+        if boundary is None:
+            click.echo("No notes to archive")
+            return
+
+        archived = 0
+        while True:
+            moved = mysql_repository.archive_notes(boundary, batch_size)
+            if not moved:
+                break
+            archived += moved
+            click.echo(f"{archived} notes archived", err=True)
+            time.sleep(sleep)
+
+        click.echo(f"Archived {archived} notes with id below {boundary}")
+
+    @notes_cli.command("prepare-shards")
+    def prepare_shards_command() -> None:
+        """Create the notes table on every shard configured in DB_SHARDS."""
+        try:
+            count = mysql_repository.prepare_shards()
+        except RuntimeError as error:
+            raise click.ClickException(str(error))
+        click.echo(f"{count} shards are ready")
+
+    app.cli.add_command(notes_cli)
+
+
+def _read_records(source: TextIO, input_format: str) -> Iterator[object]:
+    if input_format == "csv":
+        yield from csv.DictReader(source)
+        return
+
+    for line in source:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            # handed over as-is so that it ends up in the rejects file
+            yield line.rstrip("\n")
+
+
+def _write_rejects(rejects_file: IO[str], rejected: list[tuple[object, str]]) -> None:
+    for record, error in rejected:
+        rejects_file.write(json.dumps({"error": error, "record": record}) + "\n")
+    rejects_file.flush()
+
+
+def _online_options(command: Callable[..., None]) -> Callable[..., None]:
+    # Options of the backfills that run through run_backfill.
+    for option in reversed(
+        [
+            click.option(
+                "--batch-size",
+                default=1000,
+                show_default=True,
+                type=click.IntRange(min=1),
+                help="Largest number of notes per chunk.",
+            ),
+            click.option(
+                "--sleep",
+                default=0.1,
+                show_default=True,
+                type=click.FloatRange(min=0),
+                help="Seconds to pause between chunks.",
+            ),
+            click.option(
+                "--chunk-time",
+                default=0.5,
+                show_default=True,
+                type=click.FloatRange(min=0.01),
+                help="Target seconds per chunk, slower chunks shrink the batch size.",
+            ),
+            click.option(
+                "--max-lag",
+                default=2.0,
+                show_default=True,
+                type=click.FloatRange(min=0),
+                help="Pause while a replica in DB_REPLICAS lags more seconds than this.",
+            ),
+            click.option(
+                "--checkpoint",
+                type=click.Path(dir_okay=False),
+                default=None,
+                help="Checkpoint file, an existing one resumes the run.",
+            ),
+        ]
+    ):
+        command = option(command)
+    return command
+
+
+def _run_online(
+    mysql_repository: MySQLRepository,
+    step: Callable[[int, int], tuple[int | None, int]],
+    progress: dict[str, int],
+    bounds: tuple[int, int] | None,
+    batch_size: int,
+    sleep: float,
+    chunk_time: float,
+    max_lag: float,
+    checkpoint: str | None,
+) -> None:
+    if progress["after_id"]:
+        click.echo(f"Resuming after id {progress['after_id']}", err=True)
+    throttle = ChunkThrottle(
+        batch_size,
+        chunk_time,
+        sleep,
+        max_lag,
+        mysql_repository.get_replica_lag,
+        on_lag=lambda lag: click.echo(
+            f"Replica lag {lag:.0f}s is above {max_lag:g}s, waiting", err=True
+        ),
+    )
+
+    def report(progress: dict[str, int], seconds_left: float | None) -> None:
+        if checkpoint:
+            _write_checkpoint(checkpoint, progress)
+        line = f"{progress['rows']} rows (up to id {progress['after_id']}"
+        if bounds is not None:
+            first_id, last_id = bounds
+            done = (progress["after_id"] - first_id + 1) / (last_id - first_id + 1)
+            line += f", {min(done, 1.0):.1%}"
+        line += f"), next batch {throttle.batch_size}"
+        if seconds_left is not None:
+            line += f", ETA {timedelta(seconds=round(seconds_left))}"
+        click.echo(line, err=True)
+
+    run_backfill(
+        step, throttle, progress, None if bounds is None else bounds[1], report
+    )
+
+
+def _read_checkpoint(path: str | None, progress: dict[str, int]) -> dict[str, int]:
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as checkpoint_file:
+            progress.update(json.load(checkpoint_file))
+    return progress
+
+
+def _write_checkpoint(path: str, progress: dict[str, int]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as checkpoint_file:
+        json.dump(progress, checkpoint_file)
+    os.replace(tmp_path, path)
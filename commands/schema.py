@@ -0,0 +1,59 @@
+import click
+from flask import Flask
+from flask.cli import AppGroup
+
+from infrastructure.mysql.mysql_repository import MySQLRepository
+from infrastructure.mysql.online_change import OnlineChangeError, wait_for_replicas
+
+
+def register_schema_commands(app: Flask, mysql_repository: MySQLRepository) -> None:
+    schema_cli = AppGroup("schema", help="Online schema change commands.")
+
+    @schema_cli.command("alter")
+    @click.argument("table")
+    @click.argument("changes")
+    @click.option(
+        "--lock-wait-timeout",
+        default=2,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Seconds the ALTER may wait for its metadata lock per attempt.",
+    )
+    @click.option(
+        "--attempts",
+        default=5,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Attempts when the metadata lock could not be taken in time.",
+    )
+    @click.option(
+        "--max-lag",
+        default=2.0,
+        show_default=True,
+        type=click.FloatRange(min=0),
+        help="Wait until no replica in DB_REPLICAS lags more seconds than this.",
+    )
+    def alter_command(
+        table: str,
+        changes: str,
+        lock_wait_timeout: int,
+        attempts: int,
+        max_lag: float,
+    ) -> None:
+        """Run ALTER TABLE TABLE CHANGES without copying the table or blocking writes."""
+        wait_for_replicas(
+            mysql_repository.get_replica_lag,
+            max_lag,
+            on_lag=lambda lag: click.echo(
+                f"Replica lag {lag:.0f}s is above {max_lag:g}s, waiting", err=True
+            ),
+        )
+        try:
+            algorithms = mysql_repository.alter_table(
+                table, changes, lock_wait_timeout, attempts
+            )
+        except OnlineChangeError as error:
+            raise click.ClickException(str(error))
+        click.echo(f"Altered {table} ({', '.join(algorithms)})")
+
+    app.cli.add_command(schema_cli)
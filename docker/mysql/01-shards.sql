@@ -0,0 +1,5 @@
+-- Extra schemas on the local server to try DB_SHARDS with (see README).
+CREATE DATABASE IF NOT EXISTS first_db_shard_0;
+CREATE DATABASE IF NOT EXISTS first_db_shard_1;
+GRANT ALL PRIVILEGES ON first_db_shard_0.* TO 'db_user'@'%';
+GRANT ALL PRIVILEGES ON first_db_shard_1.* TO 'db_user'@'%';
@@ -0,0 +1,9 @@
+# Picked up by gunicorn from the working directory.
+
+
+def post_worker_init(worker: object) -> None:
+    # The application is already loaded at this point, and the worker only
+    # starts accepting connections once this returns.
+    from main import warm_up_worker
+
+    warm_up_worker()
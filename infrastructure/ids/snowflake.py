@@ -0,0 +1,135 @@
+import threading
+import time
+import uuid
+from collections.abc import Callable
+
+from redis import RedisError
+
+from infrastructure.redis.redis_repository import RedisRepository
+from infrastructure.resilience.errors import DependencyUnavailableError
+
+# 2025-01-01T00:00:00Z, 41 bits of milliseconds last until 2094.
+EPOCH_MS = 1735689600000
+WORKER_ID_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKERS = 1 << WORKER_ID_BITS
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+MAX_CLOCK_BACKWARDS_MS = 1000
+
+DEFAULT_LEASE_TTL_SECONDS = 60.0
+
+
+class ClockMovedBackwardsError(RuntimeError):
+    pass
+
+
+class SnowflakeGenerator:
+    # 64-bit IDs: milliseconds since EPOCH_MS, then the worker ID, then a
+    # sequence. They strictly increase per worker and are ordered by time
+    # across workers, so id DESC stays newest first. All of them are far
+    # above the auto-increment IDs of existing rows.
+    def __init__(
+        self,
+        worker_id: Callable[[], int],
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.worker_id = worker_id
+        self.clock = clock
+        self.sleep = sleep
+        self._last_ms = -1
+        self._sequence = SEQUENCE_MASK
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self._lock:
+            worker_id = self.worker_id()
+            now = self._now_ms()
+            if now < self._last_ms:
+                # Small steps back (NTP slewing) are waited out, IDs issued
+                # under the later time must not be handed out again.
+                if self._last_ms - now > MAX_CLOCK_BACKWARDS_MS:
+                    raise ClockMovedBackwardsError(
+                        f"Clock moved back by {self._last_ms - now} ms"
+                    )
+                now = self._wait_until(self._last_ms)
+
+            # The sequence carries on across milliseconds instead of starting
+            # at 0, so consecutive IDs cycle through the shards that
+            # ShardRouter.shard_for picks for them.
+            sequence = (self._sequence + 1) & SEQUENCE_MASK
+            if now == self._last_ms and sequence == 0:
+                now = self._wait_until(self._last_ms + 1)
+
+            self._last_ms = now
+            self._sequence = sequence
+            return (
+                (now - EPOCH_MS) << (WORKER_ID_BITS + SEQUENCE_BITS)
+                | worker_id << SEQUENCE_BITS
+                | sequence
+            )
+
+    def _now_ms(self) -> int:
+        return int(self.clock() * 1000)
+
+    def _wait_until(self, target_ms: int) -> int:
+        now = self._now_ms()
+        while now < target_ms:
+            self.sleep((target_ms - now) / 1000)
+            now = self._now_ms()
+        return now
+
+
+class WorkerIdLease:
+    # Holds a worker ID in Redis with a TTL, renewed from the ID path once
+    # half of it has passed. The local expiry is counted from before the
+    # claim or renewal was sent, so it never outlasts the one in Redis and
+    # IDs are only issued while the worker ID is known to be ours.
+    def __init__(
+        self,
+        redis_repository: RedisRepository,
+        ttl_seconds: float = DEFAULT_LEASE_TTL_SECONDS,
+        max_workers: int = MAX_WORKERS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.redis_repository = redis_repository
+        self.ttl_seconds = ttl_seconds
+        self.max_workers = max_workers
+        self.clock = clock
+        self.owner = uuid.uuid4().hex
+        self._worker_id: int | None = None
+        self._renew_at = 0.0
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def worker_id(self) -> int:
+        with self._lock:
+            now = self.clock()
+            if self._worker_id is not None and now < self._renew_at:
+                return self._worker_id
+            try:
+                worker_id = self._renew_or_claim()
+            except RedisError as error:
+                if self._worker_id is not None and now < self._expires_at:
+                    return self._worker_id
+                self._worker_id = None
+                raise DependencyUnavailableError(
+                    "No note ID worker could be claimed"
+                ) from error
+            self._worker_id = worker_id
+            self._renew_at = now + self.ttl_seconds / 2
+            self._expires_at = now + self.ttl_seconds
+            return worker_id
+
+    def _renew_or_claim(self) -> int:
+        ttl_ms = int(self.ttl_seconds * 1000)
+        if self._worker_id is not None and self.redis_repository.renew_worker_id(
+            self._worker_id, self.owner, ttl_ms
+        ):
+            return self._worker_id
+        worker_id = self.redis_repository.claim_worker_id(
+            self.owner, self.max_workers, ttl_ms
+        )
+        if worker_id is None:
+            raise RuntimeError(f"All {self.max_workers} note ID workers are taken")
+        return worker_id
@@ -0,0 +1,270 @@
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import datetime, timezone
+from types import TracebackType
+from typing import IO, Any
+
+from flask import has_request_context, request
+
+from infrastructure.tracing.tracer import current_span
+
+LOG_QUEUE_SIZE = 10000
+WRITE_BATCH_SIZE = 500
+SEEN_TRACEBACKS = 1024
+
+# Attributes of every LogRecord, the others came in through extra=.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message"}
+
+_ExcInfo = tuple[type[BaseException], BaseException, TracebackType | None]
+
+
+class JsonLineFormatter(logging.Formatter):
+    # One JSON object per line. The full traceback of an exception is only
+    # written the first time its fingerprint (type and frames) shows up,
+    # later records refer to it by the fingerprint.
+    def __init__(self) -> None:
+        super().__init__()
+        self._seen: OrderedDict[str, None] = OrderedDict()
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "source": f"{record.module}:{record.lineno}",
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and record.exc_info[1] is not None:
+            entry["exception"] = self._exception(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+    def _exception(self, exc_info: _ExcInfo) -> dict[str, str]:
+        error_type, error, error_traceback = exc_info
+        frames = "|".join(
+            f"{frame.f_code.co_filename}:{lineno}:{frame.f_code.co_name}"
+            for frame, lineno in traceback.walk_tb(error_traceback)
+        )
+        fingerprint = hashlib.sha1(
+            f"{error_type.__qualname__}|{frames}".encode()
+        ).hexdigest()[:12]
+        exception = {
+            "type": error_type.__qualname__,
+            "message": str(error),
+            "fingerprint": fingerprint,
+        }
+        if fingerprint in self._seen:
+            self._seen.move_to_end(fingerprint)
+        else:
+            exception["traceback"] = "".join(traceback.format_exception(*exc_info))
+            self._seen[fingerprint] = None
+            if len(self._seen) > SEEN_TRACEBACKS:
+                self._seen.popitem(last=False)
+        return exception
+
+
+class _Window:
+    def __init__(self, started_at: float) -> None:
+        self.started_at = started_at
+        self.passed = 0
+        self.suppressed = 0
+        self.sample: dict[str, Any] = {}
+
+
+class LogPipeline(logging.Handler):
+    # The logging thread only stamps the record and puts it on a bounded
+    # queue, formatting and writing happen on the writer thread. A full
+    # queue drops the record instead of making the request wait. Per call
+    # site (logger, level, source line and exception type) burst records
+    # per window go through, the rest of the window is only counted and
+    # written as one record with the count in "repeated" once it ends.
+    def __init__(
+        self,
+        stream: IO[str],
+        queue_size: int = LOG_QUEUE_SIZE,
+        burst: int = 10,
+        window_seconds: float = 60.0,
+        flush_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__()
+        self.stream = stream
+        self.burst = burst
+        self.window_seconds = window_seconds
+        self.flush_seconds = flush_seconds
+        self.clock = clock
+        self.records: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=queue_size)
+        self.written_total = 0
+        self.dropped_total = 0
+        self.suppressed_total = 0
+        self.setFormatter(JsonLineFormatter())
+        self._windows: dict[tuple[Any, ...], _Window] = {}
+        self._write_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Runs under the handler lock, on the thread that logged.
+        try:
+            if self.burst > 0 and not self._admit(record):
+                return
+            self._prepare(record)
+            self.records.put_nowait(record)
+        except queue.Full:
+            self.dropped_total += 1
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        while self._write_pending():
+            pass
+
+    def close(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+        super().close()
+
+    def collect(self) -> list[str]:
+        return [
+            "# HELP log_records_written_total Log records written by the writer thread.",
+            "# TYPE log_records_written_total counter",
+            f"log_records_written_total {self.written_total}",
+            "# HELP log_records_dropped_total Log records dropped on a full queue.",
+            "# TYPE log_records_dropped_total counter",
+            f"log_records_dropped_total {self.dropped_total}",
+            "# HELP log_records_suppressed_total Repeated log records only counted.",
+            "# TYPE log_records_suppressed_total counter",
+            f"log_records_suppressed_total {self.suppressed_total}",
+            "# HELP log_queue_depth Log records waiting for the writer thread.",
+            "# TYPE log_queue_depth gauge",
+            f"log_queue_depth {self.records.qsize()}",
+        ]
+
+    def _admit(self, record: logging.LogRecord) -> bool:
+        key = (
+            record.name,
+            record.levelno,
+            record.pathname,
+            record.lineno,
+            record.exc_info[0] if record.exc_info else None,
+        )
+        now = self.clock()
+        window = self._windows.get(key)
+        if window is None or now - window.started_at >= self.window_seconds:
+            if window is not None:
+                self._report(window)
+            window = self._windows[key] = _Window(now)
+        window.passed += 1
+        if window.passed <= self.burst:
+            return True
+        if not window.suppressed:
+            window.sample = {
+                "name": record.name,
+                "levelno": record.levelno,
+                "levelname": record.levelname,
+                "pathname": record.pathname,
+                "module": record.module,
+                "lineno": record.lineno,
+                "msg": record.getMessage(),
+            }
+            if record.exc_info and record.exc_info[0] is not None:
+                window.sample["exception_type"] = record.exc_info[0].__qualname__
+        window.suppressed += 1
+        self.suppressed_total += 1
+        return False
+
+    def _report(self, window: _Window) -> None:
+        if window.suppressed:
+            summary = logging.makeLogRecord(
+                {**window.sample, "repeated": window.suppressed}
+            )
+            try:
+                self.records.put_nowait(summary)
+            except queue.Full:
+                self.dropped_total += 1
+
+    def _expire_windows(self) -> None:
+        with self.lock:  # type: ignore[union-attr]
+            now = self.clock()
+            for key, window in list(self._windows.items()):
+                if now - window.started_at >= self.window_seconds:
+                    self._report(window)
+                    del self._windows[key]
+
+    def _prepare(self, record: logging.LogRecord) -> None:
+        # The message is rendered now as its arguments may change later, the
+        # traceback is formatted by the writer.
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if has_request_context():
+            record.http = {"method": request.method, "path": request.path}
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.trace.trace_id
+            record.span_id = span.span_id
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                record = self.records.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                pass
+            else:
+                self._write_pending([record])
+            self._expire_windows()
+
+    def _write_pending(self, records: list[logging.LogRecord] | None = None) -> int:
+        records = records or []
+        with self._write_lock:
+            while len(records) < WRITE_BATCH_SIZE:
+                try:
+                    records.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            lines = []
+            for record in records:
+                try:
+                    lines.append(self.format(record) + "\n")
+                except Exception:
+                    self.handleError(record)
+            if lines:
+                self.stream.write("".join(lines))
+                self.stream.flush()
+                self.written_total += len(lines)
+        return len(records)
+
+
+def install_log_pipeline(
+    logger: logging.Logger, pipeline: LogPipeline, level: str
+) -> None:
+    # The pipeline replaces any other handler of the logger, and records do
+    # not propagate to the root logger so that they are not written twice.
+    logger.setLevel(level)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(pipeline)
+    logger.propagate = False
+    pipeline.start()
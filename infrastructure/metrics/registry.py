@@ -0,0 +1,81 @@
+import bisect
+import threading
+from collections.abc import Callable, Iterable
+
+# Upper bounds in seconds, from sub-millisecond cache hits to timeouts.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+Collector = Callable[[], Iterable[str]]
+
+
+class MetricsRegistry:
+    # Renders the Prometheus text exposition format from collectors, which
+    # read their numbers only when /metrics is scraped.
+    def __init__(self) -> None:
+        self._collectors: list[Collector] = []
+
+    def register(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+class LatencyHistogram:
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.label = label
+        self.buckets = buckets
+        self._counts: dict[str, list[int]] = {}
+        self._sums: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, seconds: float) -> None:
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts = self._counts.setdefault(label_value, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[label_value] = self._sums.get(label_value, 0.0) + seconds
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                label_value: {
+                    "count": sum(counts),
+                    "sum_seconds": self._sums[label_value],
+                }
+                for label_value, counts in self._counts.items()
+            }
+
+    def collect(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = [
+                (label_value, list(counts), self._sums[label_value])
+                for label_value, counts in sorted(self._counts.items())
+            ]
+        for label_value, counts, total in series:
+            labels = f'{self.label}="{label_value}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {sum(counts)}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {sum(counts)}")
+        return lines
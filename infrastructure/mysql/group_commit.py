@@ -0,0 +1,135 @@
+import threading
+import time
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+from infrastructure.metrics.registry import LatencyHistogram
+from infrastructure.resilience.deadline import remaining_seconds
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+LEADER = "leader"
+FOLLOWER = "follower"
+
+
+class _Batch(Generic[_T, _R]):
+    def __init__(self, lock: threading.Lock, flush_at: float) -> None:
+        self.items: list[_T] = []
+        self.results: list[_R | Exception] = []
+        self.flush_at = flush_at
+        self.full = False
+        self.changed = threading.Condition(lock)
+        self.done = threading.Event()
+
+
+class GroupCommitter(Generic[_T, _R]):
+    # The first caller of a window becomes its leader: it waits up to
+    # max_wait for more items (or until there are max_batch of them) and then
+    # flushes all of them with a single call on its own thread, so the flush
+    # runs in the leader's app context. The window also closes when the
+    # request deadline of any caller in it is up. The other callers block
+    # until their result is in, whatever it is: giving up earlier could
+    # report a failure for a row that is committed after all. flush returns
+    # one result or exception per item.
+    def __init__(
+        self,
+        flush: Callable[[list[_T]], list[_R | Exception]],
+        max_batch: int,
+        max_wait: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.flush = flush
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.clock = clock
+        self.batches_total = 0
+        self.items_total = 0
+        self.failures_total = 0
+        self.latency = LatencyHistogram(
+            "group_commit_latency_seconds",
+            "Time from submitting a write to getting its result.",
+            "role",
+        )
+        self._open: _Batch[_T, _R] | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, item: _T) -> _R:
+        started_at = self.clock()
+        remaining = remaining_seconds()
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if batch is None:
+                batch = self._open = _Batch(self._lock, started_at + self.max_wait)
+            index = len(batch.items)
+            batch.items.append(item)
+            if remaining is not None and started_at + remaining < batch.flush_at:
+                batch.flush_at = started_at + remaining
+                batch.changed.notify()
+            if len(batch.items) >= self.max_batch:
+                # Later callers start the next batch.
+                self._open = None
+                batch.full = True
+                batch.changed.notify()
+
+            if leader:
+                while not batch.full:
+                    timeout = batch.flush_at - self.clock()
+                    if timeout <= 0:
+                        break
+                    batch.changed.wait(timeout)
+                if self._open is batch:
+                    self._open = None
+
+        if leader:
+            self._flush(batch)
+        else:
+            batch.done.wait()
+
+        self.latency.observe(LEADER if leader else FOLLOWER, self.clock() - started_at)
+        result = batch.results[index]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _flush(self, batch: _Batch[_T, _R]) -> None:
+        # Followers get an error even when the leader is interrupted by a
+        # BaseException, e.g. a gunicorn worker timeout.
+        batch.results = [RuntimeError("Group commit was interrupted")] * len(
+            batch.items
+        )
+        try:
+            try:
+                results = self.flush(batch.items)
+            except Exception as error:
+                results = [error] * len(batch.items)
+            with self._lock:
+                self.batches_total += 1
+                self.items_total += len(batch.items)
+                self.failures_total += sum(
+                    1 for result in results if isinstance(result, Exception)
+                )
+            batch.results = results
+        finally:
+            batch.done.set()
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            batches, items, failures = (
+                self.batches_total,
+                self.items_total,
+                self.failures_total,
+            )
+        return [
+            "# HELP group_commit_batches_total Batches flushed in one transaction.",
+            "# TYPE group_commit_batches_total counter",
+            f"group_commit_batches_total {batches}",
+            "# HELP group_commit_items_total Writes flushed in batches.",
+            "# TYPE group_commit_items_total counter",
+            f"group_commit_items_total {items}",
+            "# HELP group_commit_failures_total Writes of a batch that failed.",
+            "# TYPE group_commit_failures_total counter",
+            f"group_commit_failures_total {failures}",
+            *self.latency.collect(),
+        ]
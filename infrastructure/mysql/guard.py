@@ -0,0 +1,58 @@
+import re
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, ExceptionContext
+
+from infrastructure.resilience.circuit_breaker import CircuitBreaker
+from infrastructure.resilience.deadline import check_deadline
+
+_SELECT = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+
+# Client and server errors that say the server is unreachable or out of
+# connections: CR_CONNECTION_ERROR, CR_CONN_HOST_ERROR, CR_SERVER_GONE_ERROR,
+# CR_SERVER_LOST, ER_CON_COUNT_ERROR and ER_TOO_MANY_USER_CONNECTIONS.
+UNAVAILABLE_ERROR_CODES = frozenset((2002, 2003, 2006, 2013, 1040, 1203))
+
+
+def guard_engine(engine: Engine, breaker: CircuitBreaker) -> None:
+    # Fails fast while the breaker is open, and turns what is left of the
+    # request deadline into a MAX_EXECUTION_TIME hint on every SELECT.
+    @event.listens_for(engine, "do_connect")
+    def before_connect(*args: object) -> None:
+        breaker.before_call()
+        check_deadline()
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def before_cursor_execute(
+        conn: Connection,
+        cursor: object,
+        statement: str,
+        parameters: object,
+        context: object,
+        executemany: bool,
+    ) -> tuple[str, object]:
+        breaker.before_call()
+        remaining = check_deadline()
+        if remaining is not None and _SELECT.match(statement):
+            milliseconds = max(1, int(remaining * 1000))
+            statement = _SELECT.sub(
+                f"SELECT /*+ MAX_EXECUTION_TIME({milliseconds}) */", statement, 1
+            )
+        return statement, parameters
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(*args: object) -> None:
+        breaker.record_success()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context: ExceptionContext) -> None:
+        # Only errors that say the server is unreachable or overloaded count.
+        # Deadlocks, lock wait timeouts and MAX_EXECUTION_TIME aborts are
+        # about one statement, they must not cut off all other queries.
+        if context.is_disconnect or _error_code(context) in UNAVAILABLE_ERROR_CODES:
+            breaker.record_failure()
+
+
+def _error_code(context: ExceptionContext) -> int | None:
+    args = getattr(context.original_exception, "args", ())
+    return args[0] if args and isinstance(args[0], int) else None
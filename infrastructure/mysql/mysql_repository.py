@@ -1,69 +1,1015 @@
+import heapq
 import logging
-from datetime import timezone
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, TypeVar, cast
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.sql import text
+from sqlalchemy import (
+    LargeBinary,
+    Row,
+    Select,
+    Table,
+    bindparam,
+    case,
+    lambda_stmt,
+    select,
+    type_coerce,
+)
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.engine import Connection, CursorResult, Engine
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import func, text
 
-from models.models import Note
+from infrastructure.mysql.group_commit import GroupCommitter
+from infrastructure.mysql.online_change import alter_table_online, replica_lag_seconds
+from infrastructure.mysql.shard_router import Shard, ShardRouter
+from models.models import Note, NoteArchive, NoteDailyStats, make_content_preview
+from models.records import NoteRecord, NoteSummary
+from models.types import compress_text, decompress_text
+
+_T = TypeVar("_T")
+_P = TypeVar("_P", NoteRecord, NoteSummary)
+
+# How long an empty archive is trusted before it is checked again.
+ARCHIVE_RECHECK_SECONDS = 30.0
 
 
 class MySQLRepository:
-    def __init__(self, db: SQLAlchemy, logger: logging.Logger):
+    def __init__(
+        self,
+        db: SQLAlchemy,
+        logger: logging.Logger,
+        read_engine: Engine | None = None,
+        shard_router: ShardRouter | None = None,
+        id_generator: Callable[[], int] | None = None,
+        replica_engines: list[Engine] | None = None,
+    ):
+        # With a shard router the notes table lives on the shards, while the
+        # primary database keeps the archive and the daily stats rollup.
+        # Without an id_generator note IDs come from MySQL auto-increment,
+        # which sharding cannot use. Replicas are only watched for lag, by the
+        # online backfills.
+        if shard_router is not None and id_generator is None:
+            raise ValueError("DB_SHARDS requires NOTE_ID_GENERATOR=snowflake")
         self.db = db
         self.logger = logger
+        self.read_engine = read_engine
+        self.shard_router = shard_router
+        self.id_generator = id_generator
+        self.replica_engines = replica_engines or []
+        self.group_committer: GroupCommitter[Note, int] | None = None
+        self._archive_first_id: int | None = None
+        self._archive_checked_at = float("-inf")
 
     def health_check(self) -> bool:
         try:
             self.db.session.execute(text("SELECT 1"))
+            if self.shard_router is not None:
+                self.shard_router.scatter(_ping)
             return True
         except Exception as error:
             self.logger.error(error, exc_info=True)
             return False
 
-    def get_by_id(self, note_id: int) -> Note | None:
-        result = (
-            self.db.session.query(Note)
-            .filter(
-                Note.id == note_id,
+    def open_connections(self, count: int) -> int:
+        # Holds up to count connections of every engine at the same time, so
+        # they are all connected and pooled before the first request. More
+        # than pool_size would be closed again on check-in.
+        engines = [self.db.engine]
+        if self.read_engine is not None:
+            engines.append(self.read_engine)
+        for shard in self._shards():
+            engines.extend((shard.engine, shard.read_engine))
+        opened = 0
+        for engine in engines:
+            pool = engine.pool
+            size = pool.size() if isinstance(pool, QueuePool) else 1
+            with ExitStack() as stack:
+                for _ in range(min(count, size)):
+                    stack.enter_context(engine.connect())
+                    opened += 1
+        return opened
+
+    def prepare_shards(self) -> int:
+        # Generated IDs are above every auto-increment ID on the primary, so
+        # the archive stays below all hot notes, which get_notes relies on.
+        if self.shard_router is None:
+            raise RuntimeError("Sharding is not configured, set DB_SHARDS")
+        if self.db.session.execute(select(func.count(Note.id))).scalar():
+            raise RuntimeError(
+                "The notes table of the primary database is not empty, "
+                "archive it first"
             )
-            .first()
-        )
-        if result and result.created_at:
-            if result.created_at.tzinfo is None:
-                result.created_at = result.created_at.replace(tzinfo=timezone.utc)
-            else:
-                result.created_at = result.created_at.astimezone(timezone.utc)
+        for shard in self.shard_router.shards:
+            Note.__table__.create(shard.engine, checkfirst=True)
+        return len(self.shard_router.shards)
+
+    def _shards(self) -> list[Shard]:
+        return [] if self.shard_router is None else self.shard_router.shards
+
+    @contextmanager
+    def _reading(self) -> Iterator[Session]:
+        # Reads served to API clients run on the autocommit engine when one is
+        # configured: no transaction, no flush, and no ROLLBACK round trip
+        # when the connection goes back to the pool.
+        if self.read_engine is None:
+            yield cast(Session, self.db.session)
+            return
+        with Session(self.read_engine, autoflush=False) as session:
+            yield session
+
+    def _read_hot(
+        self,
+        select_rows: Callable[[Session, Table], list[_T]],
+        limit: int,
+        key: Callable[[_T], int] | None = None,
+        descending: bool = True,
+    ) -> list[_T]:
+        # Runs select_rows on the notes table, or on every shard's. The shard
+        # pages are each sorted by ID, so merging them and keeping the first
+        # limit rows gives the same page a single table would.
+        if self.shard_router is None:
+            with self._reading() as session:
+                return select_rows(session, Note.__table__)
+        pages = self.shard_router.scatter(lambda shard: _read_shard(shard, select_rows))
+        return list(islice(heapq.merge(*pages, key=key, reverse=descending), limit))
 
-        return result
+    def get_by_id(self, note_id: int) -> NoteRecord | None:
+        records = self.get_by_ids([note_id])
+        return records[0] if records else None
+
+    def enable_group_commit(
+        self, max_batch: int, max_wait: float
+    ) -> GroupCommitter[Note, int]:
+        # add() from concurrent request threads then shares one multi-row
+        # INSERT and one commit, see add_group.
+        self.group_committer = GroupCommitter(self.add_group, max_batch, max_wait)
+        return self.group_committer
 
     def add(self, note: Note) -> int:
-        if note.created_at is not None and note.created_at.tzinfo is not None:
-            note.created_at = note.created_at.astimezone(timezone.utc).replace(
-                tzinfo=None
+        if self.group_committer is not None:
+            return self.group_committer.submit(note)
+        return self._add_one(note)
+
+    def add_group(self, notes: list[Note]) -> list[int | Exception]:
+        rows = [
+            {
+                "title": note.title,
+                "content": note.content,
+                "comment": note.comment,
+                "created_at": note.created_at or datetime.now(timezone.utc),
+            }
+            for note in notes
+        ]
+        if self.id_generator is not None:
+            for row in rows:
+                row["id"] = self.id_generator()
+        if self.shard_router is not None:
+            return self._add_group_to_shards(notes, rows, self.shard_router)
+        try:
+            note_ids = self._insert_group(rows)
+            self.db.session.commit()
+        except (IntegrityError, DataError) as error:
+            # A note the database refuses takes the whole statement down, so
+            # every note is retried on its own and gets its own outcome.
+            self.db.session.rollback()
+            self.logger.warning("Group insert failed, retrying one by one: %s", error)
+            return [self._add_one_or_error(note) for note in notes]
+        except Exception:
+            self.db.session.rollback()
+            raise
+        return list(note_ids)
+
+    def _add_group_to_shards(
+        self, notes: list[Note], rows: list[dict], router: ShardRouter
+    ) -> list[int | Exception]:
+        # Every shard commits its part on its own, so a shard that refuses a
+        # note only retries its own notes one by one, the notes of the other
+        # shards are already in.
+        per_shard: dict[int, list[int]] = {}
+        for position, row in enumerate(rows):
+            per_shard.setdefault(router.shard_for(row["id"]).index, []).append(position)
+        results: list[int | Exception] = [row["id"] for row in rows]
+        for index, positions in per_shard.items():
+            try:
+                with router.shards[index].engine.begin() as connection:
+                    connection.execute(
+                        Note.__table__.insert(),
+                        [rows[position] for position in positions],
+                    )
+            except (IntegrityError, DataError) as error:
+                self.logger.warning(
+                    "Group insert failed on shard %d, retrying one by one: %s",
+                    index,
+                    error,
+                )
+                for position in positions:
+                    results[position] = self._add_one_or_error(notes[position])
+            except Exception as error:
+                for position in positions:
+                    results[position] = error
+        return results
+
+    def _insert_group(self, rows: list[dict]) -> list[int]:
+        if "id" in rows[0]:
+            self.db.session.execute(Note.__table__.insert(), rows)
+            return [row["id"] for row in rows]
+
+        # With innodb_autoinc_lock_mode=2 a multi-row INSERT does not get
+        # consecutive IDs, so every row gets its own statement to learn its
+        # ID. They still share the one commit.
+        note_ids = []
+        for row in rows:
+            result = cast(
+                CursorResult[Any],
+                self.db.session.execute(Note.__table__.insert().values(row)),
             )
+            note_ids.append(int(result.lastrowid))
+        return note_ids
+
+    def _add_one_or_error(self, note: Note) -> int | Exception:
+        try:
+            return self._add_one(note)
+        except Exception as error:
+            self.db.session.rollback()
+            return error
+
+    def _add_one(self, note: Note) -> int:
+        if self.id_generator is not None:
+            note.id = self.id_generator()
+        if self.shard_router is not None:
+            return self._add_to_shard(note, self.shard_router)
         self.db.session.add(note)
-        self.db.session.commit()
         if note.id is None:
+            # Auto-increment IDs are only known after the INSERT.
+            self.db.session.flush()
+        # Read before the commit expires the instance, which would cost a
+        # SELECT to refresh it.
+        note_id = note.id
+        if note_id is None:
             raise RuntimeError("Database did not return an ID")
-        return int(note.id)
+        self.db.session.commit()
+        return int(note_id)
+
+    def _add_to_shard(self, note: Note, router: ShardRouter) -> int:
+        # The ID was generated, it picks the shard.
+        note_id = note.id
+        if note_id is None:
+            raise RuntimeError("Sharded notes need a generated ID")
+        with Session(router.shard_for(note_id).engine) as session:
+            session.add(note)
+            session.commit()
+        return int(note_id)
+
+    def add_many(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+        if self.id_generator is not None:
+            # IDs in row order, so a batch keeps its order in id DESC pages.
+            rows = [{**row, "id": self.id_generator()} for row in rows]
+        # Core executemany, PyMySQL rewrites it into multi-row INSERT statements
+        if self.shard_router is not None:
+            self._add_many_to_shards(rows, self.shard_router)
+        else:
+            self.db.session.execute(Note.__table__.insert(), rows)
+        self.db.session.commit()
+
+    def _add_many_to_shards(self, rows: list[dict], router: ShardRouter) -> None:
+        per_shard: dict[int, list[dict]] = {}
+        for row in rows:
+            per_shard.setdefault(router.shard_for(row["id"]).index, []).append(row)
+        for index, shard_rows in per_shard.items():
+            with router.shards[index].engine.begin() as connection:
+                connection.execute(Note.__table__.insert(), shard_rows)
 
     def get_notes(
         self, limit: int = 5, last_id: int | None = None
-    ) -> tuple[list["Note"], bool]:
-        query = self.db.session.query(Note).order_by(Note.id.desc())
+    ) -> tuple[list[NoteRecord], bool]:
+        return self._read_page(_select_records, limit, last_id)
+
+    def get_note_summaries(
+        self, limit: int = 5, last_id: int | None = None
+    ) -> tuple[list[NoteSummary], bool]:
+        # The page of get_notes with the stored previews, so the content is
+        # neither read nor sent.
+        return self._read_page(_select_summaries, limit, last_id)
+
+    def _read_page(
+        self,
+        select_page: Callable[..., list[_P]],
+        limit: int,
+        last_id: int | None,
+    ) -> tuple[list[_P], bool]:
+        rows = self._read_hot(
+            lambda session, table: select_page(
+                session, table, limit + 1, before_id=last_id
+            ),
+            limit + 1,
+            key=_row_id,
+        )
+        if len(rows) <= limit and self._archive_has_ids_below(last_id):
+            # The hot table is exhausted. Archived IDs are always lower than
+            # hot ones, so the page simply continues in the archive.
+            with self._reading() as session:
+                rows.extend(
+                    select_page(
+                        session,
+                        NoteArchive.__table__,
+                        limit + 1 - len(rows),
+                        before_id=last_id,
+                    )
+                )
+        return rows[:limit], len(rows) > limit
+
+    def _archive_has_ids_below(self, last_id: int | None) -> bool:
+        # The lowest archived ID does not change once the archive has rows,
+        # archive_notes only adds higher ones, so it is read once. An empty
+        # archive is checked again every ARCHIVE_RECHECK_SECONDS: pages of
+        # other processes continue into it at most that long after the first
+        # archive run.
+        if self._archive_first_id is None and (
+            time.monotonic() - self._archive_checked_at >= ARCHIVE_RECHECK_SECONDS
+        ):
+            with self._reading() as session:
+                first_id = session.execute(select(func.min(NoteArchive.id))).scalar()
+            self._archive_checked_at = time.monotonic()
+            self._archive_first_id = None if first_id is None else int(first_id)
+        if self._archive_first_id is None:
+            return False
+        return last_id is None or last_id > self._archive_first_id
+
+    def get_notes_since(
+        self, since_id: int, limit: int
+    ) -> tuple[list[NoteRecord], bool]:
+        # Forward sync walks IDs upwards, so it starts in the archive (which
+        # only holds the lowest IDs) and continues into the hot table.
+        with self._reading() as session:
+            records = _select_records(
+                session, NoteArchive.__table__, limit + 1, after_id=since_id
+            )
+        if len(records) <= limit:
+            remaining = limit + 1 - len(records)
+            records.extend(
+                self._read_hot(
+                    lambda session, table: _select_records(
+                        session, table, remaining, after_id=since_id
+                    ),
+                    remaining,
+                    key=_row_id,
+                    descending=False,
+                )
+            )
+        return records[:limit], len(records) > limit
+
+    def get_by_ids(self, note_ids: list[int]) -> list[NoteRecord]:
+        if not note_ids:
+            return []
+        found = {record.id: record for record in self._get_hot_by_ids(note_ids)}
+        missing = [note_id for note_id in note_ids if note_id not in found]
+        if missing:
+            with self._reading() as session:
+                found.update(
+                    (record.id, record)
+                    for record in _select_records(
+                        session, NoteArchive.__table__, len(missing), ids=missing
+                    )
+                )
+
+        return [found[note_id] for note_id in note_ids if note_id in found]
+
+    def _get_hot_by_ids(self, note_ids: list[int]) -> list[NoteRecord]:
+        if self.shard_router is None:
+            with self._reading() as session:
+                return _select_records(
+                    session, Note.__table__, len(note_ids), ids=note_ids
+                )
+
+        # Only the shards owning one of the IDs are asked.
+        owned = self.shard_router.group_by_shard(note_ids)
+
+        def select_owned(shard: Shard) -> list[NoteRecord]:
+            ids = owned[shard.index]
+            return _read_shard(
+                shard,
+                lambda session, table: _select_records(
+                    session, table, len(ids), ids=ids
+                ),
+            )
+
+        pages = self.shard_router.scatter(
+            select_owned, [self.shard_router.shards[index] for index in owned]
+        )
+        return [record for page in pages for record in page]
+
+    def get_note_ids(
+        self, limit: int = 5, last_id: int | None = None
+    ) -> tuple[list[int], bool]:
+        # Same page as get_notes, but only the primary keys, for callers that
+        # already hold the rendered notes.
+        ids = self._read_hot(
+            lambda session, table: _select_ids(
+                session, table, limit + 1, before_id=last_id
+            ),
+            limit + 1,
+        )
+        if len(ids) <= limit:
+            with self._reading() as session:
+                ids.extend(
+                    _select_ids(
+                        session,
+                        NoteArchive.__table__,
+                        limit + 1 - len(ids),
+                        before_id=last_id,
+                    )
+                )
+        return ids[:limit], len(ids) > limit
+
+    def get_note_ids_since(self, since_id: int, limit: int) -> tuple[list[int], bool]:
+        with self._reading() as session:
+            ids = _select_ids(
+                session, NoteArchive.__table__, limit + 1, after_id=since_id
+            )
+        if len(ids) <= limit:
+            remaining = limit + 1 - len(ids)
+            ids.extend(
+                self._read_hot(
+                    lambda session, table: _select_ids(
+                        session, table, remaining, after_id=since_id
+                    ),
+                    remaining,
+                    descending=False,
+                )
+            )
+        return ids[:limit], len(ids) > limit
+
+    def get_first_unsettled_id(
+        self, after_id: int, up_to_id: int, created_after: datetime
+    ) -> int | None:
+        # The lowest ID in (after_id, up_to_id] of a note created after
+        # created_after. Archived notes are old, so only the hot tables count.
+        def select_first(session: Session, table: Table) -> list[int]:
+            first_id = session.scalar(
+                select(func.min(table.c.id)).where(
+                    table.c.id > after_id,
+                    table.c.id <= up_to_id,
+                    table.c.created_at > created_after,
+                )
+            )
+            return [] if first_id is None else [int(first_id)]
+
+        ids = self._read_hot(select_first, 1, descending=False)
+        return ids[0] if ids else None
+
+    def get_id_bounds(
+        self, since_id: int | None = None, since_created_at: datetime | None = None
+    ) -> tuple[int, int] | None:
+        rows = [
+            self.db.session.execute(_id_bounds(table, since_id, since_created_at)).one()
+            for table in _NOTE_TABLES
+        ]
+        for shard in self._shards():
+            with shard.read_engine.connect() as connection:
+                rows.append(
+                    connection.execute(
+                        _id_bounds(Note.__table__, since_id, since_created_at)
+                    ).one()
+                )
+
+        bounds = [(int(first), int(last)) for first, last in rows if first is not None]
+        if not bounds:
+            return None
+        return min(first for first, _ in bounds), max(last for _, last in bounds)
+
+    def iter_notes_by_id_range(
+        self,
+        first_id: int,
+        last_id: int,
+        since_created_at: datetime | None = None,
+        batch_size: int = 10000,
+    ) -> Iterator[Row[Any]]:
+        # Runs on dedicated connections so that several ranges can be read
+        # concurrently, one per thread. The archive holds the lower IDs, so
+        # reading it first keeps the rows in ID order, then the pages of the
+        # shards are merged by ID.
+        with self.db.engine.connect() as connection:
+            for table in _NOTE_TABLES:
+                yield from _iter_id_range(
+                    connection, table, first_id, last_id, since_created_at, batch_size
+                )
+        with ExitStack() as stack:
+            ranges = [
+                _iter_id_range(
+                    stack.enter_context(shard.engine.connect()),
+                    Note.__table__,
+                    first_id,
+                    last_id,
+                    since_created_at,
+                    batch_size,
+                )
+                for shard in self._shards()
+            ]
+            yield from heapq.merge(*ranges, key=lambda row: int(row.id))
+
+    def rewrite_content(
+        self, after_id: int, batch_size: int, threshold: int
+    ) -> tuple[int | None, int, int]:
+        # Next batch of rows above after_id, archive first like
+        # backfill_content_previews. Works on the stored bytes, so rows are
+        # only written when their storage format changes for the given
+        # compression threshold. Returns the last ID of the batch (None when
+        # nothing was left) and the number of rows examined and rewritten.
+        last_id = None
+        examined = rewritten_count = 0
+        for table in _NOTE_TABLES:
+            limit = batch_size - examined
+            if table is Note.__table__ and self.shard_router is not None:
+                rows, rewritten = self._update_shards(
+                    self.shard_router,
+                    lambda session, table: _select_stored_content(
+                        session, table, after_id, limit
+                    ),
+                    lambda session, table, rows: _write_content(
+                        session, table, rows, threshold
+                    ),
+                    limit,
+                )
+            else:
+                session = cast(Session, self.db.session)
+                rows = _select_stored_content(session, table, after_id, limit)
+                rewritten = _write_content(session, table, rows, threshold)
+            if rows:
+                last_id = int(rows[-1].id)
+            examined += len(rows)
+            rewritten_count += rewritten
+            if examined >= batch_size:
+                break
+
+        self.db.session.commit()
+        return last_id, examined, rewritten_count
+
+    def backfill_content_previews(
+        self, after_id: int, batch_size: int
+    ) -> tuple[int | None, int]:
+        # Next batch of rows without a preview above after_id, from the
+        # archive first as it holds the lower IDs, then from the notes of the
+        # primary or of all shards. Returns the last ID of the batch (None
+        # when nothing was left) and the number of rows written.
+        last_id = None
+        written = 0
+        for table in _NOTE_TABLES:
+            if table is Note.__table__ and self.shard_router is not None:
+                limit = batch_size - written
+                rows, _ = self._update_shards(
+                    self.shard_router,
+                    lambda session, table: _select_missing_previews(
+                        session, table, after_id, limit
+                    ),
+                    _write_previews,
+                    limit,
+                )
+            else:
+                session = cast(Session, self.db.session)
+                rows = _select_missing_previews(
+                    session, table, after_id, batch_size - written
+                )
+                _write_previews(session, table, rows)
+            if rows:
+                last_id = int(rows[-1].id)
+                written += len(rows)
+            if written >= batch_size:
+                break
+        self.db.session.commit()
+        return last_id, written
+
+    def _update_shards(
+        self,
+        router: ShardRouter,
+        select_rows: Callable[[Session, Table], list[Row[Any]]],
+        write_rows: Callable[[Session, Table, list[Row[Any]]], int],
+        limit: int,
+    ) -> tuple[list[Row[Any]], int]:
+        # Keeps the lowest IDs across the shards, so that the last one stays a
+        # valid position for all of them. Every shard commits its part on its
+        # own. Returns the rows and the sum of what write_rows returned.
+        pages = router.scatter(lambda shard: _read_shard(shard, select_rows))
+        rows = list(islice(heapq.merge(*pages, key=lambda row: int(row.id)), limit))
+        per_shard: dict[int, list[Row[Any]]] = {}
+        for row in rows:
+            per_shard.setdefault(router.shard_for(row.id).index, []).append(row)
+        written = 0
+        for index, shard_rows in per_shard.items():
+            with Session(router.shards[index].engine) as session:
+                written += write_rows(session, Note.__table__, shard_rows)
+                session.commit()
+        return rows, written
 
-        if last_id is not None:
-            query = query.filter(Note.id < last_id)
+    def get_replica_lag(self) -> float | None:
+        # Highest lag of the configured replicas, None without any.
+        lags = [
+            lag
+            for lag in map(replica_lag_seconds, self.replica_engines)
+            if lag is not None
+        ]
+        return max(lags, default=None)
 
-        results: list[Note] = query.limit(limit + 1).all()
-        has_more = len(results) > limit
-        notes = results[:limit]
+    def alter_table(
+        self, table: str, changes: str, lock_wait_timeout: int, attempts: int
+    ) -> list[str]:
+        # The notes table exists on the primary and on every shard. Returns
+        # the algorithm used per database.
+        engines = [self.db.engine]
+        if table == Note.__tablename__:
+            engines.extend(shard.engine for shard in self._shards())
+        algorithms = []
+        for engine in engines:
+            with engine.connect() as connection:
+                algorithms.append(
+                    alter_table_online(
+                        connection, table, changes, lock_wait_timeout, attempts
+                    )
+                )
+                connection.commit()
+        return algorithms
+
+    def get_archive_boundary(self, cutoff: datetime) -> int | None:
+        # Notes below the lowest ID created after the cutoff are all older than
+        # the cutoff. Archiving only below that boundary keeps every archived ID
+        # lower than every hot one, which get_notes relies on. With shards the
+        # boundary is taken across all of them.
+        newer = self._hot_scalars(
+            select(func.min(Note.id)).where(Note.created_at >= cutoff)
+        )
+        if newer:
+            return min(newer)
+        last = self._hot_scalars(select(func.max(Note.id)))
+        return max(last) + 1 if last else None
+
+    def _hot_scalars(self, stmt: Select[Any]) -> list[int]:
+        # The non-NULL results of stmt on the notes of the primary and of
+        # every shard.
+        values = [self.db.session.execute(stmt).scalar()]
+        for shard in self._shards():
+            with shard.read_engine.connect() as connection:
+                values.append(connection.execute(stmt).scalar())
+        return [int(value) for value in values if value is not None]
+
+    def archive_notes(self, boundary: int, batch_size: int) -> int:
+        if self.shard_router is not None:
+            moved = sum(
+                self._archive_shard(shard, boundary, batch_size)
+                for shard in self.shard_router.shards
+            )
+        else:
+            moved = self._archive_primary(boundary, batch_size)
+        # Pages read by this process continue into the archive right away.
+        self._archive_checked_at = float("-inf")
+        return moved
+
+    def _archive_primary(self, boundary: int, batch_size: int) -> int:
+        hot = Note.__table__
+        cold = NoteArchive.__table__
+        ids = (
+            self.db.session.execute(
+                select(hot.c.id)
+                .where(hot.c.id < boundary)
+                .order_by(hot.c.id)
+                .limit(batch_size)
+                .with_for_update()
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            self.db.session.commit()
+            return 0
+
+        in_batch = hot.c.id.between(ids[0], ids[-1])
+        columns = _archived_columns(hot)
+        self.db.session.execute(
+            cold.insert().from_select(
+                [column.name for column in columns], select(*columns).where(in_batch)
+            )
+        )
+        self.db.session.execute(hot.delete().where(in_batch))
+        self.db.session.commit()
+        return len(ids)
+
+    def _archive_shard(self, shard: Shard, boundary: int, batch_size: int) -> int:
+        # The shard and the archive on the primary share no transaction: the
+        # copy is committed first and skips rows already archived, so a batch
+        # that failed before its delete is moved again by the next run.
+        hot = Note.__table__
+        cold = NoteArchive.__table__
+        with Session(shard.engine) as session:
+            rows = session.execute(
+                select(*_archived_columns(hot))
+                .where(hot.c.id < boundary)
+                .order_by(hot.c.id)
+                .limit(batch_size)
+                .with_for_update()
+            ).all()
+            if not rows:
+                session.commit()
+                return 0
+
+            self.db.session.execute(
+                cold.insert().prefix_with("IGNORE", dialect="mysql"),
+                [row._asdict() for row in rows],
+            )
+            self.db.session.commit()
+            session.execute(hot.delete().where(hot.c.id.in_([row.id for row in rows])))
+            session.commit()
+        return len(rows)
+
+    def get_daily_stats(self, start: date, end: date) -> dict[date, int]:
+        with self._reading() as session:
+            rows = (
+                session.query(NoteDailyStats.day, NoteDailyStats.notes_count)
+                .filter(NoteDailyStats.day.between(start, end))
+                .all()
+            )
+        return {row.day: int(row.notes_count) for row in rows}
+
+    def get_rollup_total(self) -> int:
+        with self._reading() as session:
+            total = session.query(
+                func.coalesce(func.sum(NoteDailyStats.notes_count), 0)
+            ).scalar()
+        return int(total)
+
+    def count_notes(self) -> int:
+        total = sum(
+            int(self.db.session.execute(select(func.count(table.c.id))).scalar() or 0)
+            for table in _NOTE_TABLES
+        )
+        for shard in self._shards():
+            with shard.read_engine.connect() as connection:
+                total += int(
+                    connection.execute(select(func.count(Note.id))).scalar() or 0
+                )
+        return total
+
+    def get_first_note_day(self) -> date | None:
+        days = [
+            self.db.session.execute(select(func.min(table.c.created_at))).scalar()
+            for table in _NOTE_TABLES
+        ]
+        for shard in self._shards():
+            with shard.read_engine.connect() as connection:
+                days.append(
+                    connection.execute(select(func.min(Note.created_at))).scalar()
+                )
+        return min((day.date() for day in days if day is not None), default=None)
+
+    def count_notes_by_day(self, start: date, end: date) -> dict[date, int]:
+        counts: Counter[date] = Counter()
+        for table in _NOTE_TABLES:
+            rows = self.db.session.execute(_count_by_day(table, start, end)).all()
+            counts.update({row[0]: int(row[1]) for row in rows})
+        for shard in self._shards():
+            with shard.read_engine.connect() as connection:
+                rows = connection.execute(
+                    _count_by_day(Note.__table__, start, end)
+                ).all()
+            counts.update({row[0]: int(row[1]) for row in rows})
+        return dict(counts)
+
+    def replace_daily_stats(self, counts: dict[date, int]) -> None:
+        if not counts:
+            return
+        stmt = insert(NoteDailyStats).values(
+            [{"day": day, "notes_count": count} for day, count in counts.items()]
+        )
+        stmt = stmt.on_duplicate_key_update(notes_count=stmt.inserted.notes_count)
+        self.db.session.execute(stmt)
+        self.db.session.commit()
+
+
+_NOTE_TABLES: tuple[Table, ...] = (NoteArchive.__table__, Note.__table__)
+
+
+def _ping(shard: Shard) -> None:
+    with shard.read_engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def _read_shard(
+    shard: Shard, select_rows: Callable[[Session, Table], list[_T]]
+) -> list[_T]:
+    with Session(shard.read_engine, autoflush=False) as session:
+        return select_rows(session, Note.__table__)
+
+
+def _select_missing_previews(
+    session: Session, table: Table, after_id: int, limit: int
+) -> list[Row[Any]]:
+    return list(
+        session.execute(
+            select(table.c.id, table.c.content)
+            .where(table.c.id > after_id, table.c.content_preview.is_(None))
+            .order_by(table.c.id)
+            .limit(limit)
+        ).all()
+    )
+
+
+def _write_previews(session: Session, table: Table, rows: list[Row[Any]]) -> int:
+    if not rows:
+        return 0
+    session.execute(
+        table.update()
+        .where(table.c.id == bindparam("b_id"))
+        .values(content_preview=bindparam("b_preview")),
+        [
+            {"b_id": note_id, "b_preview": make_content_preview(content)}
+            for note_id, content in rows
+        ],
+    )
+    return len(rows)
+
+
+def _select_stored_content(
+    session: Session, table: Table, after_id: int, limit: int
+) -> list[Row[Any]]:
+    # The content as stored, compressed or not.
+    return list(
+        session.execute(
+            select(table.c.id, type_coerce(table.c.content, LargeBinary))
+            .where(table.c.id > after_id)
+            .order_by(table.c.id)
+            .limit(limit)
+        ).all()
+    )
+
+
+def _write_content(
+    session: Session, table: Table, rows: list[Row[Any]], threshold: int
+) -> int:
+    updates = []
+    for note_id, stored in rows:
+        rewritten = compress_text(decompress_text(stored), threshold)
+        if rewritten != stored:
+            updates.append({"b_id": note_id, "b_content": rewritten})
+    if updates:
+        session.execute(
+            table.update()
+            .where(table.c.id == bindparam("b_id"))
+            .values(content=bindparam("b_content", type_=LargeBinary)),
+            updates,
+        )
+    return len(updates)
+
+
+def _id_bounds(
+    table: Table, since_id: int | None, since_created_at: datetime | None
+) -> Select[Any]:
+    stmt = select(func.min(table.c.id), func.max(table.c.id))
+    if since_id is not None:
+        stmt = stmt.where(table.c.id > since_id)
+    if since_created_at is not None:
+        stmt = stmt.where(table.c.created_at > since_created_at)
+    return stmt
+
+
+def _iter_id_range(
+    connection: Connection,
+    table: Table,
+    first_id: int,
+    last_id: int,
+    since_created_at: datetime | None,
+    batch_size: int,
+) -> Iterator[Row[Any]]:
+    cursor = first_id - 1
+    while True:
+        stmt = (
+            select(table)
+            .where(table.c.id > cursor, table.c.id <= last_id)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        )
+        if since_created_at is not None:
+            stmt = stmt.where(table.c.created_at > since_created_at)
+
+        rows = connection.execute(stmt).all()
+        yield from rows
+        if len(rows) < batch_size:
+            break
+        cursor = rows[-1].id
+
+
+def _archived_columns(table: Table) -> list[Any]:
+    return [
+        table.c.id,
+        table.c.title,
+        table.c.content,
+        table.c.created_at,
+        table.c.comment,
+        table.c.content_preview,
+    ]
+
+
+def _count_by_day(table: Table, start: date, end: date) -> Select[Any]:
+    day = func.date(table.c.created_at)
+    return (
+        select(day, func.count(table.c.id))
+        .where(
+            table.c.created_at >= datetime.combine(start, datetime.min.time()),
+            table.c.created_at
+            < datetime.combine(end + timedelta(days=1), datetime.min.time()),
+        )
+        .group_by(day)
+    )
+
+
+def _row_id(record: NoteRecord | NoteSummary) -> int:
+    return record.id
+
+
+def _select_records(
+    session: Session,
+    table: Table,
+    limit: int,
+    before_id: int | None = None,
+    after_id: int | None = None,
+    ids: list[int] | None = None,
+) -> list[NoteRecord]:
+    # Lambda statements are built and compiled once per combination of
+    # branches and only get new parameters bound on later calls. Rows become
+    # NoteRecords directly, without ORM instance state or identity map.
+    stmt = lambda_stmt(
+        lambda: select(
+            table.c.id,
+            table.c.title,
+            table.c.content,
+            table.c.created_at,
+            table.c.comment,
+        )
+    )
+    if ids is not None:
+        stmt += lambda s: s.where(table.c.id.in_(ids))
+    if after_id is not None:
+        stmt += lambda s: s.where(table.c.id > after_id).order_by(table.c.id.asc())
+    else:
+        stmt += lambda s: s.order_by(table.c.id.desc())
+    if before_id is not None:
+        stmt += lambda s: s.where(table.c.id < before_id)
+    stmt += lambda s: s.limit(limit)
+    return [NoteRecord._make(row) for row in session.execute(stmt)]
+
+
+def _select_summaries(
+    session: Session,
+    table: Table,
+    limit: int,
+    before_id: int | None = None,
+) -> list[NoteSummary]:
+    # The content is only read for rows that have no preview yet.
+    stmt = lambda_stmt(
+        lambda: select(
+            table.c.id,
+            table.c.title,
+            table.c.content_preview,
+            table.c.created_at,
+            table.c.comment,
+            case((table.c.content_preview.is_(None), table.c.content)),
+        ).order_by(table.c.id.desc())
+    )
+    if before_id is not None:
+        stmt += lambda s: s.where(table.c.id < before_id)
+    stmt += lambda s: s.limit(limit)
+    return [
+        NoteSummary(
+            note_id,
+            title,
+            make_content_preview(content) if preview is None else preview,
+            created_at,
+            comment,
+        )
+        for note_id, title, preview, created_at, comment, content in session.execute(
+            stmt
+        )
+    ]
 
-        for note in notes:
-            if note.created_at:
-                if note.created_at.tzinfo is None:
-                    note.created_at = note.created_at.replace(tzinfo=timezone.utc)
-                else:
-                    note.created_at = note.created_at.astimezone(timezone.utc)
 
-        return notes, has_more
+def _select_ids(
+    session: Session,
+    table: Table,
+    limit: int,
+    before_id: int | None = None,
+    after_id: int | None = None,
+) -> list[int]:
+    stmt = select(table.c.id).limit(limit)
+    if after_id is not None:
+        stmt = stmt.where(table.c.id > after_id).order_by(table.c.id.asc())
+    else:
+        stmt = stmt.order_by(table.c.id.desc())
+    if before_id is not None:
+        stmt = stmt.where(table.c.id < before_id)
+    return [int(note_id) for note_id in session.scalars(stmt)]
@@ -0,0 +1,199 @@
+import time
+from collections.abc import Callable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+ER_LOCK_WAIT_TIMEOUT = 1205
+ER_ALTER_OPERATION_NOT_SUPPORTED = 1845
+ER_ALTER_OPERATION_NOT_SUPPORTED_REASON = 1846
+
+# Tried in this order. There is deliberately no ALGORITHM=COPY fallback: a
+# copying ALTER blocks writes for as long as the copy takes.
+ONLINE_ALGORITHMS = ("ALGORITHM=INSTANT", "ALGORITHM=INPLACE, LOCK=NONE")
+
+
+class OnlineChangeError(Exception):
+    pass
+
+
+def replica_lag_seconds(engine: Engine) -> float | None:
+    # None when the server is not a replica, inf while replication is stopped.
+    with engine.connect() as connection:
+        row = connection.execute(text("SHOW REPLICA STATUS")).mappings().first()
+    if row is None:
+        return None
+    lag = row.get("Seconds_Behind_Source")
+    return float("inf") if lag is None else float(lag)
+
+
+def wait_for_replicas(
+    replica_lag: Callable[[], float | None],
+    max_lag_seconds: float,
+    on_lag: Callable[[float], None] | None = None,
+    check_seconds: float = 1.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> float:
+    # Returns the seconds spent waiting.
+    waited = 0.0
+    while True:
+        lag = replica_lag()
+        if lag is None or lag <= max_lag_seconds:
+            return waited
+        if on_lag is not None:
+            on_lag(lag)
+        sleep(check_seconds)
+        waited += check_seconds
+
+
+class ChunkThrottle:
+    # Sizes the chunks of a backfill so that each takes about target_seconds
+    # on the primary: a slow chunk halves the next one (or more, in
+    # proportion), a fast one doubles it, up to max_batch_size. Chunks that
+    # ran over the target are followed by that much extra pause, and no
+    # chunk starts while a replica lags more than max_lag_seconds.
+    def __init__(
+        self,
+        max_batch_size: int,
+        target_seconds: float,
+        sleep_seconds: float,
+        max_lag_seconds: float,
+        replica_lag: Callable[[], float | None],
+        on_lag: Callable[[float], None] | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.max_batch_size = max_batch_size
+        self.batch_size = max_batch_size
+        self.target_seconds = target_seconds
+        self.sleep_seconds = sleep_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self.replica_lag = replica_lag
+        self.on_lag = on_lag
+        self.sleep = sleep
+        self.throttled_seconds = 0.0
+
+    def before_chunk(self) -> None:
+        self.throttled_seconds += wait_for_replicas(
+            self.replica_lag, self.max_lag_seconds, self.on_lag, sleep=self.sleep
+        )
+
+    def after_chunk(self, chunk_seconds: float) -> None:
+        if chunk_seconds > self.target_seconds:
+            self.batch_size = max(
+                1,
+                min(
+                    self.batch_size // 2,
+                    int(self.batch_size * self.target_seconds / chunk_seconds),
+                ),
+            )
+        elif chunk_seconds < self.target_seconds / 2:
+            self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+
+        pause = self.sleep_seconds + max(0.0, chunk_seconds - self.target_seconds)
+        if pause > 0:
+            self.sleep(pause)
+            self.throttled_seconds += pause
+
+
+def run_backfill(
+    step: Callable[[int, int], tuple[int | None, int]],
+    throttle: ChunkThrottle,
+    progress: dict[str, int],
+    last_id: int | None,
+    report: Callable[[dict[str, int], float | None], None],
+    clock: Callable[[], float] = time.monotonic,
+) -> dict[str, int]:
+    # step processes the next chunk of at most batch_size rows above after_id
+    # in ID order and returns the last ID it covered (None once nothing is
+    # left) and the number of rows it processed, in its own transaction.
+    # progress (after_id, rows, chunks) is updated in place after every
+    # chunk and handed to report together with the estimated seconds left
+    # until last_id, so that a run restarted from a saved copy continues
+    # after the last finished chunk.
+    start_id = progress["after_id"]
+    started_at = clock()
+    while True:
+        throttle.before_chunk()
+        chunk_started_at = clock()
+        chunk_last_id, rows = step(progress["after_id"], throttle.batch_size)
+        if chunk_last_id is None:
+            return progress
+        chunk_seconds = clock() - chunk_started_at
+
+        progress["after_id"] = chunk_last_id
+        progress["rows"] += rows
+        progress["chunks"] += 1
+        report(
+            progress,
+            estimate_seconds_left(
+                start_id, chunk_last_id, last_id, clock() - started_at
+            ),
+        )
+        throttle.after_chunk(chunk_seconds)
+
+
+def estimate_seconds_left(
+    start_id: int, position: int, last_id: int | None, elapsed: float
+) -> float | None:
+    # Extrapolates the ID range covered so far in this run. Time-ordered IDs
+    # make this a time-proportional rather than a row-proportional estimate.
+    if last_id is None or position <= start_id or elapsed <= 0:
+        return None
+    rate = (position - start_id) / elapsed
+    return max(0.0, (last_id - position) / rate)
+
+
+def alter_table_online(
+    connection: Connection,
+    table: str,
+    changes: str,
+    lock_wait_timeout: int = 2,
+    attempts: int = 5,
+    retry_seconds: float = 5.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> str:
+    # Runs ALTER TABLE <table> <changes> with the first of ONLINE_ALGORITHMS
+    # MySQL accepts for it and returns that algorithm. Even an instant ALTER
+    # needs an exclusive metadata lock for a moment, and every query on the
+    # table queues up behind it while it waits for a long running
+    # transaction. A short lock_wait_timeout keeps that queue short, the
+    # ALTER is retried instead.
+    quoted_table = connection.dialect.identifier_preparer.quote(table)
+    if connection.dialect.name != "mysql":
+        connection.execute(text(f"ALTER TABLE {quoted_table} {changes}"))
+        return "DEFAULT"
+
+    connection.execute(
+        text("SET SESSION lock_wait_timeout = :timeout"),
+        {"timeout": lock_wait_timeout},
+    )
+    try:
+        for algorithm in ONLINE_ALGORITHMS:
+            statement = text(f"ALTER TABLE {quoted_table} {changes}, {algorithm}")
+            for attempt in range(1, attempts + 1):
+                try:
+                    connection.execute(statement)
+                    return algorithm
+                except DBAPIError as error:
+                    code = _mysql_error_code(error)
+                    if code in (
+                        ER_ALTER_OPERATION_NOT_SUPPORTED,
+                        ER_ALTER_OPERATION_NOT_SUPPORTED_REASON,
+                    ):
+                        break
+                    if code != ER_LOCK_WAIT_TIMEOUT or attempt == attempts:
+                        raise
+                    sleep(retry_seconds)
+    finally:
+        connection.execute(text("SET SESSION lock_wait_timeout = DEFAULT"))
+
+    raise OnlineChangeError(
+        f"ALTER TABLE {table} {changes} needs a table copy, run it with an online "
+        "schema change tool such as gh-ost or pt-online-schema-change"
+    )
+
+
+def _mysql_error_code(error: DBAPIError) -> int | None:
+    args = getattr(error.orig, "args", ())
+    return args[0] if args and isinstance(args[0], int) else None
@@ -0,0 +1,149 @@
+import logging
+import re
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+from flask import Flask, Response, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, ExceptionContext
+
+QUERIES_HEADER = "X-DB-Queries"
+TIME_HEADER = "X-DB-Time"
+DEFAULT_REPEAT_THRESHOLD = 5
+
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"\b\d+\b")
+_PLACEHOLDER_LIST = re.compile(r"%\(\w+\)s(\s*,\s*%\(\w+\)s)+|%s(\s*,\s*%s)+")
+
+
+class QueryStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration_ms = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        self.count += 1
+        self.duration_ms += duration_ms
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int) -> dict[str, int]:
+        return {shape: n for shape, n in self.shapes.items() if n > threshold}
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    shape = _PLACEHOLDER_LIST.sub("?, ...", statement)
+    shape = _NUMBER.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    # Also meant for tests, e.g. to assert that a route stays within its
+    # query budget: with count_queries() as stats: ...; stats.count == 1
+    _install_listeners()
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def register_query_accounting(
+    app: Flask,
+    logger: logging.Logger,
+    expose_headers: bool = False,
+    repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD,
+) -> None:
+    _install_listeners()
+
+    @app.before_request
+    def start_query_accounting() -> None:
+        g.query_stats_token = _current_stats.set(QueryStats())
+
+    @app.after_request
+    def finish_query_accounting(response: Response) -> Response:
+        stats = _current_stats.get()
+        if stats is None:
+            return response
+
+        for shape, count in stats.repeated_shapes(repeat_threshold).items():
+            logger.warning(
+                "Possible N+1 query on %s %s: statement ran %d times: %s",
+                request.method,
+                request.path,
+                count,
+                shape,
+            )
+
+        if expose_headers:
+            response.headers[QUERIES_HEADER] = str(stats.count)
+            response.headers[TIME_HEADER] = f"{stats.duration_ms:.2f}"
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={stats.duration_ms:.2f};desc="{stats.count} queries"',
+            )
+        return response
+
+    @app.teardown_request
+    def reset_query_accounting(error: BaseException | None) -> None:
+        token: Token[QueryStats | None] | None = g.pop("query_stats_token", None)
+        if token is not None:
+            _current_stats.reset(token)
+
+
+def _install_listeners() -> None:
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    context: object,
+    executemany: bool,
+) -> None:
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    context: object,
+    executemany: bool,
+) -> None:
+    stats = _current_stats.get()
+    started_at = conn.info.get("query_started_at")
+    if stats is None or not started_at:
+        return
+    stats.record(statement, (time.perf_counter() - started_at.pop()) * 1000)
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    # A failed statement gets no after_cursor_execute, its start time would
+    # stay on the pooled connection. It still took database time.
+    stats = _current_stats.get()
+    started_at = (
+        context.connection.info.get("query_started_at")
+        if context.connection is not None
+        else None
+    )
+    if stats is None or not started_at:
+        return
+    stats.record(
+        context.statement or "", (time.perf_counter() - started_at.pop()) * 1000
+    )
@@ -0,0 +1,85 @@
+import contextvars
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from sqlalchemy import URL, create_engine
+from sqlalchemy.engine import Engine
+
+_T = TypeVar("_T")
+
+
+class Shard:
+    def __init__(self, index: int, engine: Engine, read_engine: Engine) -> None:
+        self.index = index
+        self.engine = engine
+        self.read_engine = read_engine
+
+
+class ShardRouter:
+    # Note k+1, k+1+n, k+1+2n, ... is written to shard k of n, so the owning
+    # shard follows from the ID alone. The IDs come from a generator shared
+    # by all processes (NOTE_ID_GENERATOR=snowflake), per shard
+    # auto-increment would not keep them increasing across the shards. The
+    # number of shards cannot change once notes were written.
+    def __init__(self, shards: list[Shard]) -> None:
+        if not shards:
+            raise ValueError("At least one shard is required")
+        self.shards = shards
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(shards), thread_name_prefix="shard"
+        )
+
+    def shard_for(self, note_id: int) -> Shard:
+        return self.shards[(note_id - 1) % len(self.shards)]
+
+    def group_by_shard(self, note_ids: Iterable[int]) -> dict[int, list[int]]:
+        grouped: dict[int, list[int]] = {}
+        for note_id in note_ids:
+            grouped.setdefault(self.shard_for(note_id).index, []).append(note_id)
+        return grouped
+
+    def scatter(
+        self, call: Callable[[Shard], _T], shards: list[Shard] | None = None
+    ) -> list[_T]:
+        # Runs call on the shards concurrently, in a copy of the caller's
+        # context so the request deadline and query accounting still apply.
+        shards = self.shards if shards is None else shards
+        if len(shards) == 1:
+            return [call(shards[0])]
+        futures = [
+            self._executor.submit(contextvars.copy_context().run, call, shard)
+            for shard in shards
+        ]
+        return [future.result() for future in futures]
+
+
+def parse_shard_urls(value: str, primary: URL) -> list[URL]:
+    # Comma separated entries, either a database name on the primary's server
+    # ("notes_0") or host[:port]/database. Credentials are the primary's.
+    urls = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        location, _, database = entry.rpartition("/")
+        url = primary.set(database=database)
+        if location:
+            host, _, port = location.partition(":")
+            url = url.set(host=host, port=int(port) if port else primary.port)
+        urls.append(url)
+    return urls
+
+
+def create_shard_router(urls: list[URL], engine_options: dict[str, Any]) -> ShardRouter:
+    shards = []
+    for index, url in enumerate(urls):
+        engine = create_engine(url, **engine_options)
+        read_engine = create_engine(
+            url,
+            isolation_level="AUTOCOMMIT",
+            skip_autocommit_rollback=True,
+            **engine_options,
+        )
+        shards.append(Shard(index, engine, read_engine))
+    return ShardRouter(shards)
@@ -0,0 +1,157 @@
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from types import FrameType
+
+from flask import Flask, g, request
+
+PROFILE_HEADER = "X-Debug-Profile"
+DEFAULT_INTERVAL_SECONDS = 0.005
+MAX_STACK_DEPTH = 64
+# Distinct stacks kept per route, the samples of the rarest ones are folded
+# into TRIMMED_STACK.
+DEFAULT_MAX_STACKS = 2000
+TRIMMED_STACK = "(trimmed)"
+# A dump that grows beyond this is moved to <file>.1, replacing the previous
+# one, so every route keeps at most twice this on disk.
+DEFAULT_MAX_FILE_BYTES = 10 * 1024 * 1024
+
+
+class SamplingProfiler:
+    # A single background thread samples the stacks of the threads that are
+    # currently serving a profiled request, so unprofiled requests pay nothing.
+    def __init__(
+        self,
+        directory: str,
+        logger: logging.Logger,
+        interval: float = DEFAULT_INTERVAL_SECONDS,
+        max_stacks: int = DEFAULT_MAX_STACKS,
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    ) -> None:
+        self.directory = directory
+        self.logger = logger
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.max_file_bytes = max_file_bytes
+        self._active: dict[int, Counter[str]] = {}
+        self._profiles: dict[str, Counter[str]] = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._wake_up = threading.Event()
+        self._thread: threading.Thread | None = None
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self, thread_id: int) -> None:
+        with self._lock:
+            self._active[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="sampling-profiler", daemon=True
+                )
+                self._thread.start()
+        self._wake_up.set()
+
+    def stop(self, thread_id: int, route: str) -> Counter[str]:
+        with self._lock:
+            stacks = self._active.pop(thread_id, Counter())
+            profile = self._profiles[route]
+            profile.update(stacks)
+            if len(profile) > self.max_stacks:
+                self._profiles[route] = _trim(profile, self.max_stacks)
+        if stacks:
+            self._write(route, stacks)
+        return stacks
+
+    def routes(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                route: sum(stacks.values()) for route, stacks in self._profiles.items()
+            }
+
+    def collapsed(self, route: str) -> str | None:
+        with self._lock:
+            stacks = self._profiles.get(route)
+            if stacks is None:
+                return None
+            return _format(stacks)
+
+    def _run(self) -> None:
+        while True:
+            self._wake_up.wait()
+            with self._lock:
+                if not self._active:
+                    self._wake_up.clear()
+                    continue
+                frames = sys._current_frames()
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[_collapse(frame)] += 1
+            time.sleep(self.interval)
+
+    def _write(self, route: str, stacks: Counter[str]) -> None:
+        path = os.path.join(self.directory, _route_file_name(route))
+        try:
+            if os.path.exists(path) and os.path.getsize(path) >= self.max_file_bytes:
+                os.replace(path, f"{path}.1")
+            with open(path, "a", encoding="utf-8") as profile_file:
+                profile_file.write(_format(stacks))
+        except OSError as error:
+            self.logger.error(error, exc_info=True)
+
+
+def register_profiling(
+    app: Flask,
+    profiler: SamplingProfiler,
+    sample_rate: float,
+    token: str | None,
+) -> None:
+    @app.before_request
+    def start_profiling() -> None:
+        requested = token is not None and hmac.compare_digest(
+            request.headers.get(PROFILE_HEADER, "").encode(), token.encode()
+        )
+        if requested or (sample_rate > 0 and random.random() < sample_rate):
+            g.profiled_thread_id = threading.get_ident()
+            profiler.start(g.profiled_thread_id)
+
+    @app.teardown_request
+    def finish_profiling(error: BaseException | None) -> None:
+        thread_id = g.pop("profiled_thread_id", None)
+        if thread_id is not None:
+            profiler.stop(thread_id, route_name())
+
+
+def route_name() -> str:
+    rule = request.url_rule.rule if request.url_rule else "<unmatched>"
+    return f"{request.method} {rule}"
+
+
+def _collapse(frame: FrameType) -> str:
+    names: list[str] = []
+    current: FrameType | None = frame
+    while current is not None and len(names) < MAX_STACK_DEPTH:
+        module = current.f_globals.get("__name__", "?")
+        names.append(f"{module}:{current.f_code.co_name}")
+        current = current.f_back
+    return ";".join(reversed(names))
+
+
+def _format(stacks: Counter[str]) -> str:
+    # Brendan Gregg's collapsed stack format, read by flamegraph.pl and speedscope
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _trim(stacks: Counter[str], max_stacks: int) -> Counter[str]:
+    kept = Counter(dict(stacks.most_common(max_stacks - 1)))
+    kept[TRIMMED_STACK] += sum(stacks.values()) - sum(kept.values())
+    return kept
+
+
+def _route_file_name(route: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") + ".folded"
@@ -0,0 +1,38 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from redis.connection import Connection
+
+from infrastructure.resilience.deadline import remaining_seconds
+
+# Never below this, a zero timeout would make the socket non-blocking.
+MIN_TIMEOUT_SECONDS = 0.001
+
+
+class DeadlineConnection(Connection):
+    # Socket writes and reads of a command wait at most what is left of the
+    # request deadline when that is shorter than socket_timeout, so a hung
+    # Redis call cannot outlast the request. The timeout is restored after
+    # every call, pooled connections are shared by requests.
+    def send_packed_command(self, command: Any, check_health: bool = True) -> None:
+        with self._deadline_timeout():
+            super().send_packed_command(command, check_health)
+
+    def read_response(self, *args: Any, **kwargs: Any) -> Any:
+        with self._deadline_timeout():
+            return super().read_response(*args, **kwargs)
+
+    @contextmanager
+    def _deadline_timeout(self) -> Iterator[None]:
+        remaining = remaining_seconds()
+        if remaining is None or (
+            self.socket_timeout is not None and remaining >= self.socket_timeout
+        ):
+            yield
+            return
+        self.update_current_socket_timeout(max(remaining, MIN_TIMEOUT_SECONDS))
+        try:
+            yield
+        finally:
+            self.update_current_socket_timeout(-1)
@@ -0,0 +1,81 @@
+import logging
+import queue
+import threading
+import time
+
+from redis import Redis, RedisError
+
+from infrastructure.redis.redis_repository import NOTES_EVENTS_CHANNEL
+
+SUBSCRIPTION_QUEUE_SIZE = 256
+RECONNECT_DELAY_SECONDS = 1.0
+
+
+class Subscription:
+    def __init__(self, queue_size: int) -> None:
+        self.events: queue.Queue[tuple[str, str]] = queue.Queue(maxsize=queue_size)
+        # set when the client could not keep up and events were dropped, the
+        # stream is then closed and the client catches up through Last-Event-ID
+        self.overflowed = False
+
+
+class NoteEventBroadcaster:
+    # One Redis subscription per worker process, fanned out to in-memory
+    # queues, so idle SSE clients do not hold any Redis connection.
+    def __init__(
+        self,
+        redis_client: Redis,
+        logger: logging.Logger,
+        queue_size: int = SUBSCRIPTION_QUEUE_SIZE,
+    ) -> None:
+        self.redis_client = redis_client
+        self.logger = logger
+        self.queue_size = queue_size
+        self._subscriptions: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._listen, name="note-events", daemon=True
+                )
+                self._thread.start()
+
+    def subscribe(self) -> Subscription:
+        self.start()
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def dispatch(self, message: str) -> None:
+        event_id, _, data = message.partition(" ")
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.events.put_nowait((event_id, data))
+            except queue.Full:
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(NOTES_EVENTS_CHANNEL)
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        data = message["data"]
+                        self.dispatch(
+                            data.decode("utf-8") if isinstance(data, bytes) else data
+                        )
+            except RedisError as error:
+                self.logger.error(error, exc_info=True)
+            time.sleep(RECONNECT_DELAY_SECONDS)
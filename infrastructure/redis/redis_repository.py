@@ -1,16 +1,315 @@
+import json
 import logging
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from typing import cast
+
 from redis import Redis, RedisError
+from redis.commands.core import Script
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from infrastructure.metrics.registry import LatencyHistogram
+from infrastructure.resilience.circuit_breaker import CircuitBreaker
+from infrastructure.resilience.deadline import check_deadline
+from infrastructure.resilience.errors import DependencyUnavailableError
+from infrastructure.tracing.tracer import KIND_CLIENT, child_span
+
+NOTES_TOTAL_KEY = "notes:stats:total"
+NOTES_DAY_KEY_PREFIX = "notes:stats:day:"
+NOTES_RECONCILED_AT_KEY = "notes:stats:reconciled_at"
+NOTES_DAY_TTL_SECONDS = 120 * 24 * 60 * 60
+NOTE_JSON_KEY_PREFIX = "notes:json:"
+NOTE_JSON_TTL_SECONDS = 24 * 60 * 60
+NOTES_EVENTS_STREAM = "notes:events"
+NOTES_EVENTS_CHANNEL = "notes:events"
+NOTES_EVENTS_MAX_LEN = 10000
+NOTE_ID_WORKER_KEY_PREFIX = "notes:id_worker:"
+
+# Multi-step operations run server side, atomically and in one round trip.
+SCRIPTS = {
+    # Appends the event to the bounded replay stream and broadcasts it with
+    # the stream ID. Subscribers get "<stream id> <json>".
+    "publish_note_event": """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[2], '*', 'data', ARGV[1])
+redis.call('PUBLISH', KEYS[2], id .. ' ' .. ARGV[1])
+return id
+""",
+    # INCRBY for every key, with ARGV[i] as its amount. A TTL in the last
+    # argument is set on all keys but the first (the running total).
+    "increment_counters": """
+local ttl = tonumber(ARGV[#ARGV])
+for i, key in ipairs(KEYS) do
+    redis.call('INCRBY', key, ARGV[i])
+    if i > 1 and ttl > 0 then
+        redis.call('EXPIRE', key, ttl)
+    end
+end
+return #KEYS
+""",
+    # Claims the first free worker ID below ARGV[2] for owner ARGV[1], with
+    # a TTL of ARGV[3] ms. The keys are derived from the prefix in KEYS[1].
+    "claim_worker_id": """
+for i = 0, tonumber(ARGV[2]) - 1 do
+    if redis.call('SET', KEYS[1] .. i, ARGV[1], 'NX', 'PX', ARGV[3]) then
+        return i
+    end
+end
+return -1
+""",
+    # Extends the TTL to ARGV[2] ms, as long as ARGV[1] still owns the key.
+    "renew_worker_id": """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+""",
+}
+
+
+class RedisUnavailableError(RedisError, DependencyUnavailableError):
+    pass
 
 
 class RedisRepository:
-    def __init__(self, redis_client: Redis, logger: logging.Logger):
+    # Binary safe: values are written and returned as bytes, whichever way
+    # the client decodes responses, so cached payloads are never re-encoded.
+    def __init__(
+        self,
+        redis_client: Redis,
+        logger: logging.Logger,
+        breaker: CircuitBreaker | None = None,
+    ):
         self.redis_client = redis_client
         self.logger = logger
+        self.breaker = breaker
+        self.command_latency = LatencyHistogram(
+            "redis_command_duration_seconds",
+            "Latency of Redis commands issued by the application.",
+            "command",
+        )
+        self._scripts: dict[str, Script] = {
+            name: redis_client.register_script(script)
+            for name, script in SCRIPTS.items()
+        }
 
     def health_check(self) -> bool:
         try:
-            self.redis_client.ping()
+            with self._timed("PING"):
+                self.redis_client.ping()
             return True
         except RedisError as error:
-            self.logger.error(error, exc_info=True)
+            self._log_failure(error)
             return False
+
+    def open_connections(self, count: int) -> int:
+        # Checks out count connections at once, so the TCP and AUTH
+        # handshakes are done before the first request needs them.
+        pool = self.redis_client.connection_pool
+        connections = []
+        try:
+            with self._timed("CONNECT"):
+                for _ in range(min(count, pool.max_connections)):
+                    connections.append(pool.get_connection())
+        except RedisError as error:
+            self._log_failure(error)
+        finally:
+            for connection in connections:
+                pool.release(connection)
+        return len(connections)
+
+    def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        if not keys:
+            return {}
+        try:
+            with self._timed("MGET"):
+                values = cast(list[bytes | str | None], self.redis_client.mget(keys))
+        except RedisError as error:
+            self._log_failure(error)
+            return {}
+        return {
+            key: _as_bytes(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    def set_many(
+        self, values: dict[str, bytes | str | int], ttl_seconds: int | None = None
+    ) -> None:
+        if not values:
+            return
+        try:
+            with self._timed("PIPELINE"):
+                pipeline = self.redis_client.pipeline(transaction=False)
+                for key, value in values.items():
+                    pipeline.set(key, value, ex=ttl_seconds)
+                pipeline.execute()
+        except RedisError as error:
+            self._log_failure(error)
+
+    def increment_notes_count(self, day: date, amount: int = 1) -> None:
+        self.increment_notes_counts({day: amount})
+
+    def increment_notes_counts(self, per_day: dict[date, int]) -> None:
+        if not per_day:
+            return
+        keys = [NOTES_TOTAL_KEY, *(_day_key(day) for day in per_day)]
+        args = [sum(per_day.values()), *per_day.values(), NOTES_DAY_TTL_SECONDS]
+        try:
+            self._run_script("increment_counters", keys, args)
+        except RedisError as error:
+            self._log_failure(error)
+
+    def get_notes_stats(
+        self, days: list[date]
+    ) -> tuple[int | None, dict[date, int]] | None:
+        # Nothing is trusted before reconcile_stats has seeded the counters,
+        # until then (e.g. after a flush) they only hold recent increments.
+        keys = [NOTES_RECONCILED_AT_KEY, NOTES_TOTAL_KEY]
+        keys.extend(_day_key(day) for day in days)
+        try:
+            with self._timed("MGET"):
+                values = cast(list[bytes | str | None], self.redis_client.mget(keys))
+        except RedisError as error:
+            self._log_failure(error)
+            return None
+
+        reconciled_at, total, *day_values = values
+        if reconciled_at is None:
+            return None, {}
+        per_day = {
+            day: int(value) for day, value in zip(days, day_values) if value is not None
+        }
+        return None if total is None else int(total), per_day
+
+    def set_notes_stats(self, total: int, per_day: dict[date, int]) -> None:
+        try:
+            with self._timed("MULTI"):
+                pipeline = self.redis_client.pipeline(transaction=True)
+                pipeline.set(NOTES_TOTAL_KEY, total)
+                for day, count in per_day.items():
+                    pipeline.set(_day_key(day), count, ex=NOTES_DAY_TTL_SECONDS)
+                pipeline.set(
+                    NOTES_RECONCILED_AT_KEY, datetime.now(timezone.utc).isoformat()
+                )
+                pipeline.execute()
+        except RedisError as error:
+            self._log_failure(error)
+
+    def get_note_fragments(self, note_ids: list[int]) -> dict[int, bytes]:
+        values = self.get_many([_note_json_key(note_id) for note_id in note_ids])
+        return {
+            note_id: values[_note_json_key(note_id)]
+            for note_id in note_ids
+            if _note_json_key(note_id) in values
+        }
+
+    def set_note_fragments(self, fragments: dict[int, bytes]) -> None:
+        self.set_many(
+            {
+                _note_json_key(note_id): fragment
+                for note_id, fragment in fragments.items()
+            },
+            ttl_seconds=NOTE_JSON_TTL_SECONDS,
+        )
+
+    def publish_note_created(self, note: dict) -> None:
+        try:
+            self._run_script(
+                "publish_note_event",
+                [NOTES_EVENTS_STREAM, NOTES_EVENTS_CHANNEL],
+                [json.dumps(note), NOTES_EVENTS_MAX_LEN],
+            )
+        except RedisError as error:
+            self._log_failure(error)
+
+    def get_note_events_since(
+        self, last_event_id: str, count: int
+    ) -> list[tuple[str, str]]:
+        with self._timed("XRANGE"):
+            entries = cast(
+                list[tuple[bytes | str, dict[bytes | str, bytes | str]]],
+                self.redis_client.xrange(
+                    NOTES_EVENTS_STREAM, min=f"({last_event_id}", count=count
+                ),
+            )
+        events = []
+        for event_id, fields in entries:
+            data = fields[b"data"] if b"data" in fields else fields["data"]
+            events.append((_as_bytes(event_id).decode(), _as_bytes(data).decode()))
+        return events
+
+    def claim_worker_id(self, owner: str, max_workers: int, ttl_ms: int) -> int | None:
+        # Unlike the cache methods this raises, IDs must not be guessed.
+        worker_id = cast(
+            int,
+            self._run_script(
+                "claim_worker_id",
+                [NOTE_ID_WORKER_KEY_PREFIX],
+                [owner, max_workers, ttl_ms],
+            ),
+        )
+        return worker_id if worker_id >= 0 else None
+
+    def renew_worker_id(self, worker_id: int, owner: str, ttl_ms: int) -> bool:
+        return bool(
+            self._run_script(
+                "renew_worker_id",
+                [f"{NOTE_ID_WORKER_KEY_PREFIX}{worker_id}"],
+                [owner, ttl_ms],
+            )
+        )
+
+    def _run_script(
+        self, name: str, keys: Sequence[str], args: Sequence[str | int]
+    ) -> object:
+        with self._timed("EVALSHA"):
+            return self._scripts[name](keys=keys, args=args)
+
+    @contextmanager
+    def _timed(self, command: str) -> Iterator[None]:
+        # Raising a RedisError keeps the callers' degrade-to-MySQL paths.
+        try:
+            if self.breaker is not None:
+                self.breaker.before_call()
+            check_deadline()
+        except DependencyUnavailableError as error:
+            raise RedisUnavailableError(error.message, error.retry_after) from error
+
+        span = child_span(f"redis {command}", KIND_CLIENT, {"db.system": "redis"})
+        started_at = time.perf_counter()
+        try:
+            yield
+        except (RedisConnectionError, RedisTimeoutError) as error:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            if span is not None:
+                span.end(error)
+            raise
+        else:
+            if self.breaker is not None:
+                self.breaker.record_success()
+        finally:
+            self.command_latency.observe(command, time.perf_counter() - started_at)
+            if span is not None and span.end_ns is None:
+                span.end()
+
+    def _log_failure(self, error: RedisError) -> None:
+        if isinstance(error, RedisUnavailableError):
+            self.logger.warning(error)
+        else:
+            self.logger.error(error, exc_info=True)
+
+
+def _as_bytes(value: bytes | str) -> bytes:
+    return value.encode() if isinstance(value, str) else value
+
+
+def _day_key(day: date) -> str:
+    return NOTES_DAY_KEY_PREFIX + day.isoformat()
+
+
+def _note_json_key(note_id: int) -> str:
+    return f"{NOTE_JSON_KEY_PREFIX}{note_id}"
@@ -0,0 +1,217 @@
+import heapq
+import itertools
+import threading
+import time
+from collections.abc import Callable
+
+from flask import Flask, g, request
+
+from infrastructure.metrics.registry import LatencyHistogram
+from infrastructure.resilience.errors import DependencyUnavailableError
+
+# Lower values are admitted first when slots free up.
+HIGH_PRIORITY = 0
+NORMAL_PRIORITY = 1
+LOW_PRIORITY = 2
+
+QUEUE_FULL = "queue_full"
+QUEUE_TIMEOUT = "queue_timeout"
+
+
+class AdmissionRejectedError(DependencyUnavailableError):
+    def __init__(self, lane: str, reason: str) -> None:
+        super().__init__(f"{lane} is saturated ({reason})")
+        self.lane = lane
+        self.reason = reason
+
+
+class AdmissionLane:
+    def __init__(
+        self,
+        name: str,
+        priority: int,
+        max_concurrent: int,
+        max_queue: int,
+        max_wait: float,
+    ) -> None:
+        self.name = name
+        self.priority = priority
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted_total = 0
+        self.shed_total = {QUEUE_FULL: 0, QUEUE_TIMEOUT: 0}
+
+
+class _Waiter:
+    def __init__(self, lane: AdmissionLane) -> None:
+        self.lane = lane
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class AdmissionController:
+    # Bounds how many requests run at once, in total (capacity, usually the
+    # number of worker threads) and per lane. A request that finds no free
+    # slot waits in a bounded queue for at most its lane's max_wait, freed
+    # slots go to the highest-priority waiter first. Everything else is shed
+    # straight away, which is cheaper for everyone than queueing.
+    def __init__(
+        self, capacity: int, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.capacity = capacity
+        self.clock = clock
+        self.running = 0
+        self.lanes: dict[str, AdmissionLane] = {}
+        self.wait_time = LatencyHistogram(
+            "admission_wait_seconds",
+            "Time requests spent queued before being admitted.",
+            "lane",
+        )
+        self._waiters: list[tuple[int, int, _Waiter]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def add_lane(
+        self,
+        name: str,
+        priority: int,
+        max_concurrent: int,
+        max_queue: int = 0,
+        max_wait: float = 0.0,
+    ) -> None:
+        self.lanes[name] = AdmissionLane(
+            name, priority, max_concurrent, max_queue, max_wait
+        )
+
+    def acquire(self, name: str) -> None:
+        lane = self.lanes[name]
+        with self._lock:
+            if self._can_run(lane):
+                self._start(lane)
+                return
+            if lane.waiting >= lane.max_queue or lane.max_wait <= 0:
+                lane.shed_total[QUEUE_FULL] += 1
+                raise AdmissionRejectedError(name, QUEUE_FULL)
+            waiter = _Waiter(lane)
+            lane.waiting += 1
+            heapq.heappush(self._waiters, (lane.priority, next(self._sequence), waiter))
+
+        started_at = self.clock()
+        waiter.event.wait(lane.max_wait)
+        with self._lock:
+            # Granting happens under the lock, so this cannot race with it.
+            if not waiter.granted:
+                waiter.cancelled = True
+                lane.waiting -= 1
+                lane.shed_total[QUEUE_TIMEOUT] += 1
+                raise AdmissionRejectedError(name, QUEUE_TIMEOUT)
+        self.wait_time.observe(name, self.clock() - started_at)
+
+    def release(self, name: str) -> None:
+        with self._lock:
+            lane = self.lanes[name]
+            lane.in_flight -= 1
+            self.running -= 1
+            self._dispatch()
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            lanes = [
+                (
+                    lane.name,
+                    lane.in_flight,
+                    lane.waiting,
+                    lane.admitted_total,
+                    dict(lane.shed_total),
+                )
+                for lane in self.lanes.values()
+            ]
+        lines = [
+            "# HELP admission_in_flight Requests currently running.",
+            "# TYPE admission_in_flight gauge",
+        ]
+        lines.extend(
+            f'admission_in_flight{{lane="{lane[0]}"}} {lane[1]}' for lane in lanes
+        )
+        lines.extend(
+            [
+                "# HELP admission_queue_depth Requests waiting for a slot.",
+                "# TYPE admission_queue_depth gauge",
+            ]
+        )
+        lines.extend(
+            f'admission_queue_depth{{lane="{lane[0]}"}} {lane[2]}' for lane in lanes
+        )
+        lines.extend(
+            [
+                "# HELP admission_admitted_total Requests admitted.",
+                "# TYPE admission_admitted_total counter",
+            ]
+        )
+        lines.extend(
+            f'admission_admitted_total{{lane="{lane[0]}"}} {lane[3]}' for lane in lanes
+        )
+        lines.extend(
+            [
+                "# HELP admission_shed_total Requests rejected with 503.",
+                "# TYPE admission_shed_total counter",
+            ]
+        )
+        lines.extend(
+            f'admission_shed_total{{lane="{lane[0]}",reason="{reason}"}} {count}'
+            for lane in lanes
+            for reason, count in sorted(lane[4].items())
+        )
+        lines.extend(self.wait_time.collect())
+        return lines
+
+    def _can_run(self, lane: AdmissionLane) -> bool:
+        return self.running < self.capacity and lane.in_flight < lane.max_concurrent
+
+    def _start(self, lane: AdmissionLane) -> None:
+        lane.in_flight += 1
+        lane.admitted_total += 1
+        self.running += 1
+
+    def _dispatch(self) -> None:
+        # Waiters blocked only by their own lane's limit stay queued without
+        # holding back the lower-priority ones behind them.
+        blocked = []
+        while self._waiters and self.running < self.capacity:
+            entry = heapq.heappop(self._waiters)
+            waiter = entry[2]
+            if waiter.cancelled:
+                continue
+            if not self._can_run(waiter.lane):
+                blocked.append(entry)
+                continue
+            waiter.lane.waiting -= 1
+            waiter.granted = True
+            self._start(waiter.lane)
+            waiter.event.set()
+        for entry in blocked:
+            heapq.heappush(self._waiters, entry)
+
+
+def register_admission(
+    app: Flask, controller: AdmissionController, lanes: dict[str, str]
+) -> None:
+    # lanes maps endpoint names to lanes, endpoints without a lane (/health,
+    # /metrics, the event stream) are never queued or shed.
+    @app.before_request
+    def admit_request() -> None:
+        lane = lanes.get(request.endpoint or "")
+        if lane is None:
+            return
+        controller.acquire(lane)
+        g.admission_lane = lane
+
+    @app.teardown_request
+    def release_request(error: BaseException | None) -> None:
+        lane: str | None = g.pop("admission_lane", None)
+        if lane is not None:
+            controller.release(lane)
@@ -0,0 +1,117 @@
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable
+
+from infrastructure.resilience.errors import DependencyUnavailableError
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT_SECONDS = 10.0
+
+
+class CircuitOpenError(DependencyUnavailableError):
+    pass
+
+
+class CircuitBreaker:
+    # Opens after failure_threshold consecutive failures and rejects calls
+    # until reset_timeout has passed. Then a single probe call is let
+    # through, its outcome closes the breaker or opens it again.
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures_total = 0
+        self.rejected_total = 0
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at: float | None = None
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            now = self.clock()
+            if self.state == OPEN and now - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probe_started_at = None
+            if self.state == CLOSED:
+                return
+            # A probe that never reported back (e.g. it failed for an
+            # unrelated reason) must not keep the breaker half-open forever.
+            if self.state == HALF_OPEN and (
+                self._probe_started_at is None
+                or now - self._probe_started_at >= self.reset_timeout
+            ):
+                self._probe_started_at = now
+                return
+            self.rejected_total += 1
+            retry_after = self._opened_at + self.reset_timeout - now
+        raise CircuitOpenError(
+            f"{self.name} is unavailable", max(1, math.ceil(retry_after))
+        )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures_total += 1
+            self._consecutive_failures += 1
+            if (
+                self.state == HALF_OPEN
+                or self._consecutive_failures >= self.failure_threshold
+            ):
+                self.state = OPEN
+                self._opened_at = self.clock()
+
+
+def collect_breakers(breakers: Iterable[CircuitBreaker]) -> list[str]:
+    breakers = list(breakers)
+    lines = [
+        "# HELP circuit_breaker_state 0 closed, 1 half-open, 2 open.",
+        "# TYPE circuit_breaker_state gauge",
+    ]
+    lines.extend(
+        f'circuit_breaker_state{{dependency="{breaker.name}"}} '
+        f"{STATE_VALUES[breaker.state]}"
+        for breaker in breakers
+    )
+    lines.extend(
+        [
+            "# HELP circuit_breaker_failures_total Failed calls to the dependency.",
+            "# TYPE circuit_breaker_failures_total counter",
+        ]
+    )
+    lines.extend(
+        f'circuit_breaker_failures_total{{dependency="{breaker.name}"}} '
+        f"{breaker.failures_total}"
+        for breaker in breakers
+    )
+    lines.extend(
+        [
+            "# HELP circuit_breaker_rejected_total Calls rejected while open.",
+            "# TYPE circuit_breaker_rejected_total counter",
+        ]
+    )
+    lines.extend(
+        f'circuit_breaker_rejected_total{{dependency="{breaker.name}"}} '
+        f"{breaker.rejected_total}"
+        for breaker in breakers
+    )
+    return lines
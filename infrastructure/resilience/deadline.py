@@ -0,0 +1,52 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+from flask import Flask, g
+
+from infrastructure.resilience.errors import DependencyUnavailableError
+
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceededError(DependencyUnavailableError):
+    def __init__(self, message: str = "Request deadline exceeded") -> None:
+        super().__init__(message)
+
+
+def remaining_seconds() -> float | None:
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline() -> float | None:
+    remaining = remaining_seconds()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceededError()
+    return remaining
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def register_deadlines(app: Flask, seconds: float) -> None:
+    # Every dependency call made while serving the request is bounded by
+    # what is left of this budget, see infrastructure.mysql.guard.
+    @app.before_request
+    def start_deadline() -> None:
+        g.deadline_token = _deadline.set(time.monotonic() + seconds)
+
+    @app.teardown_request
+    def reset_deadline(error: BaseException | None) -> None:
+        token: Token[float | None] | None = g.pop("deadline_token", None)
+        if token is not None:
+            _deadline.reset(token)
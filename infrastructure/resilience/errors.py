@@ -0,0 +1,5 @@
+class DependencyUnavailableError(Exception):
+    def __init__(self, message: str, retry_after: int = 1) -> None:
+        self.message = message
+        self.retry_after = retry_after
+        super().__init__(self.message)
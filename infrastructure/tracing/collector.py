@@ -0,0 +1,78 @@
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+# Stand-in for an OpenTelemetry Collector during local runs. It accepts
+# OTLP/HTTP JSON on POST /v1/traces, appends every request as one line to
+# --output and prints one line per received root span:
+#
+#     python -m infrastructure.tracing.collector --port 4318 --output traces.jsonl
+#     TRACING_EXPORT_URL=http://127.0.0.1:4318/v1/traces TRACING_SAMPLE_RATE=1 ...
+
+TRACES_PATH = "/v1/traces"
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    output_path = "traces.jsonl"
+    lock = threading.Lock()
+
+    def do_POST(self) -> None:
+        if self.path != TRACES_PATH:
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self.send_error(400, "Body is not JSON")
+            return
+        with self.lock:
+            with open(self.output_path, "a", encoding="utf-8") as traces_file:
+                traces_file.write(json.dumps(payload, separators=(",", ":")) + "\n")
+        for line in summarize(payload):
+            print(line, flush=True)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def summarize(payload: dict[str, Any]) -> list[str]:
+    spans = [
+        span
+        for resource_spans in payload.get("resourceSpans", [])
+        for scope_spans in resource_spans.get("scopeSpans", [])
+        for span in scope_spans.get("spans", [])
+    ]
+    children: dict[str, int] = {}
+    for span in spans:
+        children[span["traceId"]] = children.get(span["traceId"], 0) + 1
+    return [
+        f"{span['traceId']} {span['name']} "
+        f"{(int(span['endTimeUnixNano']) - int(span['startTimeUnixNano'])) / 1e6:.2f} ms "
+        f"{children[span['traceId']]} spans"
+        for span in spans
+        if span.get("kind") == 2
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local OTLP/HTTP JSON collector")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--output", default="traces.jsonl")
+    args = parser.parse_args()
+
+    CollectorHandler.output_path = args.output
+    server = ThreadingHTTPServer((args.host, args.port), CollectorHandler)
+    print(f"Collecting traces on http://{args.host}:{args.port}{TRACES_PATH}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+import functools
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, ParamSpec, Protocol, TypeVar
+
+from flask import Flask, Response, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, ExceptionContext
+
+from infrastructure.mysql.query_accounting import statement_shape
+
+# OTLP SpanKind and StatusCode values.
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+TRACEPARENT_HEADER = "traceparent"
+TRACE_QUEUE_SIZE = 1000
+EXPORT_BATCH_SIZE = 10
+MAX_STATEMENT_LEN = 1000
+
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+
+class Trace:
+    def __init__(self, trace_id: str) -> None:
+        self.trace_id = trace_id
+        self.spans: list[Span] = []
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_span_id",
+        "name",
+        "kind",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+    )
+
+    def __init__(
+        self,
+        trace: Trace,
+        parent_span_id: str | None,
+        name: str,
+        kind: int = KIND_INTERNAL,
+        attributes: dict[str, Any] | None = None,
+    ) -> None:
+        self.trace = trace
+        self.span_id = _random_id(64)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.error: str | None = None
+        # Spans of other threads (e.g. the shard scatter) append here too,
+        # list.append is atomic.
+        trace.spans.append(self)
+
+    def child(
+        self, name: str, kind: int = KIND_INTERNAL, attributes: dict | None = None
+    ) -> "Span":
+        return Span(self.trace, self.span_id, name, kind, attributes)
+
+    def end(self, error: BaseException | None = None) -> None:
+        if error is not None:
+            self.error = f"{type(error).__qualname__}: {error}"
+        self.end_ns = time.time_ns()
+
+    def to_otlp(self) -> dict[str, Any]:
+        span: dict[str, Any] = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": _otlp_attributes(self.attributes),
+        }
+        if self.error is not None:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def child_span(
+    name: str, kind: int = KIND_INTERNAL, attributes: dict | None = None
+) -> Span | None:
+    # A span below the current one, None outside of a sampled trace. It does
+    # not become the current span, for leaves like SQL and Redis calls.
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return parent.child(name, kind, attributes)
+
+
+@contextmanager
+def start_span(
+    name: str, kind: int = KIND_INTERNAL, attributes: dict | None = None
+) -> Iterator[Span | None]:
+    span = child_span(name, kind, attributes)
+    if span is None:
+        yield None
+        return
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as error:
+        span.end(error)
+        raise
+    finally:
+        if span.end_ns is None:
+            span.end()
+        _current_span.reset(token)
+
+
+def traced(func: Callable[_P, _R]) -> Callable[_P, _R]:
+    # Service functions get a span named like "notes.add_note". Outside of a
+    # sampled trace this costs a single context variable lookup.
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+        if _current_span.get() is None:
+            return func(*args, **kwargs)
+        with start_span(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    # W3C Trace Context: version-traceid-parentid-flags. Returns the trace
+    # ID, the parent span ID and the sampled flag, None when invalid.
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None or match.group(0).startswith("ff"):
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class SpanExporter(Protocol):
+    def export(self, payload: dict[str, Any]) -> None: ...
+
+
+class FileSpanExporter:
+    # One OTLP/JSON ExportTraceServiceRequest per line, the layout of the
+    # OpenTelemetry Collector's file exporter.
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def export(self, payload: dict[str, Any]) -> None:
+        with open(self.path, "a", encoding="utf-8") as spans_file:
+            spans_file.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+
+class OtlpHttpExporter:
+    # OTLP/HTTP with a JSON body, e.g. http://localhost:4318/v1/traces of an
+    # OpenTelemetry Collector or of infrastructure.tracing.collector.
+    def __init__(self, url: str, timeout: float = 2.0) -> None:
+        self.url = url
+        self.timeout = timeout
+
+    def export(self, payload: dict[str, Any]) -> None:
+        export_request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload, separators=(",", ":")).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(export_request, timeout=self.timeout):
+            pass
+
+
+class Tracer:
+    # Requests without a valid traceparent are sampled at sample_rate, the
+    # others follow the sampled flag of their parent. Finished traces are
+    # handed to a background thread that exports them in batches, a full
+    # queue drops the trace instead of making the request wait.
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        sample_rate: float,
+        logger: logging.Logger,
+        service_name: str = "demo-app",
+        queue_size: int = TRACE_QUEUE_SIZE,
+        export_interval: float = 0.2,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.logger = logger
+        self.service_name = service_name
+        self.rng = rng
+        self.export_interval = export_interval
+        self.traces: queue.Queue[list[Span]] = queue.Queue(maxsize=queue_size)
+        self.sampled_total = 0
+        self.dropped_total = 0
+        self.exported_spans_total = 0
+        self.export_failures_total = 0
+        self._export_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="trace-exporter", daemon=True
+            )
+            self._thread.start()
+
+    def start_trace(
+        self,
+        name: str,
+        traceparent: str | None = None,
+        attributes: dict[str, Any] | None = None,
+    ) -> Span | None:
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_span_id, sampled = parent
+            if not sampled:
+                return None
+        elif self.sample_rate > 0 and self.rng() < self.sample_rate:
+            trace_id, parent_span_id = _random_id(128), None
+        else:
+            return None
+        self.sampled_total += 1
+        return Span(Trace(trace_id), parent_span_id, name, KIND_SERVER, attributes)
+
+    def finish(self, span: Span, error: BaseException | None = None) -> None:
+        span.end(error)
+        try:
+            self.traces.put_nowait(span.trace.spans)
+        except queue.Full:
+            self.dropped_total += 1
+
+    def flush(self) -> None:
+        # Also waits for the batch the exporter thread may be working on.
+        while self._export_pending():
+            pass
+        self.traces.join()
+
+    def encode(self, spans: list[Span]) -> dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _otlp_attributes(
+                            {"service.name": self.service_name}
+                        )
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "demo_app.tracing"},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def collect(self) -> list[str]:
+        return [
+            "# HELP tracing_traces_sampled_total Requests that were traced.",
+            "# TYPE tracing_traces_sampled_total counter",
+            f"tracing_traces_sampled_total {self.sampled_total}",
+            "# HELP tracing_traces_dropped_total Traces dropped on a full queue.",
+            "# TYPE tracing_traces_dropped_total counter",
+            f"tracing_traces_dropped_total {self.dropped_total}",
+            "# HELP tracing_spans_exported_total Spans handed to the exporter.",
+            "# TYPE tracing_spans_exported_total counter",
+            f"tracing_spans_exported_total {self.exported_spans_total}",
+            "# HELP tracing_export_failures_total Span batches that failed to export.",
+            "# TYPE tracing_export_failures_total counter",
+            f"tracing_export_failures_total {self.export_failures_total}",
+        ]
+
+    def _run(self) -> None:
+        # Wakes up once per interval instead of once per trace, every wake-up
+        # takes the GIL from the request threads.
+        while True:
+            self._export_pending([self.traces.get()])
+            while self._export_pending():
+                time.sleep(0)
+            time.sleep(self.export_interval)
+
+    def _export_pending(self, traces: list[list[Span]] | None = None) -> int:
+        traces = traces or []
+        with self._export_lock:
+            while len(traces) < EXPORT_BATCH_SIZE:
+                try:
+                    traces.append(self.traces.get_nowait())
+                except queue.Empty:
+                    break
+            batch = [span for spans in traces for span in spans]
+            try:
+                if batch:
+                    self.exporter.export(self.encode(batch))
+                    self.exported_spans_total += len(batch)
+            except Exception as error:
+                self.export_failures_total += 1
+                self.logger.warning("Exporting %d spans failed: %s", len(batch), error)
+            finally:
+                for _ in traces:
+                    self.traces.task_done()
+        return len(traces)
+
+
+def register_tracing(app: Flask, tracer: Tracer) -> None:
+    # Call it after every other extension has registered its hooks: the
+    # trace starts before all of them, and each of them (the rate limiter,
+    # the admission controller, ...) becomes a span of its own.
+    _install_listeners()
+    tracer.start()
+
+    def start_trace() -> None:
+        route = request.url_rule.rule if request.url_rule else request.path
+        span = tracer.start_trace(
+            f"{request.method} {route}",
+            request.headers.get(TRACEPARENT_HEADER),
+            {"http.method": request.method, "http.route": route},
+        )
+        if span is not None:
+            g.trace_token = _current_span.set(span)
+
+    def record_status(response: Response) -> Response:
+        span = _current_span.get()
+        if span is not None and "trace_token" in g:
+            span.attributes["http.status_code"] = response.status_code
+        return response
+
+    def finish_trace(error: BaseException | None) -> None:
+        token = g.pop("trace_token", None)
+        if token is None:
+            return
+        span = _current_span.get()
+        _current_span.reset(token)
+        if span is not None:
+            tracer.finish(span, error)
+
+    hooks = app.before_request_funcs.setdefault(None, [])
+    hooks[:] = [start_trace, *map(_traced_hook, hooks)]
+    app.after_request(record_status)
+    app.teardown_request(finish_trace)
+
+
+def _traced_hook(hook: Callable[[], Any]) -> Callable[[], Any]:
+    name = f"before_request {getattr(hook, '__qualname__', hook)}"
+
+    @functools.wraps(hook)
+    def wrapper() -> Any:
+        span = child_span(name)
+        if span is None:
+            return hook()
+        try:
+            return hook()
+        except BaseException as error:
+            span.end(error)
+            raise
+        finally:
+            if span.end_ns is None:
+                span.end()
+
+    return wrapper
+
+
+def _install_listeners() -> None:
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    context: object,
+    executemany: bool,
+) -> None:
+    if _current_span.get() is None:
+        return
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    span = child_span(
+        f"{conn.dialect.name} {verb}",
+        KIND_CLIENT,
+        {
+            "db.system": conn.dialect.name,
+            "db.statement": _statement_shape(statement),
+        },
+    )
+    conn.info.setdefault("trace_spans", []).append(span)
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    context: object,
+    executemany: bool,
+) -> None:
+    spans = conn.info.get("trace_spans")
+    if spans:
+        spans.pop().end()
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    spans = (
+        context.connection.info.get("trace_spans")
+        if context.connection is not None
+        else None
+    )
+    if spans:
+        spans.pop().end(context.original_exception)
+
+
+@functools.lru_cache(maxsize=512)
+def _statement_shape(statement: str) -> str:
+    # The application sends the same few statements over and over.
+    return statement_shape(statement)[:MAX_STATEMENT_LEN]
+
+
+def _random_id(bits: int) -> str:
+    return f"{random.getrandbits(bits) or 1:0{bits // 4}x}"
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        typed: dict[str, Any]
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": typed})
+    return encoded
@@ -1,17 +1,59 @@
 import logging
 import os
+import sys
+from typing import Any
 
 from flask import Flask
 from flask.cli import with_appcontext
 from flask_migrate import Migrate, upgrade  # type: ignore
-from redis import Redis
-from sqlalchemy import URL
+from redis import BlockingConnectionPool, Redis
+from sqlalchemy import URL, create_engine
 
+from commands.notes import register_notes_commands
+from commands.schema import register_schema_commands
+from infrastructure.logs.pipeline import LogPipeline, install_log_pipeline
+from infrastructure.metrics.registry import MetricsRegistry
+from infrastructure.redis.deadline_connection import DeadlineConnection
+from infrastructure.redis.note_events import NoteEventBroadcaster
 from infrastructure.redis.redis_repository import RedisRepository
 from models.models import db
+from models.types import set_compression_threshold
+from infrastructure.ids.snowflake import SnowflakeGenerator, WorkerIdLease
+from infrastructure.mysql.guard import guard_engine
 from infrastructure.mysql.mysql_repository import MySQLRepository
+from infrastructure.mysql.query_accounting import register_query_accounting
+from infrastructure.mysql.shard_router import create_shard_router, parse_shard_urls
+from infrastructure.profiling.sampling_profiler import (
+    SamplingProfiler,
+    register_profiling,
+)
+from infrastructure.resilience.admission import (
+    HIGH_PRIORITY,
+    LOW_PRIORITY,
+    NORMAL_PRIORITY,
+    AdmissionController,
+    register_admission,
+)
+from infrastructure.resilience.circuit_breaker import (
+    CircuitBreaker,
+    collect_breakers,
+)
+from infrastructure.resilience.deadline import register_deadlines
+from infrastructure.resilience.errors import DependencyUnavailableError
+from infrastructure.tracing.tracer import (
+    FileSpanExporter,
+    OtlpHttpExporter,
+    Tracer,
+    register_tracing,
+)
+from routes.errors import service_unavailable
+from routes.events import register_events_routes
 from routes.health_check import register_health_check_routes
+from routes.metrics import register_metrics_routes
 from routes.notes import register_notes_routes
+from routes.profiling import register_profiling_routes
+from routes.stats import register_stats_routes
+from services.warmup import Readiness, warm_up
 
 
 def get_env_value(name: str) -> str:
@@ -21,6 +63,10 @@ def get_env_value(name: str) -> str:
     return value
 
 
+def get_optional_env_value(name: str, default: str) -> str:
+    return os.getenv(name, default)
+
+
 try:
     db_url = URL.create(
         drivername="mysql+pymysql",
@@ -36,29 +82,141 @@ except Exception as err:
 
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = db_url
+# Hard ceilings for every MySQL call, request deadlines tighten them further.
+engine_options: dict[str, Any] = {
+    "pool_timeout": float(get_optional_env_value("DB_POOL_TIMEOUT", "2")),
+    "connect_args": {
+        "connect_timeout": int(get_optional_env_value("DB_CONNECT_TIMEOUT", "2")),
+        "read_timeout": int(get_optional_env_value("DB_READ_TIMEOUT", "30")),
+        "write_timeout": int(get_optional_env_value("DB_WRITE_TIMEOUT", "30")),
+    },
+}
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+# Separate pool for the API read paths, its connections stay in autocommit
+# mode so that reads need neither a transaction nor a ROLLBACK.
+read_engine = create_engine(
+    db_url,
+    isolation_level="AUTOCOMMIT",
+    skip_autocommit_rollback=True,
+    **engine_options,
+)
 
 db.init_app(app)
 migrate = Migrate(app, db)
 
+mysql_breaker = CircuitBreaker(
+    "mysql",
+    failure_threshold=int(get_optional_env_value("MYSQL_BREAKER_FAILURES", "5")),
+    reset_timeout=float(get_optional_env_value("MYSQL_BREAKER_RESET_SECONDS", "10")),
+)
+redis_breaker = CircuitBreaker(
+    "redis",
+    failure_threshold=int(get_optional_env_value("REDIS_BREAKER_FAILURES", "5")),
+    reset_timeout=float(get_optional_env_value("REDIS_BREAKER_RESET_SECONDS", "10")),
+)
+with app.app_context():
+    guard_engine(db.engine, mysql_breaker)
+guard_engine(read_engine, mysql_breaker)
+
+# Optional horizontal sharding of the notes table, see ShardRouter.
+shard_router = None
+shard_breakers = []
+shard_urls = parse_shard_urls(get_optional_env_value("DB_SHARDS", ""), db_url)
+if shard_urls:
+    shard_router = create_shard_router(shard_urls, engine_options)
+    for shard in shard_router.shards:
+        shard_breaker = CircuitBreaker(
+            f"mysql_shard_{shard.index}",
+            failure_threshold=mysql_breaker.failure_threshold,
+            reset_timeout=mysql_breaker.reset_timeout,
+        )
+        guard_engine(shard.engine, shard_breaker)
+        guard_engine(shard.read_engine, shard_breaker)
+        shard_breakers.append(shard_breaker)
+
+# Replicas of the primary, same format as DB_SHARDS. Only their lag is read,
+# to throttle the online backfills and schema changes.
+replica_engines = [
+    create_engine(url, isolation_level="AUTOCOMMIT", **engine_options)
+    for url in parse_shard_urls(get_optional_env_value("DB_REPLICAS", ""), db_url)
+]
+
+request_deadline_ms = int(get_optional_env_value("REQUEST_DEADLINE_MS", "5000"))
+if request_deadline_ms > 0:
+    register_deadlines(app, request_deadline_ms / 1000)
+
+set_compression_threshold(
+    int(get_optional_env_value("NOTES_COMPRESSION_THRESHOLD", "0"))
+)
+
 
 logger = logging.getLogger("demo_app_logger")
-logger.setLevel(logging.INFO)
+# JSON lines on stdout, written by a background thread so that logging never
+# blocks a request. Repeats of a call site beyond LOG_SAMPLING_BURST per
+# window are only counted (0 logs every record).
+log_pipeline = LogPipeline(
+    sys.stdout,
+    queue_size=int(get_optional_env_value("LOG_QUEUE_SIZE", "10000")),
+    burst=int(get_optional_env_value("LOG_SAMPLING_BURST", "10")),
+    window_seconds=float(get_optional_env_value("LOG_SAMPLING_WINDOW_SECONDS", "60")),
+)
+install_log_pipeline(logger, log_pipeline, get_optional_env_value("LOG_LEVEL", "INFO"))
 
+register_query_accounting(
+    app,
+    logger,
+    expose_headers=get_optional_env_value("DB_QUERY_HEADERS", "false") == "true",
+    repeat_threshold=int(get_optional_env_value("DB_QUERY_REPEAT_THRESHOLD", "5")),
+)
+
+profiling_sample_rate = float(get_optional_env_value("PROFILING_SAMPLE_RATE", "0"))
+profiling_token = os.getenv("PROFILING_TOKEN") or None
+if profiling_sample_rate > 0 or profiling_token:
+    profiler = SamplingProfiler(
+        get_optional_env_value("PROFILING_DIR", "/tmp/profiles"),
+        logger,
+        interval=float(get_optional_env_value("PROFILING_INTERVAL_MS", "5")) / 1000,
+    )
+    register_profiling(app, profiler, profiling_sample_rate, profiling_token)
+    if profiling_token:
+        register_profiling_routes(app, profiler, profiling_token)
 
-mysql_repository = MySQLRepository(db, logger)
 
 redis_host = get_env_value("REDIS_HOST")
 redis_port = int(get_env_value("REDIS_PORT"))
 redis_password = get_env_value("REDIS_PASSWORD")
 redis_db = int(get_env_value("REDIS_DB"))
 
+redis_connect_timeout = float(get_optional_env_value("REDIS_CONNECT_TIMEOUT", "1.0"))
+
 try:
+    # Binary client: RedisRepository returns raw bytes. Requests wait for a
+    # free pooled connection up to the connect timeout instead of failing,
+    # and for a reply at most until their deadline.
     redis_client = Redis(
+        connection_pool=BlockingConnectionPool(
+            connection_class=DeadlineConnection,
+            host=redis_host,
+            port=redis_port,
+            password=redis_password,
+            db=redis_db,
+            max_connections=int(get_optional_env_value("REDIS_MAX_CONNECTIONS", "20")),
+            timeout=redis_connect_timeout,
+            socket_connect_timeout=redis_connect_timeout,
+            socket_timeout=float(get_optional_env_value("REDIS_READ_TIMEOUT", "1.0")),
+            socket_keepalive=True,
+            health_check_interval=30,
+        )
+    )
+    # Pub/sub blocks on reads by design, so it gets its own connection
+    # without the read timeout.
+    redis_pubsub_client = Redis(
         host=redis_host,
         port=redis_port,
         password=redis_password,
         db=redis_db,
-        decode_responses=True,
+        socket_connect_timeout=redis_connect_timeout,
+        socket_keepalive=True,
     )
 
     redis_url = f"redis://:{redis_password}@{redis_host}:{redis_port}/{redis_db}"
@@ -67,10 +225,132 @@ except Exception as err:
     exit(1)
 
 
-redis_repository = RedisRepository(redis_client, logger)
+redis_repository = RedisRepository(redis_client, logger, breaker=redis_breaker)
 
-register_health_check_routes(app, mysql_repository, redis_repository)
-register_notes_routes(app, mysql_repository, redis_url, logger)
+# "snowflake" assigns note IDs before the INSERT, from a worker ID leased in
+# Redis. The default leaves them to MySQL auto-increment.
+note_id_generator = None
+if get_optional_env_value("NOTE_ID_GENERATOR", "auto") == "snowflake":
+    note_id_lease = WorkerIdLease(
+        redis_repository,
+        ttl_seconds=float(get_optional_env_value("NOTE_ID_WORKER_TTL_SECONDS", "60")),
+    )
+    note_id_generator = SnowflakeGenerator(note_id_lease.worker_id).next_id
+
+mysql_repository = MySQLRepository(
+    db,
+    logger,
+    read_engine=read_engine,
+    shard_router=shard_router,
+    id_generator=note_id_generator,
+    replica_engines=replica_engines,
+)
+
+metrics_registry = MetricsRegistry()
+metrics_registry.register(log_pipeline.collect)
+metrics_registry.register(redis_repository.command_latency.collect)
+metrics_registry.register(
+    lambda: collect_breakers([mysql_breaker, redis_breaker, *shard_breakers])
+)
+
+# Opt-in: concurrent note inserts of this worker wait up to the window and
+# share one multi-row INSERT and one commit.
+group_commit_wait_ms = float(get_optional_env_value("NOTE_GROUP_COMMIT_WAIT_MS", "0"))
+if group_commit_wait_ms > 0:
+    group_committer = mysql_repository.enable_group_commit(
+        int(get_optional_env_value("NOTE_GROUP_COMMIT_MAX_BATCH", "50")),
+        group_commit_wait_ms / 1000,
+    )
+    metrics_registry.register(group_committer.collect)
+
+readiness = Readiness()
+
+register_health_check_routes(app, mysql_repository, redis_repository, readiness)
+# Notes younger than this are held back from /api/v1/notes/changes, so that
+# no sync token passes a lower ID whose transaction commits later.
+register_notes_routes(
+    app,
+    mysql_repository,
+    redis_repository,
+    redis_url,
+    logger,
+    sync_settle_seconds=float(get_optional_env_value("NOTES_SYNC_SETTLE_SECONDS", "5")),
+)
+register_stats_routes(app, mysql_repository, redis_repository, logger)
+
+# Every open stream holds its worker for as long as the client stays, which
+# would starve a threaded worker. Only the gevent service enables them.
+if get_optional_env_value("NOTES_EVENTS_ENABLED", "false") == "true":
+    note_event_broadcaster = NoteEventBroadcaster(redis_pubsub_client, logger)
+    register_events_routes(app, redis_repository, note_event_broadcaster, logger)
+register_metrics_routes(app, metrics_registry)
+app.register_error_handler(DependencyUnavailableError, service_unavailable)
+
+# Sized for the gunicorn worker threads. Writes and list reads can never take
+# every slot, so single-note reads (and /health, which is not admission
+# controlled at all) stay responsive during bursts of slow requests.
+admission_capacity = int(get_optional_env_value("ADMISSION_CAPACITY", "4"))
+if admission_capacity > 0:
+    admission_queue = int(get_optional_env_value("ADMISSION_QUEUE_SIZE", "2"))
+    admission_max_wait = (
+        float(get_optional_env_value("ADMISSION_MAX_WAIT_MS", "250")) / 1000
+    )
+    admission = AdmissionController(admission_capacity)
+    admission.add_lane(
+        "note_read",
+        HIGH_PRIORITY,
+        admission_capacity,
+        admission_queue,
+        admission_max_wait,
+    )
+    admission.add_lane(
+        "notes_list",
+        NORMAL_PRIORITY,
+        int(get_optional_env_value("ADMISSION_LIST_CONCURRENCY", "1")),
+        admission_queue,
+        admission_max_wait,
+    )
+    admission.add_lane(
+        "note_write",
+        LOW_PRIORITY,
+        int(get_optional_env_value("ADMISSION_WRITE_CONCURRENCY", "2")),
+        admission_queue,
+        admission_max_wait,
+    )
+    register_admission(
+        app,
+        admission,
+        {
+            "get_note_route": "note_read",
+            "get_notes": "notes_list",
+            "get_notes_changes": "notes_list",
+            "get_notes_stats": "notes_list",
+            "add_note_route": "note_write",
+        },
+    )
+    metrics_registry.register(admission.collect)
+register_notes_commands(app, mysql_repository, redis_repository)
+register_schema_commands(app, mysql_repository)
+
+# Opt-in request tracing, exported as OTLP JSON to a file or to a collector.
+# Requests with a traceparent header follow its sampled flag, the others are
+# sampled at TRACING_SAMPLE_RATE. Registered last: every hook above becomes a
+# span of the request.
+tracing_export_url = get_optional_env_value("TRACING_EXPORT_URL", "")
+tracing_export_path = get_optional_env_value("TRACING_EXPORT_PATH", "")
+if tracing_export_url or tracing_export_path:
+    tracer = Tracer(
+        (
+            OtlpHttpExporter(tracing_export_url)
+            if tracing_export_url
+            else FileSpanExporter(tracing_export_path)
+        ),
+        sample_rate=float(get_optional_env_value("TRACING_SAMPLE_RATE", "0.01")),
+        logger=logger,
+        service_name=get_optional_env_value("TRACING_SERVICE_NAME", "demo-app"),
+    )
+    register_tracing(app, tracer)
+    metrics_registry.register(tracer.collect)
 
 
 @app.route("/")
@@ -78,6 +358,25 @@ def index() -> str:
     return "API works!"
 
 
+def warm_up_worker() -> None:
+    # Called by gunicorn (see gunicorn.conf.py) before the worker accepts
+    # connections, /ready stays unavailable until it has finished.
+    with app.app_context():
+        report = warm_up(
+            mysql_repository,
+            redis_repository,
+            connections=int(get_optional_env_value("WARMUP_CONNECTIONS", "4")),
+            preload_notes=int(get_optional_env_value("WARMUP_PRELOAD_NOTES", "100")),
+            budget_seconds=float(get_optional_env_value("WARMUP_BUDGET_MS", "10000"))
+            / 1000,
+        )
+    if report["completed"]:
+        logger.info("Warm-up finished: %s", report)
+    else:
+        logger.warning("Warm-up did not complete: %s", report)
+    readiness.mark_ready(report)
+
+
 @app.cli.command("migrate")
 @with_appcontext
 def perform_migration() -> None:
@@ -85,4 +384,5 @@ def perform_migration() -> None:
 
 
 if __name__ == "__main__":
+    warm_up_worker()
     app.run(host="0.0.0.0", port=5000)
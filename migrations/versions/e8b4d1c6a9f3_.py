@@ -0,0 +1,115 @@
+"""widen note ids to BIGINT for generated ids
+
+Revision ID: e8b4d1c6a9f3
+Revises: c5a8f3e1b7d2
+Create Date: 2025-11-24 10:12:37.501846
+
+"""
+
+import os
+
+from alembic import op
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e8b4d1c6a9f3"
+down_revision = "c5a8f3e1b7d2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing auto-increment IDs stay as they are. Generated IDs are far
+    # above them, so id DESC pagination continues across both.
+    _alter_id(op, op.get_bind(), "notes", sa.Integer(), sa.BigInteger(), "BIGINT")
+    _alter_id(
+        op, op.get_bind(), "notes_archive", sa.Integer(), sa.BigInteger(), "BIGINT"
+    )
+    # Shard tables created by 'flask notes prepare-shards' before this
+    # revision still have INT IDs.
+    for engine in _shard_engines():
+        with engine.begin() as connection:
+            _alter_id(
+                Operations(MigrationContext.configure(connection)),
+                connection,
+                "notes",
+                sa.Integer(),
+                sa.BigInteger(),
+                "BIGINT",
+            )
+        engine.dispose()
+
+
+def downgrade():
+    # Fails on generated IDs, which do not fit into INT.
+    for engine in _shard_engines():
+        with engine.begin() as connection:
+            _alter_id(
+                Operations(MigrationContext.configure(connection)),
+                connection,
+                "notes",
+                sa.BigInteger(),
+                sa.Integer(),
+                "INT",
+            )
+        engine.dispose()
+    _alter_id(op, op.get_bind(), "notes_archive", sa.BigInteger(), sa.Integer(), "INT")
+    _alter_id(op, op.get_bind(), "notes", sa.BigInteger(), sa.Integer(), "INT")
+
+
+def _alter_id(operations, connection, table, existing_type, type_, mysql_type):
+    # MySQL can only change a column's type by copying the table, which
+    # blocks writes until the copy is done. The migration does that only
+    # while the table is empty. A filled table has to be changed with an
+    # online schema change tool first, after which the migration finds the
+    # new type and skips it. Shards without a notes table are skipped too,
+    # prepare-shards creates it from the current model.
+    inspector = sa.inspect(connection)
+    if not inspector.has_table(table):
+        return
+    (column,) = [c for c in inspector.get_columns(table) if c["name"] == "id"]
+    if isinstance(column["type"], sa.BigInteger) == isinstance(type_, sa.BigInteger):
+        return
+    if (
+        connection.dialect.name == "mysql"
+        and connection.execute(sa.text(f"SELECT 1 FROM {table} LIMIT 1")).first()
+    ):
+        auto_increment = " AUTO_INCREMENT" if table == "notes" else ""
+        raise RuntimeError(
+            f"Changing {table}.id to {mysql_type} copies the table. Run "
+            f'pt-online-schema-change --alter "MODIFY id {mysql_type} NOT NULL'
+            f'{auto_increment}" D={connection.engine.url.database},t={table} '
+            "--execute (or the same with gh-ost) and then 'flask db upgrade' again"
+        )
+
+    with operations.batch_alter_table(table, schema=None) as batch_op:
+        batch_op.alter_column(
+            "id",
+            existing_type=existing_type,
+            type_=type_,
+            existing_nullable=False,
+            autoincrement=table == "notes",
+        )
+
+
+def _shard_engines():
+    # The databases of DB_SHARDS, read like the application does: a
+    # database name on the primary's server or host[:port]/database, with
+    # the primary's credentials. Alembic itself only runs against the
+    # primary.
+    primary = op.get_bind().engine.url
+    engines = []
+    for entry in os.environ.get("DB_SHARDS", "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        location, _, database = entry.rpartition("/")
+        url = primary.set(database=database)
+        if location:
+            host, _, port = location.partition(":")
+            url = url.set(host=host, port=int(port) if port else primary.port)
+        engines.append(sa.create_engine(url))
+    return engines
@@ -1,17 +1,70 @@
+from typing import Any
+
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import Index
 
 from sqlalchemy.sql import func
 
+from models.types import CompressedText, UTCDateTime
+
 db = SQLAlchemy()
 
+# 64-bit for the generated note IDs (see SnowflakeGenerator). SQLite only
+# auto-increments INTEGER primary keys.
+NoteId = db.BigInteger().with_variant(db.Integer(), "sqlite")
+
+CONTENT_PREVIEW_LEN = 160
+
+
+def make_content_preview(content: str) -> str:
+    # Whitespace collapsed and cut at a word boundary, with an ellipsis when
+    # something was left out.
+    text = " ".join(content.split())
+    if len(text) <= CONTENT_PREVIEW_LEN:
+        return text
+    cut = text[: CONTENT_PREVIEW_LEN - 1]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut + "\u2026"
+
+
+def _content_preview_default(context: Any) -> str | None:
+    # Filled on every INSERT path (ORM, executemany and multi-row VALUES)
+    # from the content of the same row.
+    content = context.get_current_parameters().get("content")
+    return None if content is None else make_content_preview(content)
+
 
 class Note(db.Model):  # type: ignore
     __tablename__ = "notes"
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(NoteId, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
-    content = db.Column(db.Text, nullable=False)
-    created_at = db.Column(
-        db.DateTime(timezone=True), server_default=func.now(), nullable=False
+    content = db.Column(CompressedText, nullable=False)
+    created_at = db.Column(UTCDateTime, server_default=func.now(), nullable=False)
+    comment = db.Column(db.Text(100), nullable=True)
+    # NULL only for rows written before the column existed, see
+    # 'flask notes backfill-previews'.
+    content_preview = db.Column(
+        db.String(CONTENT_PREVIEW_LEN),
+        nullable=True,
+        default=_content_preview_default,
     )
+
+    __table_args__ = (Index("ix_notes_created_at", "created_at"),)
+
+
+class NoteDailyStats(db.Model):  # type: ignore
+    __tablename__ = "notes_daily_stats"
+    day = db.Column(db.Date, primary_key=True)
+    notes_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class NoteArchive(db.Model):  # type: ignore
+    # Cold tier of notes, see MySQLRepository.archive_notes
+    __tablename__ = "notes_archive"
+    id = db.Column(NoteId, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(255), nullable=False)
+    content = db.Column(CompressedText, nullable=False)
+    created_at = db.Column(UTCDateTime, nullable=False)
     comment = db.Column(db.Text(100), nullable=True)
+    content_preview = db.Column(db.String(CONTENT_PREVIEW_LEN), nullable=True)
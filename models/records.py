@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import NamedTuple
+
+
+class NoteRecord(NamedTuple):
+    # Read-only row of notes or notes_archive, loaded with Core instead of
+    # the ORM. Fields are in column order, so rows map onto it positionally.
+    id: int
+    title: str
+    content: str
+    created_at: datetime
+    comment: str | None
+
+
+class NoteSummary(NamedTuple):
+    # List entry with the stored preview in place of the content.
+    id: int
+    title: str
+    content_preview: str
+    created_at: datetime
+    comment: str | None
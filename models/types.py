@@ -0,0 +1,88 @@
+import zlib
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import DateTime, Dialect, LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+# Compressed values start with a NUL byte followed by the codec id. Plain
+# values are stored as UTF-8 and never start with NUL (such text is always
+# compressed), so both kinds of rows can live in the same column.
+COMPRESSED_MARKER = b"\x00"
+ZLIB_CODEC = b"\x01"
+ZLIB_LEVEL = 6
+
+_compression_threshold = 0
+
+
+def set_compression_threshold(threshold: int) -> None:
+    # 0 disables compression of new values, existing ones are still read.
+    global _compression_threshold
+    _compression_threshold = threshold
+
+
+def get_compression_threshold() -> int:
+    return _compression_threshold
+
+
+def is_compressed(value: bytes) -> bool:
+    return value.startswith(COMPRESSED_MARKER)
+
+
+def compress_text(value: str, threshold: int) -> bytes:
+    raw = value.encode("utf-8")
+    must_compress = raw.startswith(COMPRESSED_MARKER)
+    if not must_compress and (threshold <= 0 or len(raw) < threshold):
+        return raw
+
+    compressed = COMPRESSED_MARKER + ZLIB_CODEC + zlib.compress(raw, ZLIB_LEVEL)
+    if must_compress or len(compressed) < len(raw):
+        return compressed
+    return raw
+
+
+def decompress_text(value: bytes) -> str:
+    if not is_compressed(value):
+        return value.decode("utf-8")
+
+    codec = value[1:2]
+    if codec == ZLIB_CODEC:
+        return zlib.decompress(value[2:]).decode("utf-8")
+    raise ValueError(f"Unknown compression codec: {codec!r}")
+
+
+class CompressedText(TypeDecorator[str]):
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Dialect) -> bytes | None:
+        if value is None:
+            return None
+        return compress_text(value, _compression_threshold)
+
+    def process_result_value(self, value: Any, dialect: Dialect) -> str | None:
+        if value is None:
+            return None
+        return decompress_text(bytes(value))
+
+
+class UTCDateTime(TypeDecorator[datetime]):
+    # Stored as naive UTC, loaded as aware UTC, so loaded instances never
+    # need to be touched (and dirtied) to fix up their timezone.
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(
+        self, value: datetime | None, dialect: Dialect
+    ) -> datetime | None:
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    def process_result_value(self, value: Any, dialect: Dialect) -> datetime | None:
+        if value is None:
+            return None
+        loaded: datetime = value
+        if loaded.tzinfo is None:
+            return loaded.replace(tzinfo=timezone.utc)
+        return loaded.astimezone(timezone.utc)
@@ -0,0 +1,13 @@
+from http import HTTPStatus
+
+from flask import jsonify
+
+from infrastructure.resilience.errors import DependencyUnavailableError
+
+
+def service_unavailable(error: DependencyUnavailableError) -> tuple:
+    return (
+        jsonify({"error": "Service temporarily unavailable"}),
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        {"Retry-After": str(error.retry_after)},
+    )
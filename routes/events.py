@@ -0,0 +1,117 @@
+import logging
+import queue
+import re
+from collections.abc import Iterator
+from http import HTTPStatus
+
+from flask import Flask, Response, jsonify, request
+
+from infrastructure.redis.note_events import NoteEventBroadcaster
+from infrastructure.redis.redis_repository import RedisRepository
+from infrastructure.resilience.errors import DependencyUnavailableError
+from routes.errors import service_unavailable
+
+HEARTBEAT_SECONDS = 15.0
+REPLAY_LIMIT = 1000
+RETRY_MILLISECONDS = 3000
+
+_EVENT_ID = re.compile(r"^\d+-\d+$")
+
+
+def register_events_routes(
+    app: Flask,
+    redis_repository: RedisRepository,
+    broadcaster: NoteEventBroadcaster,
+    logger: logging.Logger,
+    heartbeat_seconds: float = HEARTBEAT_SECONDS,
+) -> None:
+    @app.route("/api/v1/notes/events", methods=["GET"])
+    def get_note_events() -> tuple | Response:
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get(
+            "last_event_id"
+        )
+        if last_event_id is not None and not _EVENT_ID.match(last_event_id):
+            return (
+                jsonify({"error": "Invalid Last-Event-ID"}),
+                HTTPStatus.BAD_REQUEST,
+            )
+
+        # Subscribe before reading the replay, so that nothing published in
+        # between is lost; duplicates are skipped by comparing stream IDs.
+        subscription = broadcaster.subscribe()
+        try:
+            replay = (
+                redis_repository.get_note_events_since(last_event_id, REPLAY_LIMIT)
+                if last_event_id
+                else []
+            )
+        except Exception as error:
+            broadcaster.unsubscribe(subscription)
+            if isinstance(error, DependencyUnavailableError):
+                logger.warning(error)
+                return service_unavailable(error)
+            logger.error(error, exc_info=True)
+            return (
+                jsonify({"error": "Internal error"}),
+                HTTPStatus.INTERNAL_SERVER_ERROR,
+            )
+
+        def stream() -> Iterator[str]:
+            last_sent = last_event_id
+            try:
+                yield f"retry: {RETRY_MILLISECONDS}\n\n"
+                page = replay
+                while page:
+                    for event_id, data in page:
+                        yield _format_event(event_id, data)
+                    last_sent = page[-1][0]
+                    if len(page) < REPLAY_LIMIT:
+                        break
+                    # A full page means the client may have missed more,
+                    # keep reading until the replay has caught up.
+                    try:
+                        page = redis_repository.get_note_events_since(
+                            last_sent, REPLAY_LIMIT
+                        )
+                    except Exception as error:
+                        # The client reconnects with the last ID it got.
+                        logger.warning("Note event replay stopped: %s", error)
+                        return
+
+                while True:
+                    try:
+                        # An overflowed subscription still flushes what it
+                        # queued, then closes so the client reconnects.
+                        event_id, data = (
+                            subscription.events.get_nowait()
+                            if subscription.overflowed
+                            else subscription.events.get(timeout=heartbeat_seconds)
+                        )
+                    except queue.Empty:
+                        if subscription.overflowed:
+                            break
+                        yield ": keep-alive\n\n"
+                        continue
+                    if last_sent and _stream_position(event_id) <= _stream_position(
+                        last_sent
+                    ):
+                        continue
+                    yield _format_event(event_id, data)
+                    last_sent = event_id
+            finally:
+                broadcaster.unsubscribe(subscription)
+
+        return Response(
+            stream(),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+def _format_event(event_id: str, data: str) -> str:
+    return f"id: {event_id}\nevent: note_created\ndata: {data}\n\n"
+
+
+def _stream_position(event_id: str) -> tuple[int, int]:
+    milliseconds, _, sequence = event_id.partition("-")
+    return int(milliseconds), int(sequence or 0)
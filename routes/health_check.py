@@ -6,12 +6,14 @@ from infrastructure.mysql.mysql_repository import (
     MySQLRepository,
 )
 from infrastructure.redis.redis_repository import RedisRepository
+from services.warmup import Readiness
 
 
 def register_health_check_routes(
     app: Flask,
     mysql_repository: MySQLRepository,
     redis_repository: RedisRepository,
+    readiness: Readiness,
 ) -> None:
     @app.route("/health", methods=["GET"])
     def health_check() -> tuple:
@@ -27,3 +29,15 @@ def register_health_check_routes(
             return jsonify(health_statuses), HTTPStatus.INTERNAL_SERVER_ERROR
 
         return jsonify(health_statuses), HTTPStatus.OK
+
+    @app.route("/ready", methods=["GET"])
+    def readiness_check() -> tuple:
+        # Healthy once the worker's warm-up has finished (or used up its
+        # budget), see services.warmup.
+        if not readiness.ready:
+            return (
+                jsonify({"status": "warming_up"}),
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"Retry-After": "1"},
+            )
+        return jsonify({"status": "ready", "warm_up": readiness.report}), HTTPStatus.OK
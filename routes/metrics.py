@@ -0,0 +1,11 @@
+from flask import Flask, Response
+
+from infrastructure.metrics.registry import MetricsRegistry
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def register_metrics_routes(app: Flask, registry: MetricsRegistry) -> None:
+    @app.route("/metrics", methods=["GET"])
+    def get_metrics() -> Response:
+        return Response(registry.render(), content_type=CONTENT_TYPE)
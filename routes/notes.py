@@ -2,25 +2,35 @@ import logging
 import os
 from http import HTTPStatus
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_talisman import Talisman  # type: ignore
 
 from services.notes import (
-    get_note,
+    get_note_json,
     NotFoundError,
     add_note,
     ValidationError,
-    get_all_notes,
+    get_all_notes_json,
+    get_note_summaries_json,
+    get_notes_since_json,
     MaxLimitExceededError,
+    SYNC_SETTLE_SECONDS,
 )
 from infrastructure.mysql.mysql_repository import (
     MySQLRepository,
 )
+from infrastructure.redis.redis_repository import RedisRepository
+from infrastructure.resilience.errors import DependencyUnavailableError
+from routes.errors import service_unavailable
 
 KEY_PREFIX = "flask-limiter"
+# Polled periodically by monitoring and orchestration, must not eat into the
+# default limits.
+UNLIMITED_PATHS = ("/metrics", "/ready")
+LIST_VIEWS = ("full", "summary")
 
 
 def _get_env_value(name: str) -> str:
@@ -31,7 +41,12 @@ def _get_env_value(name: str) -> str:
 
 
 def register_notes_routes(
-    app: Flask, repository: MySQLRepository, redis_url: str, logger: logging.Logger
+    app: Flask,
+    repository: MySQLRepository,
+    redis_repository: RedisRepository,
+    redis_url: str,
+    logger: logging.Logger,
+    sync_settle_seconds: float = SYNC_SETTLE_SECONDS,
 ) -> None:
     # Enable CORS in dev environment for Swagger UI only
     # THIS IS ONLY FOR DEMO APP PURPOSE
@@ -43,10 +58,17 @@ def register_notes_routes(
         key_func=get_remote_address,
         default_limits=["100 per hour"],
         storage_uri=redis_url,
+        storage_options={"socket_connect_timeout": 1, "socket_timeout": 1},
         key_prefix=KEY_PREFIX,
+        # An unreachable Redis must not take the API down with it.
+        swallow_errors=True,
         app=app,
     )
 
+    @limiter.request_filter
+    def _is_unlimited() -> bool:
+        return request.path in UNLIMITED_PATHS
+
     Talisman(app, force_https=False)
 
     @app.route("/api/v1/notes/<int:note_id>", methods=["GET"])
@@ -59,12 +81,15 @@ def register_notes_routes(
                     HTTPStatus.BAD_REQUEST,
                 )
 
-            note = get_note(repository, note_id)
+            note = get_note_json(repository, redis_repository, note_id)
             return (
-                jsonify(note),
+                Response(note, mimetype="application/json"),
                 HTTPStatus.OK,
             )
         except Exception as error:
+            if isinstance(error, DependencyUnavailableError):
+                logger.warning(error)
+                return service_unavailable(error)
             if isinstance(error, NotFoundError):
                 return jsonify({"error": str(error)}), HTTPStatus.NOT_FOUND
 
@@ -101,9 +126,18 @@ def register_notes_routes(
             return jsonify({"error": "content cannot be empty"}), HTTPStatus.BAD_REQUEST
 
         try:
-            note_id = add_note(repository, title, content, comment)
+            note_id = add_note(
+                repository,
+                title,
+                content,
+                comment,
+                redis_repository=redis_repository,
+            )
             return jsonify({"id": note_id}), HTTPStatus.OK
         except Exception as error:
+            if isinstance(error, DependencyUnavailableError):
+                logger.warning(error)
+                return service_unavailable(error)
             if isinstance(error, ValidationError):
                 return jsonify({"error": str(error)}), HTTPStatus.BAD_REQUEST
 
@@ -119,6 +153,13 @@ def register_notes_routes(
         try:
             limit_raw = request.args.get("limit")
             last_id_raw = request.args.get("last_id")
+            view = request.args.get("view", "full")
+
+            if view not in LIST_VIEWS:
+                return (
+                    jsonify({"error": "Invalid view parameter"}),
+                    HTTPStatus.BAD_REQUEST,
+                )
 
             if limit_raw is not None:
                 try:
@@ -152,10 +193,18 @@ def register_notes_routes(
             else:
                 last_id = None
 
-            notes_data = get_all_notes(repository, limit, last_id)
+            if view == "summary":
+                notes_data = get_note_summaries_json(repository, limit, last_id)
+            else:
+                notes_data = get_all_notes_json(
+                    repository, redis_repository, limit, last_id
+                )
 
-            return jsonify(notes_data), HTTPStatus.OK
+            return Response(notes_data, mimetype="application/json"), HTTPStatus.OK
         except Exception as error:
+            if isinstance(error, DependencyUnavailableError):
+                logger.warning(error)
+                return service_unavailable(error)
             if isinstance(error, MaxLimitExceededError):
 
                 logger.warning(error, exc_info=True)
@@ -166,3 +215,58 @@ def register_notes_routes(
                 jsonify({"error": "Internal error"}),
                 HTTPStatus.INTERNAL_SERVER_ERROR,
             )
+
+    @app.route("/api/v1/notes/changes", methods=["GET"])
+    @limiter.limit("50 per minute")
+    def get_notes_changes() -> tuple:
+        try:
+            since_raw = request.args.get("since", "0")
+            limit_raw = request.args.get("limit")
+
+            try:
+                since = int(since_raw)
+            except ValueError:
+                return (
+                    jsonify({"error": "Invalid since parameter"}),
+                    HTTPStatus.BAD_REQUEST,
+                )
+            if since < 0:
+                return (
+                    jsonify({"error": "since must be a non-negative integer"}),
+                    HTTPStatus.BAD_REQUEST,
+                )
+
+            if limit_raw is not None:
+                try:
+                    limit = int(limit_raw)
+                except ValueError:
+                    return (
+                        jsonify({"error": "Invalid limit parameter"}),
+                        HTTPStatus.BAD_REQUEST,
+                    )
+                if limit <= 0:
+                    return (
+                        jsonify({"error": "limit must be a positive integer"}),
+                        HTTPStatus.BAD_REQUEST,
+                    )
+            else:
+                limit = None
+
+            changes = get_notes_since_json(
+                repository, redis_repository, since, limit, sync_settle_seconds
+            )
+
+            return Response(changes, mimetype="application/json"), HTTPStatus.OK
+        except Exception as error:
+            if isinstance(error, DependencyUnavailableError):
+                logger.warning(error)
+                return service_unavailable(error)
+            if isinstance(error, MaxLimitExceededError):
+                logger.warning(error, exc_info=True)
+                return jsonify({"error": str(error)}), HTTPStatus.CONFLICT
+
+            logger.error(error, exc_info=True)
+            return (
+                jsonify({"error": "Internal error"}),
+                HTTPStatus.INTERNAL_SERVER_ERROR,
+            )
@@ -0,0 +1,25 @@
+import hmac
+from http import HTTPStatus
+
+from flask import Flask, Response, jsonify, request
+
+from infrastructure.profiling.sampling_profiler import PROFILE_HEADER, SamplingProfiler
+
+
+def register_profiling_routes(
+    app: Flask, profiler: SamplingProfiler, token: str
+) -> None:
+    @app.route("/debug/profiles", methods=["GET"])
+    def get_profiles() -> tuple | Response:
+        header = request.headers.get(PROFILE_HEADER, "")
+        if not hmac.compare_digest(header.encode(), token.encode()):
+            return jsonify({"error": "Forbidden"}), HTTPStatus.FORBIDDEN
+
+        route = request.args.get("route")
+        if route is None:
+            return jsonify({"routes": profiler.routes()}), HTTPStatus.OK
+
+        collapsed = profiler.collapsed(route)
+        if collapsed is None:
+            return jsonify({"error": "Profile not found"}), HTTPStatus.NOT_FOUND
+        return Response(collapsed, mimetype="text/plain")
@@ -0,0 +1,57 @@
+import logging
+from http import HTTPStatus
+
+from flask import Flask, jsonify, request
+
+from infrastructure.mysql.mysql_repository import (
+    MySQLRepository,
+)
+from infrastructure.redis.redis_repository import RedisRepository
+from infrastructure.resilience.errors import DependencyUnavailableError
+from routes.errors import service_unavailable
+from services.notes import MaxLimitExceededError
+from services.stats import get_stats
+
+
+def register_stats_routes(
+    app: Flask,
+    mysql_repository: MySQLRepository,
+    redis_repository: RedisRepository,
+    logger: logging.Logger,
+) -> None:
+    @app.route("/api/v1/notes/stats", methods=["GET"])
+    def get_notes_stats() -> tuple:
+        try:
+            days_raw = request.args.get("days")
+
+            if days_raw is not None:
+                try:
+                    days = int(days_raw)
+                except ValueError:
+                    return (
+                        jsonify({"error": "Invalid days parameter"}),
+                        HTTPStatus.BAD_REQUEST,
+                    )
+                if days <= 0:
+                    return (
+                        jsonify({"error": "days must be a positive integer"}),
+                        HTTPStatus.BAD_REQUEST,
+                    )
+            else:
+                days = None
+
+            stats = get_stats(mysql_repository, redis_repository, days)
+            return jsonify(stats), HTTPStatus.OK
+        except Exception as error:
+            if isinstance(error, DependencyUnavailableError):
+                logger.warning(error)
+                return service_unavailable(error)
+            if isinstance(error, MaxLimitExceededError):
+                logger.warning(error, exc_info=True)
+                return jsonify({"error": str(error)}), HTTPStatus.CONFLICT
+
+            logger.error(error, exc_info=True)
+            return (
+                jsonify({"error": "Internal error"}),
+                HTTPStatus.INTERNAL_SERVER_ERROR,
+            )
@@ -0,0 +1,110 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import Row
+
+from infrastructure.mysql.mysql_repository import MySQLRepository
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_FIELDS = ("id", "title", "content", "created_at", "comment")
+MANIFEST_FILE = "manifest.json"
+
+
+def plan_partitions(
+    first_id: int, last_id: int, partitions: int
+) -> list[tuple[int, int]]:
+    size = max(1, -(-(last_id - first_id + 1) // partitions))
+    return [
+        (start, min(start + size - 1, last_id))
+        for start in range(first_id, last_id + 1, size)
+    ]
+
+
+def export_partition(
+    repository: MySQLRepository,
+    directory: str,
+    index: int,
+    first_id: int,
+    last_id: int,
+    export_format: str,
+    since_created_at: datetime | None = None,
+) -> dict:
+    file_name = f"notes-{index:04d}.{export_format}.gz"
+    path = os.path.join(directory, file_name)
+    rows = 0
+
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as shard:
+        writer = csv.writer(shard) if export_format == "csv" else None
+        if writer is not None:
+            writer.writerow(EXPORT_FIELDS)
+
+        for row in repository.iter_notes_by_id_range(
+            first_id, last_id, since_created_at
+        ):
+            record = _to_record(row)
+            if writer is not None:
+                writer.writerow(record[field] for field in EXPORT_FIELDS)
+            else:
+                shard.write(json.dumps(record) + "\n")
+            rows += 1
+
+    return {
+        "file": file_name,
+        "first_id": first_id,
+        "last_id": last_id,
+        "rows": rows,
+        "sha256": _sha256(path),
+    }
+
+
+def write_manifest(
+    directory: str,
+    shards: list[dict],
+    export_format: str,
+    since_id: int | None,
+    since_created_at: datetime | None,
+    max_id: int | None,
+) -> dict:
+    manifest = {
+        "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "format": export_format,
+        "since_id": since_id,
+        "since_created_at": (
+            since_created_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+            if since_created_at
+            else None
+        ),
+        # watermark for the next incremental export (--since-id)
+        "max_id": max_id,
+        "rows": sum(shard["rows"] for shard in shards),
+        "shards": sorted(shards, key=lambda shard: shard["file"]),
+    }
+    with open(
+        os.path.join(directory, MANIFEST_FILE), "w", encoding="utf-8"
+    ) as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    return manifest
+
+
+def _to_record(row: Row[Any]) -> dict:
+    return {
+        "id": row.id,
+        "title": row.title,
+        "content": row.content,
+        "created_at": row.created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "comment": row.comment,
+    }
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as shard:
+        for chunk in iter(lambda: shard.read(io.DEFAULT_BUFFER_SIZE * 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
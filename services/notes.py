@@ -1,5 +1,13 @@
+import json
+from collections import Counter
+from collections.abc import Callable, Iterable
+from datetime import datetime, timedelta, timezone
+
 from infrastructure.mysql.mysql_repository import MySQLRepository
+from infrastructure.redis.redis_repository import RedisRepository
+from infrastructure.tracing.tracer import traced
 from models.models import Note
+from models.records import NoteRecord, NoteSummary
 
 
 class ValidationError(Exception):
@@ -28,8 +36,14 @@ MIN_COMMENT_LEN = 3
 MAX_COMMENT_LEN = 100
 MAX_LIMIT = 10
 DEFAULT_LIMIT = 5
+MAX_SYNC_LIMIT = 1000
+DEFAULT_SYNC_LIMIT = 500
+SYNC_SETTLE_SECONDS = 5.0
+RFC3339_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+IMPORT_BATCH_SIZE = 5000
 
 
+@traced
 def get_note(
     repository: MySQLRepository,
     note_id: int,
@@ -40,12 +54,120 @@ def get_note(
     return _to_dict(note)
 
 
+@traced
+def get_note_json(
+    repository: MySQLRepository, redis_repository: RedisRepository, note_id: int
+) -> bytes:
+    # Notes are immutable, so a cached fragment is served without touching MySQL.
+    fragment = redis_repository.get_note_fragments([note_id]).get(note_id)
+    if fragment is not None:
+        return fragment + b"\n"
+    fragment = _encode_json(get_note(repository, note_id))
+    redis_repository.set_note_fragments({note_id: fragment})
+    return fragment + b"\n"
+
+
+@traced
 def add_note(
-    repository: MySQLRepository, title: str, content: str, comment: str | None = None
+    repository: MySQLRepository,
+    title: str,
+    content: str,
+    comment: str | None = None,
+    redis_repository: RedisRepository | None = None,
 ) -> int:
     _validate(title, content, comment)
-    new_note = Note(title=title, content=content, comment=comment)
-    return repository.add(new_note)
+    # Second precision, as stored by MySQL, so that the published event
+    # matches what later reads return.
+    created_at = datetime.now(timezone.utc).replace(microsecond=0)
+    new_note = Note(
+        title=title, content=content, comment=comment, created_at=created_at
+    )
+    note_id = repository.add(new_note)
+    if redis_repository is not None:
+        note = {
+            "id": note_id,
+            "title": title,
+            "content": content,
+            "created_at": created_at.strftime(RFC3339_FORMAT),
+            "comment": comment,
+        }
+        redis_repository.increment_notes_count(created_at.date())
+        redis_repository.set_note_fragments({note_id: _encode_json(note)})
+        redis_repository.publish_note_created(note)
+    return note_id
+
+
+@traced
+def import_notes(
+    repository: MySQLRepository,
+    records: Iterable[object],
+    on_batch: Callable[[int, list[tuple[object, str]]], None],
+    counters: RedisRepository | None = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> None:
+    # on_batch runs after every commit with the imported row count and the
+    # records rejected since the previous call, which makes it a safe checkpoint.
+    rows: list[dict] = []
+    rejected: list[tuple[object, str]] = []
+    for record in records:
+        try:
+            rows.append(_to_row(record))
+        except ValidationError as error:
+            rejected.append((record, str(error)))
+            continue
+        if len(rows) >= batch_size:
+            _insert_batch(repository, counters, rows)
+            on_batch(len(rows), rejected)
+            rows, rejected = [], []
+
+    if rows or rejected:
+        _insert_batch(repository, counters, rows)
+        on_batch(len(rows), rejected)
+
+
+def _insert_batch(
+    repository: MySQLRepository, counters: RedisRepository | None, rows: list[dict]
+) -> None:
+    repository.add_many(rows)
+    if counters is not None and rows:
+        counters.increment_notes_counts(
+            dict(Counter(row["created_at"].date() for row in rows))
+        )
+
+
+def _to_row(record: object) -> dict:
+    if not isinstance(record, dict):
+        raise ValidationError("Invalid record")
+
+    title = record.get("title")
+    content = record.get("content")
+    comment = record.get("comment") or None
+    if not isinstance(title, str) or not isinstance(content, str):
+        raise ValidationError("Title and content must be strings")
+    if comment is not None and not isinstance(comment, str):
+        raise ValidationError("Comment must be a string")
+    _validate(title, content, comment)
+
+    return {
+        "title": title,
+        "content": content,
+        "comment": comment,
+        "created_at": _parse_created_at(record.get("created_at")),
+    }
+
+
+def _parse_created_at(value: object) -> datetime:
+    if value is None or value == "":
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    if not isinstance(value, str):
+        raise ValidationError("created_at must be an RFC3339 string")
+    try:
+        created_at = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValidationError("created_at must be an RFC3339 string")
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return created_at
 
 
 def _validate(title: str, content: str, comment: str | None = None) -> None:
@@ -71,25 +193,123 @@ def _validate(title: str, content: str, comment: str | None = None) -> None:
             )
 
 
-def get_all_notes(
+@traced
+def get_all_notes_json(
+    repository: MySQLRepository,
+    redis_repository: RedisRepository,
+    limit: int | None,
+    last_id: int | None = None,
+) -> bytes:
+    limit = _page_limit(limit, DEFAULT_LIMIT, MAX_LIMIT)
+    note_ids, has_more = repository.get_note_ids(limit, last_id)
+    notes = _render_notes(repository, redis_repository, note_ids)
+    return _render_page(notes, has_more=has_more)
+
+
+@traced
+def get_note_summaries_json(
     repository: MySQLRepository, limit: int | None, last_id: int | None = None
-) -> dict:
-    if limit and limit > MAX_LIMIT:
+) -> bytes:
+    # Straight from one small query, the per-note fragments in Redis hold the
+    # full notes.
+    limit = _page_limit(limit, DEFAULT_LIMIT, MAX_LIMIT)
+    summaries, has_more = repository.get_note_summaries(limit, last_id)
+    notes = (
+        b"["
+        + b",".join(_encode_json(_summary_to_dict(summary)) for summary in summaries)
+        + b"]"
+    )
+    return _render_page(notes, has_more=has_more)
+
+
+@traced
+def get_notes_since_json(
+    repository: MySQLRepository,
+    redis_repository: RedisRepository,
+    since: int,
+    limit: int | None = None,
+    settle_seconds: float = SYNC_SETTLE_SECONDS,
+) -> bytes:
+    limit = _page_limit(limit, DEFAULT_SYNC_LIMIT, MAX_SYNC_LIMIT)
+    note_ids, has_more = repository.get_note_ids_since(since, limit)
+    if note_ids and settle_seconds > 0:
+        # IDs are taken before the commit, so a lower ID can still become
+        # visible after a higher one. The page stops before the first note
+        # younger than the settle window, the token never passes it and the
+        # note is sent by a later sync.
+        unsettled_id = repository.get_first_unsettled_id(
+            since,
+            note_ids[-1],
+            datetime.now(timezone.utc) - timedelta(seconds=settle_seconds),
+        )
+        if unsettled_id is not None:
+            note_ids = [note_id for note_id in note_ids if note_id < unsettled_id]
+            has_more = False
+    notes = _render_notes(repository, redis_repository, note_ids)
+    return _render_page(
+        notes,
+        has_more=has_more,
+        next_since=note_ids[-1] if note_ids else since,
+    )
+
+
+def _page_limit(limit: int | None, default: int, maximum: int) -> int:
+    if limit and limit > maximum:
         raise MaxLimitExceededError()
-    if not limit:
-        limit = DEFAULT_LIMIT
-    notes, has_more = repository.get_notes(limit, last_id)
+    return limit or default
+
+
+def _render_notes(
+    repository: MySQLRepository, redis_repository: RedisRepository, note_ids: list[int]
+) -> bytes:
+    fragments = redis_repository.get_note_fragments(note_ids)
+    missing = [note_id for note_id in note_ids if note_id not in fragments]
+    if missing:
+        rendered = {
+            note.id: _encode_json(_to_dict(note))
+            for note in repository.get_by_ids(missing)
+        }
+        redis_repository.set_note_fragments(rendered)
+        fragments.update(rendered)
+    return (
+        b"["
+        + b",".join(fragments[note_id] for note_id in note_ids if note_id in fragments)
+        + b"]"
+    )
+
+
+def _render_page(notes: bytes, **fields: object) -> bytes:
+    members = {key: _encode_json(value) for key, value in fields.items()}
+    members["notes"] = notes
+    return (
+        b"{"
+        + b",".join(_encode_json(key) + b":" + members[key] for key in sorted(members))
+        + b"}\n"
+    )
+
+
+def _encode_json(value: object) -> bytes:
+    # Byte for byte what jsonify produces with Flask's default JSON provider.
+    return json.dumps(
+        value, ensure_ascii=True, sort_keys=True, separators=(",", ":")
+    ).encode()
+
+
+def _summary_to_dict(summary: NoteSummary) -> dict:
     return {
-        "notes": [_to_dict(note) for note in notes],
-        "has_more": has_more,
+        "id": summary.id,
+        "title": summary.title,
+        "content_preview": summary.content_preview,
+        "created_at": summary.created_at.strftime(RFC3339_FORMAT),
+        "comment": summary.comment,
     }
 
 
-def _to_dict(note: Note) -> dict:
+def _to_dict(note: Note | NoteRecord) -> dict:
     return {
         "id": note.id,
         "title": note.title,
         "content": note.content,
-        "created_at": note.created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "created_at": note.created_at.strftime(RFC3339_FORMAT),
         "comment": note.comment,
     }
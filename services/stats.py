@@ -0,0 +1,83 @@
+from datetime import date, datetime, timedelta, timezone
+
+from infrastructure.mysql.mysql_repository import MySQLRepository
+from infrastructure.redis.redis_repository import RedisRepository
+from infrastructure.tracing.tracer import traced
+from services.notes import MaxLimitExceededError
+
+DEFAULT_STATS_DAYS = 7
+MAX_STATS_DAYS = 90
+DEFAULT_RECONCILE_DAYS = 30
+
+
+@traced
+def get_stats(
+    repository: MySQLRepository, counters: RedisRepository, days: int | None
+) -> dict:
+    if days and days > MAX_STATS_DAYS:
+        raise MaxLimitExceededError()
+    if not days:
+        days = DEFAULT_STATS_DAYS
+
+    window = _window(days)
+    total: int | None = None
+    per_day: dict[date, int] = {}
+
+    cached = counters.get_notes_stats(window)
+    if cached is not None:
+        total, per_day = cached
+
+    # Redis is the fast path; the rollup table only fills in what is missing,
+    # so the request never touches the notes table itself.
+    missing = [day for day in window if day not in per_day]
+    if missing:
+        rollup = repository.get_daily_stats(missing[0], missing[-1])
+        for day in missing:
+            per_day[day] = rollup.get(day, 0)
+    if total is None:
+        total = repository.get_rollup_total()
+
+    return {
+        "total": total,
+        "per_day": [{"date": day.isoformat(), "count": per_day[day]} for day in window],
+    }
+
+
+@traced
+def reconcile_stats(
+    repository: MySQLRepository,
+    counters: RedisRepository,
+    days: int,
+    all_days: bool = False,
+) -> dict:
+    # Inserts only count in Redis, the rollup is written here. all_days
+    # recounts every day before the window too, DEFAULT_RECONCILE_DAYS at a
+    # time so that no single query scans the whole table.
+    window = _window(days)
+    recounted = 0
+    first_day = repository.get_first_note_day() if all_days else None
+    while first_day is not None and first_day < window[0]:
+        chunk = [
+            first_day + timedelta(days=offset)
+            for offset in range(
+                min(DEFAULT_RECONCILE_DAYS, (window[0] - first_day).days)
+            )
+        ]
+        counts = repository.count_notes_by_day(chunk[0], chunk[-1])
+        repository.replace_daily_stats({day: counts.get(day, 0) for day in chunk})
+        recounted += len(chunk)
+        first_day = chunk[-1] + timedelta(days=1)
+
+    counts = repository.count_notes_by_day(window[0], window[-1])
+    per_day = {day: counts.get(day, 0) for day in window}
+
+    repository.replace_daily_stats(per_day)
+    total = repository.count_notes()
+    counters.set_notes_stats(total, per_day)
+
+    return {"total": total, "days": recounted + len(window)}
+
+
+def _window(days: int) -> list[date]:
+    today = datetime.now(timezone.utc).date()
+    return [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
@@ -0,0 +1,63 @@
+import time
+
+from infrastructure.mysql.mysql_repository import MySQLRepository
+from infrastructure.redis.redis_repository import RedisRepository
+from infrastructure.resilience.deadline import deadline
+from services.notes import (
+    DEFAULT_LIMIT,
+    MAX_LIMIT,
+    _render_notes,
+    get_all_notes_json,
+)
+
+
+class Readiness:
+    def __init__(self) -> None:
+        self.report: dict | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.report is not None
+
+    def mark_ready(self, report: dict) -> None:
+        self.report = report
+
+
+def warm_up(
+    repository: MySQLRepository,
+    redis_repository: RedisRepository,
+    connections: int,
+    preload_notes: int,
+    budget_seconds: float,
+) -> dict:
+    # Best effort: every dependency call is bounded by the budget through the
+    # request deadline, and a failing step only ends the warm-up early.
+    started_at = time.monotonic()
+    report: dict = {"completed": False}
+    with deadline(budget_seconds):
+        try:
+            report["mysql_connections"] = repository.open_connections(connections)
+            report["redis_connections"] = redis_repository.open_connections(connections)
+
+            # The first list pages as clients ask for them, which also
+            # compiles the paging statements.
+            for limit in sorted({DEFAULT_LIMIT, MAX_LIMIT}):
+                get_all_notes_json(repository, redis_repository, limit)
+
+            note_ids, _ = repository.get_note_ids(preload_notes)
+            _render_notes(repository, redis_repository, note_ids)
+            report["notes_preloaded"] = len(note_ids)
+
+            # Statements of the read paths the preload did not run, their
+            # results are thrown away.
+            repository.get_notes(DEFAULT_LIMIT)
+            if note_ids:
+                repository.get_by_id(note_ids[0])
+                repository.get_notes_since(note_ids[0], 1)
+
+            report["completed"] = True
+        except Exception as error:
+            report["error"] = str(error)
+
+    report["duration_ms"] = round((time.monotonic() - started_at) * 1000, 1)
+    return report
@@ -0,0 +1,40 @@
+import random
+import unittest
+
+from benchmarks.common import percentile, summarize, synthetic_note
+from benchmarks.dataset_scaling import parse_rows_examined
+from services.notes import _validate
+
+PLAN = """-> Limit: 11 row(s)  (cost=2.26 rows=11) (actual time=0.0412..0.0468 rows=11 loops=1)
+    -> Filter: (notes.id < 500)  (cost=2.26 rows=11) (actual time=0.04..0.0454 rows=11 loops=1)
+        -> Index range scan on notes using PRIMARY over (id < 500) (reverse)  (cost=2.26 rows=499) (actual time=0.0385..0.0434 rows=11 loops=1)
+"""
+
+
+class TestDatasetScaling(unittest.TestCase):
+    def test_parse_rows_examined_counts_access_nodes_only(self) -> None:
+        self.assertEqual(parse_rows_examined(PLAN), 11)
+        self.assertEqual(
+            parse_rows_examined(
+                "-> Table scan on notes  (cost=10 rows=100) "
+                "(actual time=0.01..1.2 rows=100 loops=2)"
+            ),
+            200,
+        )
+
+    def test_percentile(self) -> None:
+        ordered = [float(value) for value in range(1, 101)]
+        self.assertEqual(percentile(ordered, 50), 50.5)
+        self.assertEqual(percentile(ordered, 100), 100.0)
+        self.assertEqual(percentile([], 99), 0.0)
+        self.assertEqual(summarize([2.0, 1.0])["p50_ms"], 1.5)
+
+    def test_synthetic_notes_are_valid(self) -> None:
+        rng = random.Random(1)
+        for _ in range(500):
+            note = synthetic_note(rng)
+            _validate(note["title"], note["content"], note["comment"])
+
+
+if __name__ == "__main__":
+    unittest.main()
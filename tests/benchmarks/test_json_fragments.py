@@ -0,0 +1,22 @@
+import random
+import unittest
+
+from flask import Flask
+
+from benchmarks.json_fragments import render_fragments, render_jsonify, synthetic_notes
+from services.notes import _encode_json, _to_dict
+
+
+class TestJsonFragments(unittest.TestCase):
+    def test_fragments_render_identical_bytes(self) -> None:
+        # given
+        notes = synthetic_notes(random.Random(1), 50)
+        fragments = {note.id: _encode_json(_to_dict(note)) for note in notes}
+
+        # when / then
+        with Flask(__name__).app_context():
+            self.assertEqual(render_fragments(notes, fragments), render_jsonify(notes))
+
+
+if __name__ == "__main__":
+    unittest.main()
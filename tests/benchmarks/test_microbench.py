@@ -0,0 +1,65 @@
+import random
+import unittest
+
+from benchmarks.microbench import BASELINE_FORMAT, compare, mann_whitney_greater, run
+
+
+class TestMicrobench(unittest.TestCase):
+    def test_mann_whitney_greater(self) -> None:
+        # given
+        fast = [10.0 + index * 0.1 for index in range(15)]
+        slow = [12.0 + index * 0.1 for index in range(15)]
+
+        # then
+        self.assertLess(mann_whitney_greater(slow, fast), 0.001)
+        self.assertGreater(mann_whitney_greater(fast, slow), 0.99)
+        self.assertEqual(mann_whitney_greater([1.0] * 5, [1.0] * 5), 1.0)
+
+    def test_compare_flags_significant_changes_only(self) -> None:
+        # given
+        rounds = [10.0 + index * 0.1 for index in range(15)]
+        baseline = {"benchmarks": {"a": rounds, "b": rounds, "c": rounds}}
+        current = {
+            "benchmarks": {
+                "a": [value * 1.2 for value in rounds],
+                "b": [value * 1.02 for value in rounds],
+                "c": [value * 0.8 for value in rounds],
+                "d": rounds,
+            }
+        }
+
+        # when
+        rows = compare(baseline, current, alpha=0.01, threshold_pct=5)
+
+        # then
+        self.assertEqual(
+            [(row["benchmark"], row["status"]) for row in rows],
+            [("a", "slower"), ("b", "same"), ("c", "faster"), ("d", "new")],
+        )
+        self.assertEqual(rows[0]["change_pct"], 20.0)
+
+    def test_run_times_every_benchmark_of_the_layers(self) -> None:
+        # when
+        results = run(["service", "json", "route"], 2, 3, random.Random(1))
+
+        # then
+        self.assertEqual(results["format"], BASELINE_FORMAT)
+        self.assertEqual(
+            sorted(results["benchmarks"]),
+            [
+                "json.encode_note",
+                "json.render_page_10",
+                "route.add_note_body",
+                "route.get_notes_args",
+                "route.request_context",
+                "service.to_dict",
+                "service.validate",
+            ],
+        )
+        for rounds in results["benchmarks"].values():
+            self.assertEqual(len(rounds), 2)
+            self.assertTrue(all(value > 0 for value in rounds))
+
+
+if __name__ == "__main__":
+    unittest.main()
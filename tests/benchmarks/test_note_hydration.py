@@ -0,0 +1,29 @@
+import logging
+import random
+import unittest
+
+from benchmarks.note_hydration import create_notes_engine, load_core, load_orm
+from infrastructure.mysql.mysql_repository import MySQLRepository
+from models.models import db
+
+
+class TestNoteHydration(unittest.TestCase):
+    def test_orm_and_core_load_identical_notes(self) -> None:
+        # given
+        engine = create_notes_engine(random.Random(1), 51)
+        repository = MySQLRepository(
+            db, logging.getLogger(__name__), read_engine=engine
+        )
+
+        # when
+        orm = load_orm(engine, 50)
+        core = load_core(repository, 50)
+
+        # then
+        self.assertEqual(len(core), 50)
+        self.assertEqual(orm, core)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
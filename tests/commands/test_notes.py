@@ -0,0 +1,243 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from commands.notes import register_notes_commands
+from models.types import set_compression_threshold
+
+
+class TestNotesCommands(TestCase):
+    def setUp(self) -> None:
+        self.app = Flask(__name__)
+        self.mysql_repository = MagicMock()
+        self.redis_repository = MagicMock()
+        register_notes_commands(self.app, self.mysql_repository, self.redis_repository)
+        self.runner = self.app.test_cli_runner()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_import_ndjson_from_stdin(self) -> None:
+        # given
+        lines = [
+            json.dumps({"title": "First", "content": "First content"}),
+            "",
+            "{broken json",
+            json.dumps({"title": "Second", "content": "Second content"}),
+        ]
+        rejects = os.path.join(self.tmp_dir.name, "rejects.ndjson")
+
+        # when
+        result = self.runner.invoke(
+            args=["notes", "import", "-", "--rejects", rejects],
+            input="\n".join(lines) + "\n",
+        )
+
+        # then
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("2 imported, 1 rejected", result.output)
+        rows = self.mysql_repository.add_many.call_args[0][0]
+        self.assertEqual([row["title"] for row in rows], ["First", "Second"])
+        with open(rejects, encoding="utf-8") as rejects_file:
+            rejected = [json.loads(line) for line in rejects_file]
+        self.assertEqual(
+            rejected, [{"error": "Invalid record", "record": "{broken json"}]
+        )
+
+    def test_import_csv_resumes_from_checkpoint(self) -> None:
+        # given
+        source = os.path.join(self.tmp_dir.name, "notes.csv")
+        with open(source, "w", encoding="utf-8") as source_file:
+            source_file.write("title,content,comment\n")
+            for i in range(5):
+                source_file.write(f"Title {i},Some content,\n")
+        checkpoint = os.path.join(self.tmp_dir.name, "checkpoint.json")
+        with open(checkpoint, "w", encoding="utf-8") as checkpoint_file:
+            json.dump({"records": 3, "imported": 3, "rejected": 0}, checkpoint_file)
+
+        # when
+        result = self.runner.invoke(
+            args=["notes", "import", source, "--checkpoint", checkpoint]
+        )
+
+        # then
+        self.assertEqual(result.exit_code, 0, result.output)
+        rows = self.mysql_repository.add_many.call_args[0][0]
+        self.assertEqual([row["title"] for row in rows], ["Title 3", "Title 4"])
+        with open(checkpoint, encoding="utf-8") as checkpoint_file:
+            self.assertEqual(
+                json.load(checkpoint_file),
+                {"records": 5, "imported": 5, "rejected": 0},
+            )
+
+    def test_export_writes_shards_and_manifest(self) -> None:
+        # given
+        output_dir = os.path.join(self.tmp_dir.name, "export")
+        self.mysql_repository.get_id_bounds.return_value = (11, 20)
+        self.mysql_repository.iter_notes_by_id_range.return_value = iter([])
+
+        # when
+        result = self.runner.invoke(
+            args=[
+                "notes",
+                "export",
+                output_dir,
+                "--partitions",
+                "2",
+                "--since-id",
+                "10",
+            ]
+        )
+
+        # then
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.mysql_repository.get_id_bounds.assert_called_once_with(10, None)
+        with open(
+            os.path.join(output_dir, "manifest.json"), encoding="utf-8"
+        ) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(manifest["max_id"], 20)
+        self.assertEqual(
+            [(shard["first_id"], shard["last_id"]) for shard in manifest["shards"]],
+            [(11, 15), (16, 20)],
+        )
+
+    def test_export_with_nothing_to_export(self) -> None:
+        # given
+        output_dir = os.path.join(self.tmp_dir.name, "export")
+        self.mysql_repository.get_id_bounds.return_value = None
+
+        # when
+        result = self.runner.invoke(
+            args=["notes", "export", output_dir, "--since-id", "10"]
+        )
+
+        # then
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Exported 0 notes into 0 shards", result.output)
+
+    def test_compress_content_in_batches(self) -> None:
+        # given
+        set_compression_threshold(256)
+        self.addCleanup(set_compression_threshold, 0)
+        self.mysql_repository.get_id_bounds.return_value = (1, 25)
+        self.mysql_repository.get_replica_lag.return_value = None
+        self.mysql_repository.rewrite_content.side_effect = [
+            (10, 10, 3),
+            (20, 10, 3),
+            (25, 5, 3),
+            (None, 0, 0),
+        ]
+
+        # when
+        result = self.runner.invoke(
+            args=["notes", "compress-content", "--batch-size", "10", "--sleep", "0"]
+        )
+
+        # then
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(
+            [
+                call.args
+                for call in self.mysql_repository.rewrite_content.call_args_list
+            ],
+            [(0, 10, 256), (10, 10, 256), (20, 10, 256), (25, 10, 256)],
+        )
+        self.assertIn("up to id 20, 80.0%", result.output)
+        self.assertIn("Done: 25 examined, 9 rewritten", result.output)
+
+    def test_compress_content_requires_threshold(self) -> None:
+        # when
+        result = self.runner.invoke(args=["notes", "compress-content"])
+
+        # then
+        self.assertNotEqual(result.exit_code, 0)
+        self.mysql_repository.rewrite_content.assert_not_called()
+
+    def test_backfill_previews_resumes_from_checkpoint(self) -> None:
+        # given
+        checkpoint = os.path.join(self.tmp_dir.name, "previews.checkpoint")
+        with open(checkpoint, "w", encoding="utf-8") as checkpoint_file:
+            json.dump({"after_id": 10, "rows": 10, "chunks": 1}, checkpoint_file)
+        self.mysql_repository.shard_router = None
+        self.mysql_repository.get_id_bounds.return_value = (1, 30)
+        self.mysql_repository.get_replica_lag.return_value = None
+        self.mysql_repository.backfill_content_previews.side_effect = [
+            (20, 7),
+            (None, 0),
+        ]
+
+        # when
+        result = self.runner.invoke(
+            args=[
+                "notes",
+                "backfill-previews",
+                "--batch-size",
+                "10",
+                "--sleep",
+                "0",
+                "--checkpoint",
+                checkpoint,
+            ]
+        )
+
+        # then
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(
+            [
+                call.args
+                for call in self.mysql_repository.backfill_content_previews.call_args_list
+            ],
+            [(10, 10), (20, 10)],
+        )
+        self.assertIn("Resuming after id 10", result.output)
+        self.assertIn("Done: 17 previews written", result.output)
+        with open(checkpoint, encoding="utf-8") as checkpoint_file:
+            self.assertEqual(
+                json.load(checkpoint_file), {"after_id": 20, "rows": 17, "chunks": 2}
+            )
+
+    def test_archive_moves_batches_until_done(self) -> None:
+        # given
+        self.mysql_repository.get_archive_boundary.return_value = 100
+        self.mysql_repository.archive_notes.side_effect = [50, 49, 0]
+
+        # when
+        result = self.runner.invoke(
+            args=["notes", "archive", "--batch-size", "50", "--sleep", "0"]
+        )
+
+        # then
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(self.mysql_repository.archive_notes.call_count, 3)
+        self.mysql_repository.archive_notes.assert_called_with(100, 50)
+        self.assertIn("Archived 99 notes with id below 100", result.output)
+
+    def test_prepare_shards(self) -> None:
+        # given
+        self.mysql_repository.prepare_shards.return_value = 2
+
+        # when
+        result = self.runner.invoke(args=["notes", "prepare-shards"])
+
+        # then
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("2 shards are ready", result.output)
+
+    def test_prepare_shards_refuses_unarchived_notes(self) -> None:
+        # given
+        self.mysql_repository.prepare_shards.side_effect = RuntimeError(
+            "The notes table of the primary database is not empty, archive it first"
+        )
+
+        # when
+        result = self.runner.invoke(args=["notes", "prepare-shards"])
+
+        # then
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("archive it first", result.output)
@@ -0,0 +1,47 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from commands.schema import register_schema_commands
+from infrastructure.mysql.online_change import OnlineChangeError
+
+
+class TestSchemaCommands(TestCase):
+    def setUp(self) -> None:
+        self.app = Flask(__name__)
+        self.mysql_repository = MagicMock()
+        self.mysql_repository.get_replica_lag.return_value = None
+        register_schema_commands(self.app, self.mysql_repository)
+        self.runner = self.app.test_cli_runner()
+
+    def test_alter_reports_algorithms(self) -> None:
+        # given
+        self.mysql_repository.alter_table.return_value = ["ALGORITHM=INSTANT"]
+
+        # when
+        result = self.runner.invoke(
+            args=["schema", "alter", "notes", "ADD COLUMN pinned BOOL NULL"]
+        )
+
+        # then
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.mysql_repository.alter_table.assert_called_once_with(
+            "notes", "ADD COLUMN pinned BOOL NULL", 2, 5
+        )
+        self.assertIn("Altered notes (ALGORITHM=INSTANT)", result.output)
+
+    def test_alter_refuses_table_copies(self) -> None:
+        # given
+        self.mysql_repository.alter_table.side_effect = OnlineChangeError(
+            "needs a table copy"
+        )
+
+        # when
+        result = self.runner.invoke(
+            args=["schema", "alter", "notes", "MODIFY title TEXT"]
+        )
+
+        # then
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("needs a table copy", result.output)
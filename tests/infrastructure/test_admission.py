@@ -0,0 +1,161 @@
+import threading
+import time
+from http import HTTPStatus
+from unittest import TestCase
+
+from flask import Flask
+
+from infrastructure.resilience.admission import (
+    HIGH_PRIORITY,
+    LOW_PRIORITY,
+    QUEUE_FULL,
+    QUEUE_TIMEOUT,
+    AdmissionController,
+    AdmissionRejectedError,
+    register_admission,
+)
+from infrastructure.resilience.errors import DependencyUnavailableError
+from routes.errors import service_unavailable
+
+
+class TestAdmissionController(TestCase):
+    def setUp(self) -> None:
+        self.controller = AdmissionController(capacity=2)
+        self.controller.add_lane("read", HIGH_PRIORITY, 2, max_queue=2, max_wait=2)
+        self.controller.add_lane("write", LOW_PRIORITY, 1, max_queue=1, max_wait=2)
+
+    def test_sheds_when_lane_queue_is_full(self) -> None:
+        # given
+        self.controller.lanes["write"].max_queue = 0
+        self.controller.acquire("write")
+
+        # when / then
+        with self.assertRaises(AdmissionRejectedError) as context:
+            self.controller.acquire("write")
+        self.assertEqual(context.exception.reason, QUEUE_FULL)
+        self.assertEqual(context.exception.retry_after, 1)
+        self.assertEqual(self.controller.lanes["write"].shed_total[QUEUE_FULL], 1)
+        # the other lane still has room
+        self.controller.acquire("read")
+        self.assertEqual(self.controller.running, 2)
+
+    def test_sheds_after_max_wait(self) -> None:
+        # given
+        self.controller.lanes["write"].max_wait = 0.01
+        self.controller.acquire("write")
+
+        # when / then
+        with self.assertRaises(AdmissionRejectedError) as context:
+            self.controller.acquire("write")
+        self.assertEqual(context.exception.reason, QUEUE_TIMEOUT)
+        self.assertEqual(self.controller.lanes["write"].waiting, 0)
+
+        # and when a slot frees up, nothing is granted to the expired waiter
+        self.controller.release("write")
+        self.assertEqual(self.controller.running, 0)
+
+    def test_waiter_is_admitted_when_slot_frees_up(self) -> None:
+        # given
+        self.controller.acquire("write")
+        admitted = threading.Event()
+
+        def acquire() -> None:
+            self.controller.acquire("write")
+            admitted.set()
+
+        waiter = threading.Thread(target=acquire)
+        waiter.start()
+        self._wait_for_queue("write", 1)
+        self.assertIn(
+            'admission_queue_depth{lane="write"} 1', self.controller.collect()
+        )
+
+        # when
+        self.controller.release("write")
+
+        # then
+        waiter.join(timeout=2)
+        self.assertTrue(admitted.is_set())
+        self.assertEqual(self.controller.lanes["write"].in_flight, 1)
+        self.assertEqual(self.controller.lanes["write"].waiting, 0)
+
+    def test_freed_slots_go_to_higher_priority_first(self) -> None:
+        # given
+        self.controller.capacity = 1
+        self.controller.lanes["write"].max_concurrent = 2
+        self.controller.acquire("write")
+        order: list[str] = []
+
+        def acquire(lane: str) -> None:
+            self.controller.acquire(lane)
+            order.append(lane)
+
+        queued_write = threading.Thread(target=acquire, args=("write",))
+        queued_write.start()
+        self._wait_for_queue("write", 1)
+        queued_read = threading.Thread(target=acquire, args=("read",))
+        queued_read.start()
+        self._wait_for_queue("read", 1)
+
+        # when
+        self.controller.release("write")
+        queued_read.join(timeout=2)
+        self.controller.release("read")
+        queued_write.join(timeout=2)
+
+        # then
+        self.assertEqual(order, ["read", "write"])
+
+    def _wait_for_queue(self, lane: str, depth: int) -> None:
+        for _ in range(200):
+            if self.controller.lanes[lane].waiting == depth:
+                return
+            time.sleep(0.005)
+        self.fail(f"{lane} queue never reached {depth}")
+
+
+class TestRegisterAdmission(TestCase):
+    def setUp(self) -> None:
+        self.app = Flask(__name__)
+        self.controller = AdmissionController(capacity=4)
+        self.controller.add_lane("write", LOW_PRIORITY, 1)
+
+        @self.app.route("/write", methods=["POST"])
+        def write() -> str:
+            return "ok"
+
+        @self.app.route("/health")
+        def health() -> str:
+            return "ok"
+
+        register_admission(self.app, self.controller, {"write": "write"})
+        self.app.register_error_handler(DependencyUnavailableError, service_unavailable)
+        self.client = self.app.test_client()
+
+    def test_slot_is_released_after_request(self) -> None:
+        # when
+        first = self.client.post("/write")
+        second = self.client.post("/write")
+
+        # then
+        self.assertEqual(first.status_code, HTTPStatus.OK)
+        self.assertEqual(second.status_code, HTTPStatus.OK)
+        self.assertEqual(self.controller.running, 0)
+        self.assertEqual(self.controller.lanes["write"].admitted_total, 2)
+
+    def test_saturated_lane_returns_503(self) -> None:
+        # given
+        self.controller.acquire("write")
+
+        # when
+        response = self.client.post("/write")
+        health = self.client.get("/health")
+
+        # then
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        self.assertEqual(health.status_code, HTTPStatus.OK)
+        self.assertIn(
+            'admission_shed_total{lane="write",reason="queue_full"} 1',
+            self.controller.collect(),
+        )
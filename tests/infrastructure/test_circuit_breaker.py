@@ -0,0 +1,108 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from infrastructure.redis.redis_repository import RedisRepository
+from infrastructure.resilience.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    collect_breakers,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCircuitBreaker(TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            "mysql", failure_threshold=2, reset_timeout=5, clock=self.clock
+        )
+
+    def test_opens_after_consecutive_failures(self) -> None:
+        # given
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        # when
+        self.breaker.record_failure()
+
+        # then
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError) as context:
+            self.breaker.before_call()
+        self.assertEqual(context.exception.retry_after, 5)
+        self.assertEqual(self.breaker.rejected_total, 1)
+
+    def test_half_open_lets_one_probe_through(self) -> None:
+        # given
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now += 5
+
+        # when
+        self.breaker.before_call()
+
+        # then
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.before_call()
+
+    def test_failed_probe_opens_again(self) -> None:
+        # given
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now += 5
+        self.breaker.before_call()
+
+        # when
+        self.breaker.record_failure()
+
+        # then
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_collect_breakers(self) -> None:
+        # given
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+        # when
+        lines = collect_breakers([self.breaker, CircuitBreaker("redis")])
+
+        # then
+        self.assertIn('circuit_breaker_state{dependency="mysql"} 2', lines)
+        self.assertIn('circuit_breaker_state{dependency="redis"} 0', lines)
+        self.assertIn('circuit_breaker_failures_total{dependency="mysql"} 2', lines)
+
+    def test_redis_repository_fails_fast_when_open(self) -> None:
+        # given
+        redis_client = MagicMock()
+        redis_client.mget.side_effect = RedisConnectionError("Connection refused")
+        repo = RedisRepository(redis_client, MagicMock(), breaker=self.breaker)
+
+        # when
+        results = [repo.get_many(["key"]) for _ in range(3)]
+
+        # then
+        self.assertEqual(results, [{}, {}, {}])
+        self.assertEqual(redis_client.mget.call_count, 2)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(repo.health_check())
+        redis_client.ping.assert_not_called()
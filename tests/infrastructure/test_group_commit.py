@@ -0,0 +1,144 @@
+import threading
+import time
+from unittest import TestCase
+
+from infrastructure.mysql.group_commit import GroupCommitter
+from infrastructure.resilience.deadline import deadline
+
+
+class TestGroupCommitter(TestCase):
+    def setUp(self) -> None:
+        self.batches: list[list[str]] = []
+        self.committer: GroupCommitter[str, int] = GroupCommitter(
+            self._flush, max_batch=3, max_wait=2
+        )
+
+    def _flush(self, items: list[str]) -> list[int | Exception]:
+        self.batches.append(list(items))
+        return [
+            ValueError(f"bad {item}") if item.startswith("bad") else len(item)
+            for item in items
+        ]
+
+    def _submit_concurrently(self, items: list[str]) -> dict[str, object]:
+        results: dict[str, object] = {}
+
+        def submit(item: str) -> None:
+            try:
+                results[item] = self.committer.submit(item)
+            except Exception as error:
+                results[item] = error
+
+        threads = [threading.Thread(target=submit, args=(item,)) for item in items]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        return results
+
+    def test_full_batch_is_flushed_without_waiting_out_the_window(self) -> None:
+        # when
+        results = self._submit_concurrently(["a", "bb", "ccc"])
+
+        # then
+        self.assertEqual(results, {"a": 1, "bb": 2, "ccc": 3})
+        self.assertEqual(
+            [sorted(batch) for batch in self.batches], [["a", "bb", "ccc"]]
+        )
+        self.assertEqual(self.committer.batches_total, 1)
+        self.assertEqual(self.committer.items_total, 3)
+        self.assertIn(
+            'group_commit_latency_seconds_count{role="follower"} 2',
+            self.committer.collect(),
+        )
+
+    def test_failures_are_reported_per_item(self) -> None:
+        # when
+        results = self._submit_concurrently(["a", "bad", "ccc"])
+
+        # then
+        self.assertEqual(results["a"], 1)
+        self.assertEqual(results["ccc"], 3)
+        self.assertIsInstance(results["bad"], ValueError)
+        self.assertEqual(self.committer.failures_total, 1)
+
+    def test_failed_flush_fails_every_item(self) -> None:
+        # given
+        def flush(items: list[str]) -> list[int | Exception]:
+            raise RuntimeError("database is gone")
+
+        self.committer.flush = flush
+
+        # when
+        results = self._submit_concurrently(["a", "bb", "ccc"])
+
+        # then
+        for result in results.values():
+            self.assertIsInstance(result, RuntimeError)
+        self.assertEqual(self.committer.failures_total, 3)
+
+    def test_single_item_is_flushed_after_the_window(self) -> None:
+        # given
+        self.committer.max_wait = 0.01
+
+        # when
+        result = self.committer.submit("abcd")
+
+        # then
+        self.assertEqual(result, 4)
+        self.assertEqual(self.batches, [["abcd"]])
+        # the next item starts a new batch
+        self.assertEqual(self.committer.submit("ab"), 2)
+        self.assertEqual(len(self.batches), 2)
+
+    def test_followers_get_an_error_when_the_leader_is_interrupted(self) -> None:
+        # given
+        def flush(items: list[str]) -> list[int | Exception]:
+            raise KeyboardInterrupt()
+
+        self.committer.flush = flush
+        errors: list[BaseException] = []
+
+        def submit(item: str) -> None:
+            try:
+                self.committer.submit(item)
+            except BaseException as error:
+                errors.append(error)
+
+        # when
+        threads = [
+            threading.Thread(target=submit, args=(item,)) for item in ["a", "bb", "ccc"]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # then
+        self.assertEqual(
+            sorted(type(error).__name__ for error in errors),
+            ["KeyboardInterrupt", "RuntimeError", "RuntimeError"],
+        )
+
+    def test_a_followers_deadline_closes_the_window(self) -> None:
+        # given
+        results: dict[str, object] = {}
+
+        def lead() -> None:
+            results["a"] = self.committer.submit("a")
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        while self.committer._open is None:
+            time.sleep(0.001)
+        started_at = time.monotonic()
+
+        # when
+        with deadline(0.05):
+            results["bb"] = self.committer.submit("bb")
+        leader.join(timeout=5)
+
+        # then the follower still gets its result, well before max_wait
+        self.assertEqual(results, {"a": 1, "bb": 2})
+        self.assertLess(time.monotonic() - started_at, 1)
+        self.assertEqual([sorted(batch) for batch in self.batches], [["a", "bb"]])
@@ -0,0 +1,122 @@
+import io
+import json
+import logging
+import time
+from unittest import TestCase
+
+from flask import Flask
+
+from infrastructure.logs.pipeline import LogPipeline, install_log_pipeline
+
+
+class TestLogPipeline(TestCase):
+    def setUp(self) -> None:
+        self.stream = io.StringIO()
+        self.now = 0.0
+        self.pipeline = LogPipeline(
+            self.stream, burst=2, window_seconds=60, clock=lambda: self.now
+        )
+        self.logger = logging.getLogger(f"{__name__}.{self._testMethodName}")
+        self.logger.addHandler(self.pipeline)
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self) -> None:
+        self.logger.removeHandler(self.pipeline)
+        self.pipeline.close()
+
+    def _lines(self) -> list[dict]:
+        self.pipeline.flush()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def _fail(self, note_id: int) -> None:
+        try:
+            raise KeyError(note_id)
+        except KeyError as error:
+            self.logger.error(error, exc_info=True)
+
+    def test_writes_json_lines_with_extra_fields_and_request(self) -> None:
+        # given
+        app = Flask(__name__)
+
+        # when
+        with app.test_request_context("/api/v1/notes", method="POST"):
+            self.logger.warning("Slow note %s", 7, extra={"elapsed_ms": 812})
+        written_before_flush = self.stream.getvalue()
+
+        # then
+        self.assertEqual(written_before_flush, "")
+        (line,) = self._lines()
+        self.assertEqual(line["level"], "WARNING")
+        self.assertEqual(line["message"], "Slow note 7")
+        self.assertEqual(line["elapsed_ms"], 812)
+        self.assertEqual(line["http"], {"method": "POST", "path": "/api/v1/notes"})
+        self.assertTrue(line["time"].endswith("+00:00"))
+
+    def test_tracebacks_are_written_once_per_fingerprint(self) -> None:
+        # when
+        self._fail(1)
+        self._fail(2)
+
+        # then
+        first, second = self._lines()
+        self.assertIn("raise KeyError(note_id)", first["exception"]["traceback"])
+        self.assertNotIn("traceback", second["exception"])
+        self.assertEqual(
+            first["exception"]["fingerprint"], second["exception"]["fingerprint"]
+        )
+        self.assertEqual(second["exception"]["message"], "2")
+
+    def test_repeats_beyond_the_burst_are_counted(self) -> None:
+        # when
+        for note_id in range(5):
+            self._fail(note_id)
+        self.logger.info("Other call site")
+        self.now = 61
+        self.pipeline._expire_windows()
+
+        # then
+        lines = self._lines()
+        self.assertEqual(
+            [line["message"] for line in lines], ["0", "1", "Other call site", "2"]
+        )
+        self.assertEqual(lines[-1]["repeated"], 3)
+        self.assertEqual(lines[-1]["exception_type"], "KeyError")
+        self.assertEqual(self.pipeline.suppressed_total, 3)
+
+    def test_full_queue_drops_instead_of_blocking(self) -> None:
+        # given
+        pipeline = LogPipeline(io.StringIO(), queue_size=1, burst=0)
+        logger = logging.getLogger(f"{__name__}.full")
+        logger.propagate = False
+        logger.addHandler(pipeline)
+        self.addCleanup(logger.removeHandler, pipeline)
+
+        # when
+        started_at = time.perf_counter()
+        for index in range(100):
+            logger.warning("Record %s", index)
+        elapsed = time.perf_counter() - started_at
+
+        # then
+        self.assertEqual(pipeline.dropped_total, 99)
+        self.assertLess(elapsed, 1)
+        self.assertIn("log_records_dropped_total 99", pipeline.collect())
+
+    def test_writer_thread_drains_the_queue(self) -> None:
+        # given
+        logger = logging.getLogger(f"{__name__}.installed")
+        pipeline = LogPipeline(io.StringIO(), flush_seconds=0.01)
+        install_log_pipeline(logger, pipeline, "INFO")
+
+        # when
+        logger.info("Written in the background")
+        deadline = time.monotonic() + 5
+        while pipeline.written_total == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        pipeline.close()
+        logger.removeHandler(pipeline)
+
+        # then
+        self.assertEqual(pipeline.written_total, 1)
+        self.assertFalse(logger.propagate)
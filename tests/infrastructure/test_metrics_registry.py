@@ -0,0 +1,50 @@
+import unittest
+
+from infrastructure.metrics.registry import LatencyHistogram, MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_histogram_renders_cumulative_buckets(self) -> None:
+        # given
+        histogram = LatencyHistogram(
+            "redis_command_duration_seconds", "Latency.", "command", (0.001, 0.01)
+        )
+
+        # when
+        histogram.observe("GET", 0.0005)
+        histogram.observe("GET", 0.005)
+        histogram.observe("GET", 0.5)
+        histogram.observe("SET", 0.001)
+
+        # then
+        self.assertEqual(
+            histogram.collect(),
+            [
+                "# HELP redis_command_duration_seconds Latency.",
+                "# TYPE redis_command_duration_seconds histogram",
+                'redis_command_duration_seconds_bucket{command="GET",le="0.001"} 1',
+                'redis_command_duration_seconds_bucket{command="GET",le="0.01"} 2',
+                'redis_command_duration_seconds_bucket{command="GET",le="+Inf"} 3',
+                'redis_command_duration_seconds_sum{command="GET"} 0.5055',
+                'redis_command_duration_seconds_count{command="GET"} 3',
+                'redis_command_duration_seconds_bucket{command="SET",le="0.001"} 1',
+                'redis_command_duration_seconds_bucket{command="SET",le="0.01"} 1',
+                'redis_command_duration_seconds_bucket{command="SET",le="+Inf"} 1',
+                'redis_command_duration_seconds_sum{command="SET"} 0.001',
+                'redis_command_duration_seconds_count{command="SET"} 1',
+            ],
+        )
+        self.assertEqual(histogram.snapshot()["GET"]["count"], 3)
+
+    def test_registry_renders_all_collectors(self) -> None:
+        # given
+        registry = MetricsRegistry()
+        registry.register(lambda: ["first 1"])
+        registry.register(lambda: ["second 2"])
+
+        # when / then
+        self.assertEqual(registry.render(), "first 1\nsecond 2\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+from unittest import TestCase
+
+from flask import Flask
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from infrastructure.mysql.guard import guard_engine
+from infrastructure.resilience.circuit_breaker import (
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+from infrastructure.resilience.deadline import DeadlineExceededError, deadline
+from models.models import db
+
+
+class DriverError(Exception):
+    # Stands in for a PyMySQL error, which carries the MySQL error code first.
+    pass
+
+
+class TestMySQLGuard(TestCase):
+    def setUp(self) -> None:
+        self.app = Flask(__name__)
+        self.app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(self.app)
+        self.breaker = CircuitBreaker("mysql", failure_threshold=2)
+        self.statements: list[str] = []
+        with self.app.app_context():
+            guard_engine(db.engine, self.breaker)
+            event.listen(
+                db.engine,
+                "after_cursor_execute",
+                lambda *args: self.statements.append(args[2]),
+            )
+
+    def test_select_gets_execution_time_hint(self) -> None:
+        with self.app.app_context():
+            # when
+            with deadline(2):
+                db.session.execute(text("SELECT 1"))
+            db.session.execute(text("SELECT 2"))
+
+            # then
+            self.assertRegex(
+                self.statements[0], r"^SELECT /\*\+ MAX_EXECUTION_TIME\(\d+\) \*/ 1$"
+            )
+            self.assertEqual(self.statements[1], "SELECT 2")
+
+    def test_expired_deadline_fails_before_executing(self) -> None:
+        with self.app.app_context():
+            with deadline(-1):
+                with self.assertRaises(DeadlineExceededError):
+                    db.session.execute(text("SELECT 1"))
+            self.assertEqual(self.statements, [])
+
+    def test_breaker_opens_on_lost_connections(self) -> None:
+        with self.app.app_context():
+            # given
+            def lose_connection(*args: object) -> None:
+                raise DriverError(2013, "Lost connection")
+
+            event.listen(db.engine, "do_execute", lose_connection)
+            for _ in range(2):
+                with self.assertRaises(DriverError):
+                    db.session.execute(text("SELECT 1"))
+                db.session.rollback()
+            event.remove(db.engine, "do_execute", lose_connection)
+
+            # when / then
+            self.assertEqual(self.breaker.state, OPEN)
+            with self.assertRaises(CircuitOpenError):
+                db.session.execute(text("SELECT 1"))
+
+    def test_statement_errors_do_not_open_the_breaker(self) -> None:
+        with self.app.app_context():
+            # given
+            def fail_statement(*args: object) -> None:
+                raise DriverError(1213, "Deadlock found")
+
+            event.listen(db.engine, "do_execute", fail_statement)
+
+            # when
+            for _ in range(3):
+                with self.assertRaises(DriverError):
+                    db.session.execute(text("SELECT 1"))
+                db.session.rollback()
+            event.remove(db.engine, "do_execute", fail_statement)
+            with self.assertRaises(OperationalError):
+                db.session.execute(text("SELECT * FROM missing"))
+            db.session.rollback()
+
+            # then
+            self.assertNotEqual(self.breaker.state, OPEN)
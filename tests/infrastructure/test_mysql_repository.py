@@ -1,22 +1,34 @@
 import logging
-from datetime import timezone, datetime, timedelta
+from datetime import timezone, datetime, timedelta, date
+from typing import Any, cast
 from unittest import TestCase
 
 from flask import Flask
-from sqlalchemy import URL, text
+from sqlalchemy import (
+    URL,
+    LargeBinary,
+    create_engine,
+    event,
+    select,
+    text,
+    type_coerce,
+)
 from sqlalchemy.exc import IntegrityError
 
 from infrastructure.mysql.mysql_repository import (
     MySQLRepository,
 )
+from infrastructure.mysql.query_accounting import count_queries
 from main import get_env_value
-from models.models import db, Note
+from models.models import db, Note, NoteArchive, NoteDailyStats
+from models.types import is_compressed
 
 
 class TestMySQLRepository(TestCase):
     app: Flask
     repo: MySQLRepository
     logger: logging.Logger
+    db_url: URL
 
     @classmethod
     def setUpClass(cls) -> None:
@@ -36,6 +48,7 @@ class TestMySQLRepository(TestCase):
             database=db_name,
         )
         cls.app.config["SQLALCHEMY_DATABASE_URI"] = db_url
+        cls.db_url = db_url
         db.init_app(cls.app)
         cls.logger = logging.getLogger(__name__)
 
@@ -52,12 +65,23 @@ class TestMySQLRepository(TestCase):
     def tearDown(self) -> None:
         with self.app.app_context():
             db.session.execute(text("TRUNCATE TABLE notes"))
+            db.session.execute(text("TRUNCATE TABLE notes_daily_stats"))
+            db.session.execute(text("TRUNCATE TABLE notes_archive"))
             db.session.commit()
 
     def test_health_check_success(self) -> None:
         with self.app.app_context():
             self.assertTrue(self.repo.health_check())
 
+    def test_open_connections(self) -> None:
+        with self.app.app_context():
+            # when
+            opened = self.repo.open_connections(3)
+
+            # then
+            self.assertEqual(opened, 3)
+            self.assertGreaterEqual(db.engine.pool.checkedin(), 3)  # type: ignore[attr-defined]
+
     def test_get_by_id_success(self) -> None:
         # given
         note1 = Note(title="Test1", content="Some content1")
@@ -158,10 +182,9 @@ class TestMySQLRepository(TestCase):
             self.assertEqual(saved_note.title, "Test Note")
             self.assertEqual(saved_note.content, "Content with timezone")
 
-            expected_utc = created_at_with_tz.astimezone(timezone.utc).replace(
-                tzinfo=None
-            )
+            expected_utc = created_at_with_tz.astimezone(timezone.utc)
             self.assertEqual(saved_note.created_at, expected_utc)
+            self.assertEqual(saved_note.created_at.tzinfo, timezone.utc)
 
     def test_add_note_without_title(self) -> None:
         note = Note(content="Some content")
@@ -259,3 +282,402 @@ class TestMySQLRepository(TestCase):
             self.assertIsNone(notes[1].comment)
             self.assertIsNotNone(notes[1].created_at)
             self.assertEqual(notes[1].created_at.tzinfo, timezone.utc)
+
+    def test_add_leaves_the_rollup_to_reconcile(self) -> None:
+        # given
+        created_at = datetime(2025, 11, 3, 15, 30, tzinfo=timezone.utc)
+        with self.app.app_context():
+            self.repo.add(Note(title="First", content="first content"))
+            self.repo.add(
+                Note(title="Second", content="second content", created_at=created_at)
+            )
+
+            # when
+            stats = self.repo.get_daily_stats(date(2025, 11, 1), date(2025, 11, 5))
+
+            # then
+            self.assertEqual(stats, {})
+            self.assertEqual(self.repo.get_rollup_total(), 0)
+            self.assertEqual(self.repo.get_first_note_day(), date(2025, 11, 3))
+
+    def test_count_notes_by_day(self) -> None:
+        # given
+        with self.app.app_context():
+            for day in (3, 3, 4):
+                self.repo.add(
+                    Note(
+                        title="Title",
+                        content="Some content",
+                        created_at=datetime(2025, 11, day, 12, tzinfo=timezone.utc),
+                    )
+                )
+
+            # when
+            counts = self.repo.count_notes_by_day(date(2025, 11, 1), date(2025, 11, 3))
+
+            # then
+            self.assertEqual(counts, {date(2025, 11, 3): 2})
+            self.assertEqual(self.repo.count_notes(), 3)
+
+    def test_replace_daily_stats_overwrites_counts(self) -> None:
+        # given
+        with self.app.app_context():
+            db.session.add(NoteDailyStats(day=date(2025, 11, 3), notes_count=10))
+            db.session.commit()
+
+            # when
+            self.repo.replace_daily_stats({date(2025, 11, 3): 2, date(2025, 11, 4): 0})
+
+            # then
+            stats = self.repo.get_daily_stats(date(2025, 11, 3), date(2025, 11, 4))
+            self.assertEqual(stats, {date(2025, 11, 3): 2, date(2025, 11, 4): 0})
+
+    def test_add_many(self) -> None:
+        # given
+        rows = [
+            {
+                "title": f"Title {i}",
+                "content": "Some content",
+                "comment": None,
+                "created_at": datetime(2025, 11, 3, 12, i),
+            }
+            for i in range(3)
+        ]
+
+        # when
+        with self.app.app_context():
+            self.repo.add_many(rows)
+
+            # then
+            notes, has_more = self.repo.get_notes(limit=5)
+            self.assertEqual(
+                [note.title for note in notes], ["Title 2", "Title 1", "Title 0"]
+            )
+            self.assertFalse(has_more)
+
+    def test_iter_notes_by_id_range(self) -> None:
+        # given
+        with self.app.app_context():
+            for i in range(5):
+                self.repo.add(Note(title=f"Title {i}", content="Some content"))
+
+            # when
+            rows = list(self.repo.iter_notes_by_id_range(2, 4, batch_size=2))
+
+            # then
+            self.assertEqual([row.id for row in rows], [2, 3, 4])
+            self.assertEqual(self.repo.get_id_bounds(), (1, 5))
+            self.assertEqual(self.repo.get_id_bounds(since_id=3), (4, 5))
+            self.assertIsNone(self.repo.get_id_bounds(since_id=5))
+
+    def test_read_paths_query_budget(self) -> None:
+        # given
+        with self.app.app_context():
+            for i in range(3):
+                self.repo.add(Note(title=f"Title {i}", content="Some content"))
+            db.session.commit()
+
+            # when
+            with count_queries() as get_notes_stats:
+                self.repo.get_notes(limit=2)
+            with count_queries() as get_by_id_stats:
+                self.repo.get_by_id(1)
+
+            # then
+            self.assertEqual(get_notes_stats.count, 1)
+            self.assertEqual(get_by_id_stats.count, 1)
+
+    def test_add_does_not_reload_the_note(self) -> None:
+        # given
+        note = Note(title="Title", content="Some content")
+
+        with self.app.app_context():
+            # when
+            with count_queries() as stats:
+                note_id = self.repo.add(note)
+
+            # then
+            self.assertIsInstance(note_id, int)
+            self.assertEqual(stats.count, 1)
+            self.assertFalse(any(shape.startswith("SELECT") for shape in stats.shapes))
+
+    def test_generated_ids_are_kept_in_order(self) -> None:
+        # given
+        generated = iter(range(1 << 60, (1 << 60) + 10))
+        repo = MySQLRepository(db, self.logger, id_generator=lambda: next(generated))
+        created_at = datetime(2025, 11, 3, 12, 0, tzinfo=timezone.utc)
+
+        with self.app.app_context():
+            # when
+            note_id = repo.add(Note(title="First", content="Content"))
+            repo.add_many(
+                [
+                    {"title": title, "content": "Content", "created_at": created_at}
+                    for title in ("Second", "Third")
+                ]
+            )
+
+            # then
+            self.assertEqual(note_id, 1 << 60)
+            notes, _ = repo.get_notes(limit=3)
+            self.assertEqual(
+                [(note.id, note.title) for note in notes],
+                [
+                    ((1 << 60) + 2, "Third"),
+                    ((1 << 60) + 1, "Second"),
+                    (1 << 60, "First"),
+                ],
+            )
+
+    def test_add_group_reads_every_auto_increment_id(self) -> None:
+        # given
+        created_at = datetime(2025, 11, 3, 12, 0, tzinfo=timezone.utc)
+        notes = [
+            Note(title=f"Title {index}", content="Content", created_at=created_at)
+            for index in range(3)
+        ]
+
+        with self.app.app_context():
+            # when
+            with count_queries() as stats:
+                note_ids = self.repo.add_group(notes)
+
+            # then
+            self.assertEqual(stats.count, 3)
+            self.assertEqual(note_ids, sorted(set(note_ids)))
+            for index, note_id in enumerate(note_ids):
+                fetched = self.repo.get_by_id(cast(int, note_id))
+                if fetched is None:
+                    self.fail("Note not found")
+                self.assertEqual(fetched.title, f"Title {index}")
+
+    def test_add_group_with_generated_ids_inserts_in_one_statement(self) -> None:
+        # given
+        generated = iter(range(1 << 60, (1 << 60) + 10))
+        repo = MySQLRepository(db, self.logger, id_generator=lambda: next(generated))
+        notes = [Note(title=f"Title {index}", content="Content") for index in range(3)]
+
+        with self.app.app_context():
+            # when
+            with count_queries() as stats:
+                note_ids = repo.add_group(notes)
+
+            # then
+            self.assertEqual(stats.count, 1)
+            self.assertEqual(note_ids, [1 << 60, (1 << 60) + 1, (1 << 60) + 2])
+
+    def test_add_group_reports_failures_per_note(self) -> None:
+        # given
+        notes = [
+            Note(title="Fine", content="Content"),
+            Note(title="x" * 300, content="Content"),
+            Note(title="Also fine", content="Content"),
+        ]
+
+        with self.app.app_context():
+            # when
+            results = self.repo.add_group(notes)
+
+            # then
+            self.assertIsInstance(results[0], int)
+            self.assertIsInstance(results[1], Exception)
+            self.assertIsInstance(results[2], int)
+            self.assertEqual(self.repo.count_notes(), 2)
+
+    def test_reads_on_read_engine_skip_transactions(self) -> None:
+        # given
+        read_engine = create_engine(
+            self.db_url, isolation_level="AUTOCOMMIT", skip_autocommit_rollback=True
+        )
+        rollbacks: list[int] = []
+
+        @event.listens_for(read_engine, "connect")
+        def count_rollbacks(dbapi_connection: Any, connection_record: Any) -> None:
+            rollback = dbapi_connection.rollback
+
+            def counted_rollback() -> None:
+                rollbacks.append(1)
+                rollback()
+
+            dbapi_connection.rollback = counted_rollback
+
+        repo = MySQLRepository(db, self.logger, read_engine=read_engine)
+
+        with self.app.app_context():
+            note_id = repo.add(Note(title="Title", content="Some content"))
+
+            # when
+            with count_queries() as stats:
+                fetched = repo.get_by_id(note_id)
+                notes, has_more = repo.get_notes(limit=5)
+
+        read_engine.dispose()
+
+        # then
+        if fetched is None:
+            self.fail("Note not found in database")
+        self.assertEqual(fetched.title, "Title")
+        self.assertEqual(fetched.created_at.tzinfo, timezone.utc)
+        self.assertEqual([note.id for note in notes], [note_id])
+        self.assertFalse(has_more)
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(rollbacks, [])
+
+    def test_rewrite_content(self) -> None:
+        # given
+        long_content = "Lorem ipsum dolor sit amet. " * 40
+        with self.app.app_context():
+            long_id = self.repo.add(Note(title="Long", content=long_content))
+            short_id = self.repo.add(Note(title="Short", content="Short content"))
+
+            # when
+            compressed = self.repo.rewrite_content(0, batch_size=10, threshold=100)
+
+            # then
+            stored = {
+                row[0]: row[1]
+                for row in db.session.execute(
+                    select(Note.id, type_coerce(Note.content, LargeBinary))
+                )
+            }
+            self.assertEqual(compressed, (short_id, 2, 1))
+            self.assertTrue(is_compressed(stored[long_id]))
+            self.assertFalse(is_compressed(stored[short_id]))
+            fetched = self.repo.get_by_id(long_id)
+            if fetched is None:
+                self.fail("Note not found in database")
+            self.assertEqual(fetched.content, long_content)
+
+            # when
+            decompressed = self.repo.rewrite_content(0, batch_size=1, threshold=0)
+            done = self.repo.rewrite_content(short_id, batch_size=1, threshold=0)
+
+            # then
+            self.assertEqual(decompressed, (long_id, 1, 1))
+            self.assertEqual(done, (None, 0, 0))
+
+    def _add_notes_created_days_ago(self, days_ago: list[int]) -> list[int]:
+        now = datetime.now(timezone.utc)
+        return [
+            self.repo.add(
+                Note(
+                    title=f"Note {index}",
+                    content="Some content",
+                    created_at=now - timedelta(days=days),
+                )
+            )
+            for index, days in enumerate(days_ago)
+        ]
+
+    def test_archive_notes_moves_notes_below_boundary(self) -> None:
+        with self.app.app_context():
+            # given
+            ids = self._add_notes_created_days_ago([200, 150, 100, 1, 120])
+            cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+                days=90
+            )
+
+            # when
+            boundary = self.repo.get_archive_boundary(cutoff)
+            moved = self.repo.archive_notes(boundary or 0, batch_size=2)
+            moved += self.repo.archive_notes(boundary or 0, batch_size=2)
+            moved += self.repo.archive_notes(boundary or 0, batch_size=2)
+
+            # then
+            self.assertEqual(boundary, ids[3])
+            self.assertEqual(moved, 3)
+            self.assertEqual(db.session.query(NoteArchive).count(), 3)
+            self.assertEqual(db.session.query(Note).count(), 2)
+            self.assertEqual(self.repo.count_notes(), 5)
+
+    def test_reads_fall_back_to_archive(self) -> None:
+        with self.app.app_context():
+            # given
+            ids = self._add_notes_created_days_ago([200, 150, 100, 1, 0])
+            self.repo.archive_notes(ids[3], batch_size=10)
+
+            # when
+            archived = self.repo.get_by_id(ids[0])
+            first_page, first_has_more = self.repo.get_notes(limit=3)
+            second_page, second_has_more = self.repo.get_notes(
+                limit=3, last_id=first_page[-1].id
+            )
+
+            # then
+            if archived is None:
+                self.fail("Archived note not found")
+            self.assertEqual(archived.title, "Note 0")
+            self.assertEqual(archived.created_at.tzinfo, timezone.utc)
+            self.assertIsNone(self.repo.get_by_id(ids[-1] + 1))
+            self.assertEqual([note.id for note in first_page], [ids[4], ids[3], ids[2]])
+            self.assertTrue(first_has_more)
+            self.assertEqual([note.id for note in second_page], [ids[1], ids[0]])
+            self.assertFalse(second_has_more)
+            self.assertEqual(self.repo.get_id_bounds(), (ids[0], ids[4]))
+
+    def test_backfill_content_previews_covers_both_tables(self) -> None:
+        with self.app.app_context():
+            # given
+            ids = self._add_notes_created_days_ago([200, 150, 1])
+            self.repo.archive_notes(ids[2], batch_size=10)
+            for table in (NoteArchive.__table__, Note.__table__):
+                db.session.execute(table.update().values(content_preview=None))
+            db.session.commit()
+
+            # when
+            first = self.repo.backfill_content_previews(0, batch_size=2)
+            second = self.repo.backfill_content_previews(ids[1], batch_size=2)
+            done = self.repo.backfill_content_previews(ids[2], batch_size=2)
+
+            # then
+            self.assertEqual(first, (ids[1], 2))
+            self.assertEqual(second, (ids[2], 1))
+            self.assertEqual(done, (None, 0))
+            summaries, _ = self.repo.get_note_summaries(limit=3)
+            self.assertEqual(
+                [summary.content_preview for summary in summaries],
+                ["Some content"] * 3,
+            )
+
+    def test_get_notes_since_walks_archive_then_hot_table(self) -> None:
+        with self.app.app_context():
+            # given
+            ids = self._add_notes_created_days_ago([200, 150, 100, 1, 0])
+            self.repo.archive_notes(ids[3], batch_size=10)
+
+            # when
+            first_page, first_has_more = self.repo.get_notes_since(0, limit=2)
+            second_page, second_has_more = self.repo.get_notes_since(
+                first_page[-1].id, limit=2
+            )
+            last_page, last_has_more = self.repo.get_notes_since(
+                second_page[-1].id, limit=2
+            )
+
+            # then
+            self.assertEqual([note.id for note in first_page], ids[:2])
+            self.assertTrue(first_has_more)
+            self.assertEqual([note.id for note in second_page], ids[2:4])
+            self.assertTrue(second_has_more)
+            self.assertEqual([note.id for note in last_page], ids[4:])
+            self.assertFalse(last_has_more)
+            self.assertEqual(last_page[0].created_at.tzinfo, timezone.utc)
+
+    def test_get_note_ids_and_get_by_ids_span_both_tables(self) -> None:
+        with self.app.app_context():
+            # given
+            ids = self._add_notes_created_days_ago([200, 150, 100, 1, 0])
+            self.repo.archive_notes(ids[3], batch_size=10)
+
+            # when
+            page, has_more = self.repo.get_note_ids(limit=4)
+            since, since_has_more = self.repo.get_note_ids_since(ids[1], limit=10)
+            notes = self.repo.get_by_ids([ids[4], ids[0], ids[4] + 1])
+
+            # then
+            self.assertEqual(page, [ids[4], ids[3], ids[2], ids[1]])
+            self.assertTrue(has_more)
+            self.assertEqual(since, ids[2:])
+            self.assertFalse(since_has_more)
+            self.assertEqual([note.title for note in notes], ["Note 4", "Note 0"])
+            self.assertEqual(notes[1].created_at.tzinfo, timezone.utc)
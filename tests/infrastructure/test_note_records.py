@@ -0,0 +1,177 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from sqlalchemy import create_engine, event, select
+
+from infrastructure.mysql.mysql_repository import MySQLRepository
+from models.models import Note, NoteArchive, db
+from models.records import NoteRecord, NoteSummary
+
+CREATED_AT = datetime(2025, 11, 3, 12, 0, tzinfo=timezone.utc)
+
+
+class TestNoteRecordReads(TestCase):
+    def setUp(self) -> None:
+        # Reads only touch the read engine, so SQLite stands in for MySQL.
+        self.engine = create_engine("sqlite://")
+        db.metadata.create_all(
+            self.engine, tables=[Note.__table__, NoteArchive.__table__]
+        )
+        with self.engine.begin() as connection:
+            for table, ids in (
+                (NoteArchive.__table__, [1, 2, 3]),
+                (Note.__table__, [4, 5, 6]),
+            ):
+                connection.execute(
+                    table.insert(),
+                    [
+                        {
+                            "id": note_id,
+                            "title": f"Title {note_id}",
+                            "content": f"Content {note_id}",
+                            "created_at": CREATED_AT + timedelta(minutes=note_id),
+                            "comment": "Comment" if note_id % 2 else None,
+                        }
+                        for note_id in ids
+                    ],
+                )
+        self.statements: list[str] = []
+        event.listen(
+            self.engine,
+            "before_cursor_execute",
+            lambda *args: self.statements.append(args[2]),
+        )
+        self.repo = MySQLRepository(
+            db, logging.getLogger(__name__), read_engine=self.engine
+        )
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+
+    def test_get_by_id_returns_records_from_both_tables(self) -> None:
+        # when
+        hot = self.repo.get_by_id(5)
+        archived = self.repo.get_by_id(1)
+        missing = self.repo.get_by_id(7)
+
+        # then
+        self.assertEqual(
+            hot,
+            NoteRecord(
+                id=5,
+                title="Title 5",
+                content="Content 5",
+                created_at=CREATED_AT + timedelta(minutes=5),
+                comment="Comment",
+            ),
+        )
+        if archived is None:
+            self.fail("Archived note not found")
+        self.assertIsInstance(archived, NoteRecord)
+        self.assertEqual(archived.title, "Title 1")
+        self.assertIsNone(missing)
+
+    def test_list_page_without_archive_is_one_query(self) -> None:
+        # given
+        with self.engine.begin() as connection:
+            connection.execute(NoteArchive.__table__.delete())
+        self.repo.get_notes(limit=4)
+        self.statements.clear()
+
+        # when
+        page, has_more = self.repo.get_notes(limit=4)
+
+        # then
+        self.assertEqual([record.id for record in page], [6, 5, 4])
+        self.assertFalse(has_more)
+        self.assertEqual(len(self.statements), 1)
+
+    def test_get_notes_pages_continue_into_archive(self) -> None:
+        # when
+        first_page, first_has_more = self.repo.get_notes(limit=4)
+        last_page, last_has_more = self.repo.get_notes(limit=4, last_id=3)
+
+        # then
+        self.assertEqual([record.id for record in first_page], [6, 5, 4, 3])
+        self.assertTrue(first_has_more)
+        self.assertEqual([record.id for record in last_page], [2, 1])
+        self.assertFalse(last_has_more)
+        self.assertEqual(first_page[0].created_at.tzinfo, timezone.utc)
+
+    def test_get_notes_since_walks_archive_then_hot_table(self) -> None:
+        # when
+        first_page, first_has_more = self.repo.get_notes_since(1, limit=3)
+        last_page, last_has_more = self.repo.get_notes_since(4, limit=3)
+
+        # then
+        self.assertEqual([record.id for record in first_page], [2, 3, 4])
+        self.assertTrue(first_has_more)
+        self.assertEqual([record.id for record in last_page], [5, 6])
+        self.assertFalse(last_has_more)
+
+    def test_get_first_unsettled_id(self) -> None:
+        # when
+        unsettled = self.repo.get_first_unsettled_id(
+            3, 6, CREATED_AT + timedelta(minutes=4)
+        )
+        in_window = self.repo.get_first_unsettled_id(
+            3, 4, CREATED_AT + timedelta(minutes=4)
+        )
+
+        # then
+        self.assertEqual(unsettled, 5)
+        self.assertIsNone(in_window)
+
+    def test_get_note_summaries_fall_back_for_rows_without_preview(self) -> None:
+        # given
+        with self.engine.begin() as connection:
+            stored = {
+                row.id: row.content_preview
+                for row in connection.execute(
+                    select(Note.__table__.c.id, Note.__table__.c.content_preview)
+                )
+            }
+
+        # when
+        first_page, first_has_more = self.repo.get_note_summaries(limit=4)
+        last_page, last_has_more = self.repo.get_note_summaries(limit=4, last_id=3)
+
+        # then
+        # Inserts fill the preview, the archive rows predate it.
+        self.assertEqual(stored, {4: "Content 4", 5: "Content 5", 6: "Content 6"})
+        self.assertEqual(
+            first_page[0],
+            NoteSummary(
+                id=6,
+                title="Title 6",
+                content_preview="Content 6",
+                created_at=CREATED_AT + timedelta(minutes=6),
+                comment=None,
+            ),
+        )
+        self.assertTrue(first_has_more)
+        self.assertEqual(
+            [(summary.id, summary.content_preview) for summary in last_page],
+            [(2, "Content 2"), (1, "Content 1")],
+        )
+        self.assertFalse(last_has_more)
+
+    def test_get_by_ids_keeps_requested_order(self) -> None:
+        # when
+        records = self.repo.get_by_ids([6, 2, 9, 4])
+
+        # then
+        self.assertEqual([record.id for record in records], [6, 2, 4])
+        self.assertEqual(len(self.statements), 2)
+        self.assertEqual(self.repo.get_by_ids([]), [])
+
+    def test_records_are_immutable(self) -> None:
+        # given
+        record = self.repo.get_by_id(4)
+        if record is None:
+            self.fail("Note not found")
+
+        # when / then
+        with self.assertRaises(AttributeError):
+            record.title = "Changed"  # type: ignore[misc]
@@ -0,0 +1,180 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+
+from infrastructure.mysql.online_change import (
+    ChunkThrottle,
+    OnlineChangeError,
+    alter_table_online,
+    estimate_seconds_left,
+    run_backfill,
+    wait_for_replicas,
+)
+
+
+def _mysql_error(code: int) -> OperationalError:
+    # Like PyMySQL's errors, with the MySQL error code as first argument.
+    return OperationalError("ALTER TABLE", {}, Exception(code, ""))
+
+
+class TestChunkThrottle(TestCase):
+    def setUp(self) -> None:
+        self.sleeps: list[float] = []
+        self.lags: list[float | None] = []
+        self.throttle = ChunkThrottle(
+            max_batch_size=1000,
+            target_seconds=0.5,
+            sleep_seconds=0.1,
+            max_lag_seconds=2,
+            replica_lag=lambda: self.lags.pop(0) if self.lags else None,
+            sleep=self.sleeps.append,
+        )
+
+    def test_batch_size_follows_chunk_time(self) -> None:
+        # when
+        self.throttle.after_chunk(2.0)
+        after_slow = self.throttle.batch_size
+        self.throttle.after_chunk(0.6)
+        after_slightly_slow = self.throttle.batch_size
+        self.throttle.after_chunk(0.4)
+        after_on_target = self.throttle.batch_size
+        for _ in range(5):
+            self.throttle.after_chunk(0.1)
+
+        # then
+        self.assertEqual(after_slow, 250)
+        self.assertEqual(after_slightly_slow, 125)
+        self.assertEqual(after_on_target, 125)
+        self.assertEqual(self.throttle.batch_size, 1000)
+        # Slow chunks buy the primary extra rest.
+        self.assertEqual(
+            [round(pause, 3) for pause in self.sleeps[:3]], [1.6, 0.2, 0.1]
+        )
+
+    def test_waits_while_replicas_lag(self) -> None:
+        # given
+        self.lags = [5.0, float("inf"), 2.0]
+        reported: list[float] = []
+
+        # when
+        waited = wait_for_replicas(
+            lambda: self.lags.pop(0), 2, reported.append, sleep=self.sleeps.append
+        )
+
+        # then
+        self.assertEqual(waited, 2.0)
+        self.assertEqual(reported, [5.0, float("inf")])
+        self.assertEqual(self.sleeps, [1.0, 1.0])
+
+
+class TestRunBackfill(TestCase):
+    def test_runs_keyset_chunks_and_resumes(self) -> None:
+        # given
+        ids = list(range(1, 26))
+        throttle = ChunkThrottle(10, 1.0, 0, 2, lambda: None, sleep=lambda _: None)
+        reports: list[tuple[dict[str, int], float | None]] = []
+        ticks = iter(range(100))
+
+        def step(after_id: int, batch_size: int) -> tuple[int | None, int]:
+            chunk = [note_id for note_id in ids if note_id > after_id][:batch_size]
+            return (chunk[-1], len(chunk)) if chunk else (None, 0)
+
+        # when
+        progress = run_backfill(
+            step,
+            throttle,
+            {"after_id": 5, "rows": 5, "chunks": 1},
+            25,
+            lambda progress, left: reports.append((dict(progress), left)),
+            clock=lambda: float(next(ticks)),
+        )
+
+        # then
+        self.assertEqual(progress, {"after_id": 25, "rows": 25, "chunks": 3})
+        self.assertEqual([report["after_id"] for report, _ in reports], [15, 25])
+        # Every clock call advances a second: 10 IDs in 3 seconds, 10 to go.
+        self.assertEqual([left for _, left in reports], [3.0, 0.0])
+
+    def test_estimate_needs_progress_and_an_end(self) -> None:
+        self.assertEqual(estimate_seconds_left(0, 50, 100, 10), 10)
+        self.assertIsNone(estimate_seconds_left(50, 50, 100, 10))
+        self.assertIsNone(estimate_seconds_left(0, 50, None, 10))
+
+
+class TestAlterTableOnline(TestCase):
+    def setUp(self) -> None:
+        self.connection = MagicMock()
+        self.connection.dialect.name = "mysql"
+        self.connection.dialect.identifier_preparer.quote = lambda name: f"`{name}`"
+        self.statements: list[str] = []
+        self.failures: list[Exception] = []
+
+        def execute(statement: object, *args: object) -> None:
+            self.statements.append(str(statement))
+            if str(statement).startswith("ALTER") and self.failures:
+                raise self.failures.pop(0)
+
+        self.connection.execute.side_effect = execute
+
+    def test_falls_back_to_inplace_and_retries_lock_timeouts(self) -> None:
+        # given
+        self.failures = [_mysql_error(1846), _mysql_error(1205)]
+        sleeps: list[float] = []
+
+        # when
+        algorithm = alter_table_online(
+            self.connection, "notes", "ADD INDEX ix_title (title)", sleep=sleeps.append
+        )
+
+        # then
+        self.assertEqual(algorithm, "ALGORITHM=INPLACE, LOCK=NONE")
+        self.assertEqual(
+            self.statements,
+            [
+                "SET SESSION lock_wait_timeout = :timeout",
+                "ALTER TABLE `notes` ADD INDEX ix_title (title), ALGORITHM=INSTANT",
+                "ALTER TABLE `notes` ADD INDEX ix_title (title), "
+                "ALGORITHM=INPLACE, LOCK=NONE",
+                "ALTER TABLE `notes` ADD INDEX ix_title (title), "
+                "ALGORITHM=INPLACE, LOCK=NONE",
+                "SET SESSION lock_wait_timeout = DEFAULT",
+            ],
+        )
+        self.assertEqual(sleeps, [5.0])
+
+    def test_refuses_a_copying_alter(self) -> None:
+        # given
+        self.failures = [_mysql_error(1846), _mysql_error(1846)]
+
+        # when / then
+        with self.assertRaises(OnlineChangeError):
+            alter_table_online(self.connection, "notes", "MODIFY title TEXT")
+        self.assertEqual(self.statements[-1], "SET SESSION lock_wait_timeout = DEFAULT")
+
+    def test_gives_up_after_attempts(self) -> None:
+        # given
+        self.failures = [_mysql_error(1205)] * 2
+
+        # when / then
+        with self.assertRaises(OperationalError):
+            alter_table_online(
+                self.connection, "notes", "ADD c INT", attempts=2, sleep=lambda _: None
+            )
+
+    def test_other_databases_alter_directly(self) -> None:
+        # given
+        engine = create_engine("sqlite://")
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE notes (id INTEGER PRIMARY KEY)"))
+
+            # when
+            algorithm = alter_table_online(connection, "notes", "ADD COLUMN c INTEGER")
+
+        # then
+        self.assertEqual(algorithm, "DEFAULT")
+        self.assertIn(
+            "c", [column["name"] for column in inspect(engine).get_columns("notes")]
+        )
+        engine.dispose()
@@ -0,0 +1,100 @@
+from http import HTTPStatus
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from infrastructure.mysql.query_accounting import (
+    count_queries,
+    register_query_accounting,
+    statement_shape,
+)
+from models.models import db
+
+
+class TestQueryAccounting(TestCase):
+    def setUp(self) -> None:
+        self.app = Flask(__name__)
+        self.app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(self.app)
+        self.logger = MagicMock()
+
+        @self.app.route("/queries/<int:count>")
+        def run_queries(count: int) -> str:
+            for value in range(count):
+                db.session.execute(text(f"SELECT {value}"))
+            return "ok"
+
+    def test_headers_report_queries(self) -> None:
+        # given
+        register_query_accounting(self.app, self.logger, expose_headers=True)
+        client = self.app.test_client()
+
+        # when
+        response = client.get("/queries/2")
+
+        # then
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.headers["X-DB-Queries"], "2")
+        self.assertGreaterEqual(float(response.headers["X-DB-Time"]), 0)
+        self.assertIn('desc="2 queries"', response.headers["Server-Timing"])
+        self.logger.warning.assert_not_called()
+
+    def test_headers_disabled_by_default(self) -> None:
+        # given
+        register_query_accounting(self.app, self.logger)
+        client = self.app.test_client()
+
+        # when
+        response = client.get("/queries/1")
+
+        # then
+        self.assertNotIn("X-DB-Queries", response.headers)
+        self.assertNotIn("Server-Timing", response.headers)
+
+    def test_warns_about_repeated_statements(self) -> None:
+        # given
+        register_query_accounting(self.app, self.logger, repeat_threshold=3)
+        client = self.app.test_client()
+
+        # when
+        client.get("/queries/4")
+
+        # then
+        self.logger.warning.assert_called_once()
+        self.assertEqual(self.logger.warning.call_args[0][3], 4)
+        self.assertEqual(self.logger.warning.call_args[0][4], "SELECT ?")
+
+    def test_count_queries(self) -> None:
+        with self.app.app_context():
+            with count_queries() as stats:
+                db.session.execute(text("SELECT 1"))
+                db.session.execute(text("SELECT 2"))
+
+            db.session.execute(text("SELECT 3"))
+
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(stats.shapes, {"SELECT ?": 2})
+
+    def test_failed_statements_are_counted(self) -> None:
+        with self.app.app_context():
+            with count_queries() as stats:
+                with self.assertRaises(OperationalError):
+                    db.session.execute(text("SELECT * FROM missing"))
+                db.session.rollback()
+                db.session.execute(text("SELECT 1"))
+                started_at = db.session.connection().info.get("query_started_at")
+
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(started_at, [])
+
+    def test_statement_shape(self) -> None:
+        self.assertEqual(
+            statement_shape(
+                "SELECT notes.id \n FROM notes WHERE notes.id IN "
+                "(%(id_1_1)s, %(id_1_2)s, %(id_1_3)s) LIMIT 11"
+            ),
+            "SELECT notes.id FROM notes WHERE notes.id IN (?, ...) LIMIT ?",
+        )
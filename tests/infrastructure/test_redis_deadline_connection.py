@@ -0,0 +1,53 @@
+import socket
+import time
+from unittest import TestCase
+
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from infrastructure.redis.deadline_connection import DeadlineConnection
+from infrastructure.resilience.deadline import deadline
+
+
+class TestDeadlineConnection(TestCase):
+    def setUp(self) -> None:
+        # Accepts connections but never answers.
+        self.server = socket.socket()
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen()
+        self.connection = DeadlineConnection(
+            host="127.0.0.1",
+            port=self.server.getsockname()[1],
+            socket_timeout=5,
+            lib_name=None,
+            lib_version=None,
+        )
+
+    def tearDown(self) -> None:
+        self.connection.disconnect()
+        self.server.close()
+
+    def test_reads_wait_at_most_the_remaining_deadline(self) -> None:
+        # given
+        started_at = time.monotonic()
+
+        # when
+        with deadline(0.1):
+            self.connection.send_command("PING")
+            with self.assertRaises(RedisTimeoutError):
+                self.connection.read_response()
+
+        # then
+        self.assertLess(time.monotonic() - started_at, 2)
+
+    def test_socket_timeout_is_restored(self) -> None:
+        # given
+        with deadline(0.1):
+            self.connection.send_command("PING")
+
+        # when
+        sock = self.connection._sock
+
+        # then
+        if sock is None:
+            self.fail("Not connected")
+        self.assertEqual(sock.gettimeout(), 5)
@@ -1,4 +1,7 @@
+import json
 import logging
+from datetime import date
+from typing import cast
 from unittest import TestCase
 from unittest.mock import MagicMock
 
@@ -27,7 +30,6 @@ class TestRedisRepository(TestCase):
             port=redis_port,
             password=redis_password,
             db=redis_db,
-            decode_responses=True,
         )
 
         cls.repo = RedisRepository(redis_client=redis_client, logger=cls.logger)
@@ -35,6 +37,15 @@ class TestRedisRepository(TestCase):
     def test_health_check_success(self) -> None:
         self.assertTrue(self.repo.health_check())
 
+    def test_open_connections(self) -> None:
+        # when
+        opened = self.repo.open_connections(3)
+
+        # then
+        self.assertEqual(opened, 3)
+        pool = self.repo.redis_client.connection_pool
+        self.assertGreaterEqual(len(pool._available_connections), 3)
+
     def test_health_check_fail(self) -> None:
         bad_redis_client = Redis(
             host="localhost",
@@ -43,3 +54,86 @@ class TestRedisRepository(TestCase):
         )
         redis_repo = RedisRepository(redis_client=bad_redis_client, logger=self.logger)
         self.assertFalse(redis_repo.health_check())
+
+    def test_notes_stats_not_trusted_before_reconciliation(self) -> None:
+        # given
+        self.repo.redis_client.flushdb()
+        day = date(2025, 11, 3)
+
+        # when
+        self.repo.increment_notes_count(day)
+        self.repo.increment_notes_count(day, amount=2)
+
+        # then
+        self.assertEqual(self.repo.get_notes_stats([day]), (None, {}))
+
+    def test_notes_stats_after_reconciliation(self) -> None:
+        # given
+        self.repo.redis_client.flushdb()
+        day = date(2025, 11, 3)
+        missing_day = date(2025, 11, 4)
+        self.repo.set_notes_stats(10, {day: 4})
+
+        # when
+        self.repo.increment_notes_count(day)
+
+        # then
+        self.assertEqual(self.repo.get_notes_stats([day, missing_day]), (11, {day: 5}))
+
+    def test_note_events_replayed_after_last_event_id(self) -> None:
+        # given
+        self.repo.redis_client.flushdb()
+        self.repo.publish_note_created({"id": 1})
+        [(first_id, _)] = self.repo.get_note_events_since("0-0", 10)
+
+        # when
+        self.repo.publish_note_created({"id": 2})
+        events = self.repo.get_note_events_since(first_id, 10)
+
+        # then
+        self.assertEqual(len(events), 1)
+        self.assertEqual(json.loads(events[0][1]), {"id": 2})
+
+    def test_note_fragments(self) -> None:
+        # given
+        self.repo.redis_client.flushdb()
+
+        # when
+        self.repo.set_note_fragments({1: b'{"id":1}', 2: b'{"id":2}'})
+
+        # then
+        self.assertEqual(
+            self.repo.get_note_fragments([2, 3, 1]), {1: b'{"id":1}', 2: b'{"id":2}'}
+        )
+        self.assertEqual(self.repo.get_note_fragments([]), {})
+
+    def test_get_many_and_set_many_with_ttl(self) -> None:
+        # given
+        self.repo.redis_client.flushdb()
+
+        # when
+        self.repo.set_many({"a": b"\x00\xff", "b": "text", "c": 3}, ttl_seconds=60)
+
+        # then
+        self.assertEqual(
+            self.repo.get_many(["a", "b", "missing", "c"]),
+            {"a": b"\x00\xff", "b": b"text", "c": b"3"},
+        )
+        self.assertGreater(cast(int, self.repo.redis_client.ttl("a")), 0)
+        self.assertIn("MGET", self.repo.command_latency.snapshot())
+        self.assertIn("PIPELINE", self.repo.command_latency.snapshot())
+
+    def test_worker_ids_are_claimed_once_and_renewed_by_owner(self) -> None:
+        # given
+        self.repo.redis_client.flushdb()
+
+        # when
+        first = self.repo.claim_worker_id("owner-a", 2, 60000)
+        second = self.repo.claim_worker_id("owner-b", 2, 60000)
+        none_left = self.repo.claim_worker_id("owner-c", 2, 60000)
+
+        # then
+        self.assertEqual((first, second, none_left), (0, 1, None))
+        self.assertTrue(self.repo.renew_worker_id(0, "owner-a", 60000))
+        self.assertFalse(self.repo.renew_worker_id(0, "owner-b", 60000))
+        self.assertFalse(self.repo.renew_worker_id(5, "owner-a", 60000))
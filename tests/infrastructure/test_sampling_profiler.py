@@ -0,0 +1,125 @@
+import os
+import tempfile
+import time
+from collections import Counter
+from http import HTTPStatus
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from infrastructure.profiling.sampling_profiler import (
+    PROFILE_HEADER,
+    SamplingProfiler,
+    register_profiling,
+)
+from routes.profiling import register_profiling_routes
+
+TOKEN = "secret"
+
+
+class TestSamplingProfiler(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.profiler = SamplingProfiler(self.tmp_dir.name, MagicMock(), interval=0.001)
+        self.app = Flask(__name__)
+
+        @self.app.route("/slow")
+        def slow_route() -> str:
+            deadline = time.monotonic() + 0.05
+            while time.monotonic() < deadline:
+                pass
+            return "ok"
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_profiles_request_with_debug_header(self) -> None:
+        # given
+        register_profiling(self.app, self.profiler, sample_rate=0, token=TOKEN)
+        client = self.app.test_client()
+
+        # when
+        client.get("/slow", headers={PROFILE_HEADER: TOKEN})
+        client.get("/slow")
+
+        # then
+        routes = self.profiler.routes()
+        self.assertEqual(list(routes), ["GET /slow"])
+        self.assertGreater(routes["GET /slow"], 0)
+        collapsed = self.profiler.collapsed("GET /slow")
+        self.assertIsNotNone(collapsed)
+        self.assertIn("slow_route", str(collapsed))
+        with open(
+            os.path.join(self.tmp_dir.name, "GET_slow.folded"), encoding="utf-8"
+        ) as profile_file:
+            self.assertIn("slow_route", profile_file.read())
+
+    def test_samples_requests(self) -> None:
+        # given
+        register_profiling(self.app, self.profiler, sample_rate=1.0, token=None)
+        client = self.app.test_client()
+
+        # when
+        client.get("/slow")
+
+        # then
+        self.assertIn("GET /slow", self.profiler.routes())
+
+    def test_request_without_header_is_not_profiled(self) -> None:
+        # given
+        register_profiling(self.app, self.profiler, sample_rate=0, token=TOKEN)
+        client = self.app.test_client()
+
+        # when
+        client.get("/slow", headers={PROFILE_HEADER: "wrong"})
+
+        # then
+        self.assertEqual(self.profiler.routes(), {})
+
+    def test_profiles_and_dumps_are_capped(self) -> None:
+        # given
+        profiler = SamplingProfiler(
+            self.tmp_dir.name, MagicMock(), max_stacks=3, max_file_bytes=8
+        )
+        path = os.path.join(self.tmp_dir.name, "GET_slow.folded")
+
+        # when
+        for stacks in ({"a": 5, "b": 4}, {"c": 3, "d": 2, "e": 1}):
+            profiler._active[1] = Counter(stacks)
+            profiler.stop(1, "GET /slow")
+
+        # then
+        self.assertEqual(profiler.collapsed("GET /slow"), "(trimmed) 6\na 5\nb 4\n")
+        self.assertEqual(profiler.routes(), {"GET /slow": 15})
+        with open(path, encoding="utf-8") as profile_file:
+            self.assertEqual(profile_file.read(), "c 3\nd 2\ne 1\n")
+        with open(f"{path}.1", encoding="utf-8") as profile_file:
+            self.assertEqual(profile_file.read(), "a 5\nb 4\n")
+
+    def test_profiles_endpoint(self) -> None:
+        # given
+        register_profiling(self.app, self.profiler, sample_rate=0, token=TOKEN)
+        register_profiling_routes(self.app, self.profiler, TOKEN)
+        client = self.app.test_client()
+        client.get("/slow", headers={PROFILE_HEADER: TOKEN})
+
+        # when
+        forbidden = client.get("/debug/profiles")
+        wrong_token = client.get("/debug/profiles", headers={PROFILE_HEADER: "tökén"})
+        summary = client.get("/debug/profiles", headers={PROFILE_HEADER: TOKEN})
+        profile = client.get(
+            "/debug/profiles?route=GET /slow", headers={PROFILE_HEADER: TOKEN}
+        )
+        missing = client.get(
+            "/debug/profiles?route=GET /other", headers={PROFILE_HEADER: TOKEN}
+        )
+
+        # then
+        self.assertEqual(forbidden.status_code, HTTPStatus.FORBIDDEN)
+        self.assertEqual(wrong_token.status_code, HTTPStatus.FORBIDDEN)
+        self.assertEqual(summary.status_code, HTTPStatus.OK)
+        self.assertIn("GET /slow", summary.get_json()["routes"])
+        self.assertEqual(profile.status_code, HTTPStatus.OK)
+        self.assertIn("slow_route", profile.get_data(as_text=True))
+        self.assertEqual(missing.status_code, HTTPStatus.NOT_FOUND)
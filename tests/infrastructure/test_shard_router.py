@@ -0,0 +1,284 @@
+import itertools
+import logging
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from sqlalchemy import URL, create_engine, event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from infrastructure.mysql.mysql_repository import MySQLRepository
+from infrastructure.mysql.shard_router import Shard, ShardRouter, parse_shard_urls
+from infrastructure.resilience.deadline import deadline, remaining_seconds
+from models.models import Note, NoteArchive, db
+
+CREATED_AT = datetime(2025, 11, 3, 12, 0, tzinfo=timezone.utc)
+
+
+def _engine_with_notes(table: object, ids: list[int]) -> Engine:
+    # One shared connection, so that the shard threads see the same database.
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    db.metadata.create_all(engine, tables=[Note.__table__, NoteArchive.__table__])
+    with engine.begin() as connection:
+        connection.execute(
+            table.insert(),  # type: ignore[attr-defined]
+            [
+                {
+                    "id": note_id,
+                    "title": f"Title {note_id}",
+                    "content": f"Content {note_id}",
+                    "created_at": CREATED_AT + timedelta(minutes=note_id),
+                }
+                for note_id in ids
+            ],
+        )
+    return engine
+
+
+class TestShardRouter(TestCase):
+    def setUp(self) -> None:
+        self.engines = [create_engine("sqlite://") for _ in range(3)]
+        self.router = ShardRouter(
+            [Shard(index, engine, engine) for index, engine in enumerate(self.engines)]
+        )
+
+    def tearDown(self) -> None:
+        for engine in self.engines:
+            engine.dispose()
+
+    def test_ids_route_to_the_shard_that_issued_them(self) -> None:
+        # shard k of n issues k+1, k+1+n, ...
+        self.assertEqual(
+            [self.router.shard_for(note_id).index for note_id in range(1, 8)],
+            [0, 1, 2, 0, 1, 2, 0],
+        )
+        self.assertEqual(
+            self.router.group_by_shard([7, 2, 4, 9]), {0: [7, 4], 1: [2], 2: [9]}
+        )
+
+    def test_scatter_runs_in_the_callers_context(self) -> None:
+        # when
+        with deadline(5):
+            results = self.router.scatter(
+                lambda shard: (shard.index, remaining_seconds())
+            )
+
+        # then
+        self.assertEqual([index for index, _ in results], [0, 1, 2])
+        for _, remaining in results:
+            self.assertIsNotNone(remaining)
+
+    def test_parse_shard_urls(self) -> None:
+        # given
+        primary = URL.create(
+            "mysql+pymysql",
+            username="user",
+            password="secret",
+            host="db",
+            port=3306,
+            database="notes",
+        )
+
+        # when
+        urls = parse_shard_urls(
+            "notes_0, other-host/notes_1,other-host:3307/notes_2,", primary
+        )
+
+        # then
+        self.assertEqual(
+            [(url.host, url.port, url.database, url.username) for url in urls],
+            [
+                ("db", 3306, "notes_0", "user"),
+                ("other-host", 3306, "notes_1", "user"),
+                ("other-host", 3307, "notes_2", "user"),
+            ],
+        )
+        self.assertEqual(parse_shard_urls("", primary), [])
+
+
+class TestShardedReads(TestCase):
+    def setUp(self) -> None:
+        # Archived notes 1-3 on the primary, hot notes 4-9 on two shards.
+        self.primary = _engine_with_notes(NoteArchive.__table__, [1, 2, 3])
+        self.shards = [
+            _engine_with_notes(Note.__table__, [5, 7, 9]),
+            _engine_with_notes(Note.__table__, [4, 6, 8]),
+        ]
+        self.statements: dict[int, list[str]] = {0: [], 1: []}
+        for index, engine in enumerate(self.shards):
+            event.listen(
+                engine,
+                "before_cursor_execute",
+                lambda *args, index=index: self.statements[index].append(args[2]),
+            )
+        self.router = ShardRouter(
+            [Shard(index, engine, engine) for index, engine in enumerate(self.shards)]
+        )
+        self.repo = MySQLRepository(
+            db,
+            logging.getLogger(__name__),
+            read_engine=self.primary,
+            shard_router=self.router,
+            id_generator=itertools.count(10).__next__,
+        )
+        self.primary_session = Session(self.primary)
+
+    def tearDown(self) -> None:
+        self.primary_session.close()
+        for engine in [self.primary, *self.shards]:
+            engine.dispose()
+
+    def test_get_notes_merges_shards_and_continues_into_archive(self) -> None:
+        # when
+        first_page, first_has_more = self.repo.get_notes(limit=4)
+        second_page, second_has_more = self.repo.get_notes(limit=4, last_id=6)
+        ids_page, ids_has_more = self.repo.get_note_ids(limit=4, last_id=6)
+
+        # then
+        self.assertEqual([record.id for record in first_page], [9, 8, 7, 6])
+        self.assertTrue(first_has_more)
+        self.assertEqual([record.id for record in second_page], [5, 4, 3, 2])
+        self.assertTrue(second_has_more)
+        self.assertEqual((ids_page, ids_has_more), ([5, 4, 3, 2], True))
+
+    def test_get_notes_since_walks_archive_then_shards(self) -> None:
+        # when
+        first_page, first_has_more = self.repo.get_notes_since(1, limit=4)
+        last_page, last_has_more = self.repo.get_notes_since(5, limit=4)
+        ids_page, ids_has_more = self.repo.get_note_ids_since(5, limit=4)
+
+        # then
+        self.assertEqual([record.id for record in first_page], [2, 3, 4, 5])
+        self.assertTrue(first_has_more)
+        self.assertEqual([record.id for record in last_page], [6, 7, 8, 9])
+        self.assertFalse(last_has_more)
+        self.assertEqual((ids_page, ids_has_more), ([6, 7, 8, 9], False))
+
+    def test_get_by_id_only_asks_the_owning_shard(self) -> None:
+        # when
+        note = self.repo.get_by_id(8)
+
+        # then
+        if note is None:
+            self.fail("Note not found")
+        self.assertEqual(note.title, "Title 8")
+        self.assertEqual(len(self.statements[0]), 0)
+        self.assertEqual(len(self.statements[1]), 1)
+
+    def test_get_by_ids_spans_shards_and_archive(self) -> None:
+        # when
+        notes = self.repo.get_by_ids([8, 2, 9, 10])
+
+        # then
+        self.assertEqual([note.id for note in notes], [8, 2, 9])
+
+    def test_sharding_requires_generated_ids(self) -> None:
+        with self.assertRaises(ValueError):
+            MySQLRepository(db, logging.getLogger(__name__), shard_router=self.router)
+
+    def _repo_on_primary(self) -> MySQLRepository:
+        primary_db = MagicMock()
+        primary_db.engine = self.primary
+        primary_db.session = self.primary_session
+        return MySQLRepository(
+            primary_db,
+            logging.getLogger(__name__),
+            shard_router=self.router,
+            id_generator=itertools.count(10).__next__,
+        )
+
+    def test_id_range_jobs_walk_archive_and_shards(self) -> None:
+        # given
+        repo = self._repo_on_primary()
+
+        # when
+        bounds = repo.get_id_bounds()
+        since_bounds = repo.get_id_bounds(since_id=6)
+        rows = list(repo.iter_notes_by_id_range(2, 8, batch_size=2))
+        rewritten = repo.rewrite_content(3, batch_size=4, threshold=0)
+
+        # then
+        self.assertEqual(bounds, (1, 9))
+        self.assertEqual(since_bounds, (7, 9))
+        self.assertEqual([row.id for row in rows], [2, 3, 4, 5, 6, 7, 8])
+        self.assertEqual(rewritten, (7, 4, 0))
+
+    def test_archive_moves_old_notes_from_every_shard(self) -> None:
+        # given
+        repo = self._repo_on_primary()
+
+        # when
+        boundary = repo.get_archive_boundary(CREATED_AT + timedelta(minutes=7))
+        moved = repo.archive_notes(boundary or 0, batch_size=2)
+        done = repo.archive_notes(boundary or 0, batch_size=2)
+
+        # then
+        self.assertEqual(boundary, 7)
+        self.assertEqual((moved, done), (3, 0))
+        with self.primary.connect() as connection:
+            archived = connection.execute(select(NoteArchive.id)).scalars().all()
+        self.assertEqual(sorted(archived), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(repo.count_notes(), 9)
+        self.assertEqual(repo.get_archive_boundary(CREATED_AT + timedelta(days=1)), 10)
+
+    def test_add_group_only_retries_the_notes_of_the_refusing_shard(self) -> None:
+        # given 8 already exists on shard 1
+        repo = MySQLRepository(
+            MagicMock(),
+            logging.getLogger(__name__),
+            shard_router=self.router,
+            id_generator=iter([11, 8, 13, 15]).__next__,
+        )
+        notes = [
+            Note(title=f"New {index}", content="Content", created_at=CREATED_AT)
+            for index in range(3)
+        ]
+
+        # when
+        results = repo.add_group(notes)
+
+        # then
+        self.assertEqual(results, [11, 15, 13])
+        with self.shards[0].connect() as connection:
+            self.assertEqual(
+                connection.execute(select(Note.id).order_by(Note.id)).scalars().all(),
+                [5, 7, 9, 11, 13, 15],
+            )
+
+    def test_backfill_content_previews_walks_the_shards_in_id_order(self) -> None:
+        # given
+        for engine, note_ids in ((self.shards[0], [5, 9]), (self.shards[1], [6])):
+            with engine.begin() as connection:
+                connection.execute(
+                    Note.__table__.update()
+                    .where(Note.__table__.c.id.in_(note_ids))
+                    .values(content_preview=None)
+                )
+        repo = MySQLRepository(
+            MagicMock(),
+            logging.getLogger(__name__),
+            shard_router=self.router,
+            id_generator=itertools.count(10).__next__,
+        )
+
+        # when
+        batches = [
+            repo.backfill_content_previews(after_id, 2) for after_id in (0, 6, 9)
+        ]
+
+        # then
+        self.assertEqual(batches, [(6, 2), (9, 1), (None, 0)])
+        for engine in self.shards:
+            with engine.connect() as connection:
+                self.assertEqual(
+                    connection.execute(
+                        select(Note.id).where(Note.content_preview.is_(None))
+                    ).all(),
+                    [],
+                )
@@ -0,0 +1,156 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from redis import RedisError
+
+from infrastructure.ids.snowflake import (
+    EPOCH_MS,
+    SEQUENCE_BITS,
+    WORKER_ID_BITS,
+    ClockMovedBackwardsError,
+    SnowflakeGenerator,
+    WorkerIdLease,
+)
+from infrastructure.resilience.errors import DependencyUnavailableError
+
+
+class FakeClock:
+    def __init__(self, ms: int) -> None:
+        self.ms = ms
+        self.slept = 0.0
+
+    def time(self) -> float:
+        return self.ms / 1000
+
+    def sleep(self, seconds: float) -> None:
+        self.slept += seconds
+        self.ms += max(1, round(seconds * 1000))
+
+
+def _parts(note_id: int) -> tuple[int, int, int]:
+    return (
+        (note_id >> (WORKER_ID_BITS + SEQUENCE_BITS)) + EPOCH_MS,
+        (note_id >> SEQUENCE_BITS) & ((1 << WORKER_ID_BITS) - 1),
+        note_id & ((1 << SEQUENCE_BITS) - 1),
+    )
+
+
+class TestSnowflakeGenerator(TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock(EPOCH_MS + 1000)
+        self.generator = SnowflakeGenerator(
+            lambda: 5, clock=self.clock.time, sleep=self.clock.sleep
+        )
+
+    def test_ids_carry_time_worker_and_sequence(self) -> None:
+        # when
+        first = self.generator.next_id()
+        second = self.generator.next_id()
+        self.clock.ms += 3
+        third = self.generator.next_id()
+
+        # then
+        self.assertEqual(_parts(first), (EPOCH_MS + 1000, 5, 0))
+        self.assertEqual(_parts(second), (EPOCH_MS + 1000, 5, 1))
+        # the sequence carries on into the next millisecond
+        self.assertEqual(_parts(third), (EPOCH_MS + 1003, 5, 2))
+        self.assertLess(first, second)
+        self.assertLess(second, third)
+        self.assertLess(third, 1 << 63)
+
+    def test_waits_for_next_millisecond_when_sequence_runs_out(self) -> None:
+        # when
+        ids = [self.generator.next_id() for _ in range((1 << SEQUENCE_BITS) + 1)]
+
+        # then
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertEqual(_parts(ids[-1]), (EPOCH_MS + 1001, 5, 0))
+        self.assertGreater(self.clock.slept, 0)
+
+    def test_clock_moving_back(self) -> None:
+        # given
+        first = self.generator.next_id()
+
+        # when a small step back is waited out
+        self.clock.ms -= 5
+        second = self.generator.next_id()
+
+        # then
+        self.assertGreater(second, first)
+
+        # and when a large one is refused
+        self.clock.ms -= 5000
+        with self.assertRaises(ClockMovedBackwardsError):
+            self.generator.next_id()
+
+    def test_ids_are_above_auto_increment_ids(self) -> None:
+        # given
+        clock = FakeClock(1763978400000)  # 2025-11-24
+        generator = SnowflakeGenerator(lambda: 0, clock=clock.time)
+
+        # then
+        self.assertGreater(generator.next_id(), 1 << 53)
+
+
+class TestWorkerIdLease(TestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.redis_repo = MagicMock()
+        self.redis_repo.claim_worker_id.return_value = 7
+        self.redis_repo.renew_worker_id.return_value = True
+        self.lease = WorkerIdLease(
+            self.redis_repo, ttl_seconds=10, clock=lambda: self.now
+        )
+
+    def test_claims_once_and_renews_after_half_the_ttl(self) -> None:
+        # when
+        first = self.lease.worker_id()
+        self.now = 4
+        second = self.lease.worker_id()
+        self.now = 6
+        third = self.lease.worker_id()
+
+        # then
+        self.assertEqual((first, second, third), (7, 7, 7))
+        self.redis_repo.claim_worker_id.assert_called_once_with(
+            self.lease.owner, 1024, 10000
+        )
+        self.redis_repo.renew_worker_id.assert_called_once_with(
+            7, self.lease.owner, 10000
+        )
+
+    def test_lost_worker_id_is_claimed_again(self) -> None:
+        # given
+        self.lease.worker_id()
+        self.redis_repo.renew_worker_id.return_value = False
+        self.redis_repo.claim_worker_id.return_value = 8
+        self.now = 6
+
+        # when
+        worker_id = self.lease.worker_id()
+
+        # then
+        self.assertEqual(worker_id, 8)
+
+    def test_worker_id_is_kept_until_expiry_while_redis_fails(self) -> None:
+        # given
+        self.lease.worker_id()
+        self.redis_repo.renew_worker_id.side_effect = RedisError("down")
+
+        # when
+        self.now = 9
+        worker_id = self.lease.worker_id()
+
+        # then
+        self.assertEqual(worker_id, 7)
+        self.now = 10
+        with self.assertRaises(DependencyUnavailableError):
+            self.lease.worker_id()
+
+    def test_no_free_worker_id(self) -> None:
+        # given
+        self.redis_repo.claim_worker_id.return_value = None
+
+        # when / then
+        with self.assertRaises(RuntimeError):
+            self.lease.worker_id()
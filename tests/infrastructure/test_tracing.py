@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+import tempfile
+from typing import Any
+from unittest import TestCase
+
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from infrastructure.tracing.collector import summarize
+from infrastructure.tracing.tracer import (
+    KIND_CLIENT,
+    KIND_SERVER,
+    STATUS_ERROR,
+    FileSpanExporter,
+    Tracer,
+    parse_traceparent,
+    register_tracing,
+    traced,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class MemoryExporter:
+    def __init__(self) -> None:
+        self.payloads: list[dict[str, Any]] = []
+
+    def export(self, payload: dict[str, Any]) -> None:
+        self.payloads.append(payload)
+
+    def spans(self) -> list[dict[str, Any]]:
+        return [
+            span
+            for payload in self.payloads
+            for span in payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        ]
+
+
+@traced
+def count_notes(engine: Any) -> int:
+    with engine.connect() as connection:
+        return int(connection.execute(text("SELECT COUNT(*) FROM notes")).scalar())
+
+
+class TestTraceparent(TestCase):
+    def test_parses_valid_headers_only(self) -> None:
+        self.assertEqual(
+            parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01"),
+            (TRACE_ID, PARENT_ID, True),
+        )
+        self.assertEqual(
+            parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00"),
+            (TRACE_ID, PARENT_ID, False),
+        )
+        self.assertIsNone(parse_traceparent(None))
+        self.assertIsNone(parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}"))
+        self.assertIsNone(parse_traceparent(f"ff-{TRACE_ID}-{PARENT_ID}-01"))
+        self.assertIsNone(parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01"))
+
+
+class TestTracing(TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as connection:
+            connection.execute(text("CREATE TABLE notes (id INTEGER PRIMARY KEY)"))
+        self.exporter = MemoryExporter()
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+
+    def _client(self, sample_rate: float) -> Any:
+        app = Flask(__name__)
+        engine = self.engine
+
+        @app.before_request
+        def check_limit() -> None:
+            pass
+
+        @app.route("/notes/<int:note_id>")
+        def get_note(note_id: int) -> dict:
+            return {"count": count_notes(engine)}
+
+        @app.route("/fail")
+        def fail() -> str:
+            count_notes(engine)
+            raise RuntimeError("boom")
+
+        self.tracer = Tracer(
+            self.exporter, sample_rate, logging.getLogger(__name__), rng=lambda: 0.5
+        )
+        register_tracing(app, self.tracer)
+        return app.test_client()
+
+    def test_request_spans_hooks_services_and_sql(self) -> None:
+        # given
+        client = self._client(1.0)
+
+        # when
+        response = client.get("/notes/7")
+        self.tracer.flush()
+
+        # then
+        self.assertEqual(response.status_code, 200)
+        root, hook, service, sql = self.exporter.spans()
+        self.assertEqual(root["name"], "GET /notes/<int:note_id>")
+        self.assertEqual(root["kind"], KIND_SERVER)
+        self.assertEqual(root["parentSpanId"], "")
+        self.assertIn(
+            {"key": "http.status_code", "value": {"intValue": "200"}},
+            root["attributes"],
+        )
+        self.assertEqual(
+            hook["name"], "before_request TestTracing._client.<locals>.check_limit"
+        )
+        self.assertEqual(service["name"], "test_tracing.count_notes")
+        self.assertEqual(sql["name"], "sqlite SELECT")
+        self.assertEqual(sql["kind"], KIND_CLIENT)
+        self.assertIn(
+            {
+                "key": "db.statement",
+                "value": {"stringValue": "SELECT COUNT(*) FROM notes"},
+            },
+            sql["attributes"],
+        )
+        self.assertEqual(hook["parentSpanId"], root["spanId"])
+        self.assertEqual(service["parentSpanId"], root["spanId"])
+        self.assertEqual(sql["parentSpanId"], service["spanId"])
+        self.assertEqual(len({span["traceId"] for span in self.exporter.spans()}), 1)
+
+    def test_incoming_traceparent_is_honoured(self) -> None:
+        # given
+        client = self._client(0.0)
+
+        # when
+        client.get("/notes/1", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+        client.get("/notes/2", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})
+        client.get("/notes/3")
+        self.tracer.flush()
+
+        # then
+        spans = self.exporter.spans()
+        self.assertEqual({span["traceId"] for span in spans}, {TRACE_ID})
+        (root,) = [span for span in spans if span["kind"] == KIND_SERVER]
+        self.assertEqual(root["parentSpanId"], PARENT_ID)
+        self.assertEqual(self.tracer.sampled_total, 1)
+
+    def test_unsampled_requests_export_nothing(self) -> None:
+        # given
+        client = self._client(0.0)
+
+        # when
+        response = client.get("/notes/1")
+        self.tracer.flush()
+
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.exporter.payloads, [])
+
+    def test_errors_set_the_span_status(self) -> None:
+        # given
+        client = self._client(1.0)
+
+        # when
+        response = client.get("/fail")
+        self.tracer.flush()
+
+        # then
+        self.assertEqual(response.status_code, 500)
+        (root,) = [
+            span for span in self.exporter.spans() if span["kind"] == KIND_SERVER
+        ]
+        self.assertEqual(
+            root["status"], {"code": STATUS_ERROR, "message": "RuntimeError: boom"}
+        )
+
+    def test_full_queue_drops_traces(self) -> None:
+        # given
+        tracer = Tracer(self.exporter, 1.0, logging.getLogger(__name__), queue_size=1)
+
+        # when
+        for _ in range(3):
+            span = tracer.start_trace("GET /")
+            assert span is not None
+            tracer.finish(span)
+
+        # then
+        self.assertEqual(tracer.dropped_total, 2)
+        self.assertIn("tracing_traces_dropped_total 2", tracer.collect())
+
+
+class TestFileSpanExporter(TestCase):
+    def test_appends_otlp_json_lines(self) -> None:
+        # given
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "spans.jsonl")
+        tracer = Tracer(
+            FileSpanExporter(path),
+            1.0,
+            logging.getLogger(__name__),
+            service_name="notes-api",
+        )
+
+        # when
+        for _ in range(2):
+            span = tracer.start_trace("GET /", attributes={"http.method": "GET"})
+            assert span is not None
+            span.child("redis MGET", KIND_CLIENT).end()
+            tracer.finish(span)
+            tracer.flush()
+
+        # then
+        with open(path, encoding="utf-8") as spans_file:
+            payloads = [json.loads(line) for line in spans_file]
+        self.assertEqual(len(payloads), 2)
+        resource_spans = payloads[0]["resourceSpans"][0]
+        self.assertEqual(
+            resource_spans["resource"]["attributes"],
+            [{"key": "service.name", "value": {"stringValue": "notes-api"}}],
+        )
+        root, child = resource_spans["scopeSpans"][0]["spans"]
+        self.assertEqual(len(root["traceId"]), 32)
+        self.assertEqual(len(root["spanId"]), 16)
+        self.assertEqual(child["parentSpanId"], root["spanId"])
+        self.assertIsInstance(root["startTimeUnixNano"], str)
+        self.assertEqual(summarize(payloads[0])[0].split()[1:3], ["GET", "/"])
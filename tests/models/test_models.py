@@ -0,0 +1,29 @@
+import unittest
+
+from models.models import CONTENT_PREVIEW_LEN, make_content_preview
+
+
+class TestContentPreview(unittest.TestCase):
+    def test_short_content_is_kept_with_whitespace_collapsed(self) -> None:
+        self.assertEqual(
+            make_content_preview("  First line\n\nsecond\tline "),
+            "First line second line",
+        )
+
+    def test_long_content_is_cut_at_a_word_boundary(self) -> None:
+        # given
+        content = "word " * 100
+
+        # when
+        preview = make_content_preview(content)
+
+        # then
+        self.assertLessEqual(len(preview), CONTENT_PREVIEW_LEN)
+        self.assertTrue(preview.endswith("word…"))
+
+    def test_content_without_spaces_is_cut_hard(self) -> None:
+        # when
+        preview = make_content_preview("x" * 500)
+
+        # then
+        self.assertEqual(preview, "x" * (CONTENT_PREVIEW_LEN - 1) + "…")
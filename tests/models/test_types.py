@@ -0,0 +1,108 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask
+from sqlalchemy import DateTime, LargeBinary, select, type_coerce
+
+from models.models import Note, db
+from models.types import (
+    compress_text,
+    decompress_text,
+    is_compressed,
+    set_compression_threshold,
+)
+
+LONG_CONTENT = "Lorem ipsum dolor sit amet. " * 40
+
+
+class TestCompressedText(unittest.TestCase):
+    def tearDown(self) -> None:
+        set_compression_threshold(0)
+
+    def test_compress_above_threshold(self) -> None:
+        stored = compress_text(LONG_CONTENT, threshold=100)
+        self.assertTrue(is_compressed(stored))
+        self.assertLess(len(stored), len(LONG_CONTENT))
+        self.assertEqual(decompress_text(stored), LONG_CONTENT)
+
+    def test_plain_below_threshold_or_disabled(self) -> None:
+        self.assertEqual(compress_text("Short note", threshold=100), b"Short note")
+        self.assertEqual(
+            compress_text(LONG_CONTENT, threshold=0), LONG_CONTENT.encode("utf-8")
+        )
+        self.assertEqual(
+            decompress_text("Zażółć gęślą".encode("utf-8")), "Zażółć gęślą"
+        )
+
+    def test_incompressible_value_stays_plain(self) -> None:
+        value = "a1!Zq"
+        self.assertEqual(compress_text(value, threshold=1), value.encode("utf-8"))
+
+    def test_value_starting_with_marker_is_always_compressed(self) -> None:
+        value = "\x00content"
+        stored = compress_text(value, threshold=0)
+        self.assertTrue(is_compressed(stored))
+        self.assertEqual(decompress_text(stored), value)
+
+    def test_unknown_codec_raises(self) -> None:
+        with self.assertRaises(ValueError):
+            decompress_text(b"\x00\x7fdata")
+
+    def test_column_round_trip(self) -> None:
+        # given
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(app)
+        set_compression_threshold(100)
+
+        with app.app_context():
+            db.create_all()
+            db.session.add(Note(title="Long", content=LONG_CONTENT))
+            db.session.add(Note(title="Short", content="Short note"))
+            db.session.commit()
+
+            # when
+            stored = {
+                row[0]: row[1]
+                for row in db.session.execute(
+                    select(Note.title, type_coerce(Note.content, LargeBinary))
+                )
+            }
+            notes = {note.title: note.content for note in db.session.query(Note)}
+
+        # then
+        self.assertTrue(is_compressed(stored["Long"]))
+        self.assertEqual(stored["Short"], b"Short note")
+        self.assertEqual(notes, {"Long": LONG_CONTENT, "Short": "Short note"})
+
+
+class TestUTCDateTime(unittest.TestCase):
+    def test_column_round_trip(self) -> None:
+        # given
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(app)
+        created_at = datetime(2025, 11, 3, 15, 30, tzinfo=timezone(timedelta(hours=2)))
+
+        with app.app_context():
+            db.create_all()
+            db.session.add(
+                Note(title="Title", content="Some content", created_at=created_at)
+            )
+            db.session.commit()
+            db.session.expunge_all()
+
+            # when
+            stored = db.session.execute(
+                select(type_coerce(Note.created_at, DateTime))
+            ).scalar_one()
+            note = db.session.execute(select(Note)).scalar_one()
+
+        # then
+        self.assertEqual(stored, datetime(2025, 11, 3, 13, 30))
+        self.assertEqual(note.created_at, created_at)
+        self.assertEqual(note.created_at.tzinfo, timezone.utc)
+
+
+if __name__ == "__main__":
+    unittest.main()
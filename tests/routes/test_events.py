@@ -0,0 +1,132 @@
+import json
+from http import HTTPStatus
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from flask import Flask
+
+import routes.events
+from infrastructure.redis.note_events import NoteEventBroadcaster
+from routes.events import register_events_routes
+
+
+class TestEventsRoutes(TestCase):
+    def setUp(self) -> None:
+        self.app = Flask(__name__)
+        self.redis_repository = MagicMock()
+        redis_client = MagicMock()
+        redis_client.pubsub.return_value.listen.return_value = iter([])
+        self.broadcaster = NoteEventBroadcaster(redis_client, MagicMock(), 2)
+
+        register_events_routes(
+            self.app,
+            self.redis_repository,
+            self.broadcaster,
+            MagicMock(),
+            heartbeat_seconds=0.01,
+        )
+        self.client = self.app.test_client()
+
+    def test_stream_replays_and_pushes_new_events(self) -> None:
+        # given
+        note = json.dumps({"id": 2, "title": "Title"})
+        self.redis_repository.get_note_events_since.return_value = [
+            ("1700000000000-1", note)
+        ]
+
+        # when
+        response = self.client.get(
+            "/api/v1/notes/events", headers={"Last-Event-ID": "1700000000000-0"}
+        )
+        chunks = iter(response.response)
+        retry = next(chunks)
+        replayed = next(chunks)
+        self.broadcaster.dispatch(f"1700000000000-1 {note}")
+        self.broadcaster.dispatch(f"1700000000001-0 {note}")
+        pushed = next(chunks)
+        response.close()
+
+        # then
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.assertEqual(retry, b"retry: 3000\n\n")
+        self.assertEqual(
+            replayed,
+            f"id: 1700000000000-1\nevent: note_created\ndata: {note}\n\n".encode(),
+        )
+        self.assertEqual(
+            pushed,
+            f"id: 1700000000001-0\nevent: note_created\ndata: {note}\n\n".encode(),
+        )
+        self.redis_repository.get_note_events_since.assert_called_once_with(
+            "1700000000000-0", 1000
+        )
+
+    @patch.object(routes.events, "REPLAY_LIMIT", 2)
+    def test_replay_reads_pages_until_caught_up(self) -> None:
+        # given
+        pages = [
+            [("1700000000000-1", "{}"), ("1700000000000-2", "{}")],
+            [("1700000000000-3", "{}"), ("1700000000000-4", "{}")],
+            [("1700000000000-5", "{}")],
+        ]
+        self.redis_repository.get_note_events_since.side_effect = pages
+
+        # when
+        response = self.client.get(
+            "/api/v1/notes/events", headers={"Last-Event-ID": "1700000000000-0"}
+        )
+        chunks = iter(response.response)
+        next(chunks)
+        replayed = [next(chunks) for _ in range(5)]
+        heartbeat = next(chunks)
+        response.close()
+
+        # then
+        self.assertEqual(
+            [chunk.split(b"\n")[0] for chunk in replayed],
+            [f"id: 1700000000000-{sequence}".encode() for sequence in range(1, 6)],
+        )
+        self.assertEqual(heartbeat, b": keep-alive\n\n")
+        self.assertEqual(
+            [
+                call.args
+                for call in self.redis_repository.get_note_events_since.call_args_list
+            ],
+            [
+                ("1700000000000-0", 2),
+                ("1700000000000-2", 2),
+                ("1700000000000-4", 2),
+            ],
+        )
+
+    def test_stream_sends_heartbeats_without_replay(self) -> None:
+        # when
+        response = self.client.get("/api/v1/notes/events")
+        chunks = iter(response.response)
+        next(chunks)
+        heartbeat = next(chunks)
+        response.close()
+
+        # then
+        self.assertEqual(heartbeat, b": keep-alive\n\n")
+        self.redis_repository.get_note_events_since.assert_not_called()
+
+    def test_slow_client_is_disconnected(self) -> None:
+        # given
+        response = self.client.get("/api/v1/notes/events")
+        chunks = iter(response.response)
+        next(chunks)
+
+        # when
+        for sequence in range(3):
+            self.broadcaster.dispatch(f"1700000000000-{sequence} {{}}")
+
+        # then
+        self.assertEqual(len(list(chunks)), 2)
+
+    def test_invalid_last_event_id(self) -> None:
+        response = self.client.get(
+            "/api/v1/notes/events", headers={"Last-Event-ID": "abc"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock
 from flask import Flask
 
 from routes.health_check import register_health_check_routes
+from services.warmup import Readiness
 
 
 class TestHealthCheckControllers(TestCase):
@@ -14,8 +15,10 @@ class TestHealthCheckControllers(TestCase):
         self.mysql_repository = MagicMock()
         self.redis_repository = MagicMock()
 
+        self.readiness = Readiness()
+
         register_health_check_routes(
-            self.app, self.mysql_repository, self.redis_repository
+            self.app, self.mysql_repository, self.redis_repository, self.readiness
         )
 
         self.client = self.app.test_client()
@@ -58,3 +61,18 @@ class TestHealthCheckControllers(TestCase):
         self.assertEqual(response.status_code, HTTPStatus.INTERNAL_SERVER_ERROR)
         data = response.get_json()
         self.assertEqual(data, {"database": "ok", "redis": "error"})
+
+    def test_ready_only_after_warm_up(self) -> None:
+        # when
+        warming_up = self.client.get("/ready")
+        self.readiness.mark_ready({"completed": True, "notes_preloaded": 3})
+        ready = self.client.get("/ready")
+
+        # then
+        self.assertEqual(warming_up.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertEqual(warming_up.headers["Retry-After"], "1")
+        self.assertEqual(ready.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            ready.get_json(),
+            {"status": "ready", "warm_up": {"completed": True, "notes_preloaded": 3}},
+        )
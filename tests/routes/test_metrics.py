@@ -0,0 +1,26 @@
+from http import HTTPStatus
+from unittest import TestCase
+
+from flask import Flask
+
+from infrastructure.metrics.registry import MetricsRegistry
+from routes.metrics import register_metrics_routes
+
+
+class TestMetricsRoutes(TestCase):
+    def test_get_metrics(self) -> None:
+        # given
+        app = Flask(__name__)
+        registry = MetricsRegistry()
+        registry.register(lambda: ["# TYPE up gauge", "up 1"])
+        register_metrics_routes(app, registry)
+
+        # when
+        response = app.test_client().get("/metrics")
+
+        # then
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.content_type, "text/plain; version=0.0.4; charset=utf-8"
+        )
+        self.assertEqual(response.get_data(as_text=True), "# TYPE up gauge\nup 1\n")
@@ -10,6 +10,7 @@ from flask import Flask
 from sqlalchemy import URL, text
 
 from infrastructure.mysql.mysql_repository import MySQLRepository
+from infrastructure.redis.redis_repository import RedisRepository
 from main import get_env_value
 from models.models import db, Note
 from routes.notes import register_notes_routes
@@ -68,8 +69,11 @@ class TestNotesRoutes(TestCase):
         db.init_app(cls.app)
 
         mysql_repository = MySQLRepository(db, cls.logger)
-        _, redis_url = get_redis_client_and_url()
-        register_notes_routes(cls.app, mysql_repository, redis_url, logger=cls.logger)
+        redis_client, redis_url = get_redis_client_and_url()
+        redis_repository = RedisRepository(redis_client, cls.logger)
+        register_notes_routes(
+            cls.app, mysql_repository, redis_repository, redis_url, logger=cls.logger
+        )
 
         with cls.app.app_context():
             db.create_all()
@@ -388,6 +392,49 @@ class TestNotesRoutes(TestCase):
 
         self.assertEqual(data["has_more"], expected_result["has_more"])
 
+    def test_get_notes_query_budget(self) -> None:
+        # given
+        with self.app.app_context():
+            for i in range(3):
+                db.session.add(Note(title=f"Title {i}", content="Some content"))
+            db.session.commit()
+
+        # when
+        cold = requests.get(APP_URL + "/api/v1/notes?limit=2")
+        warm = requests.get(APP_URL + "/api/v1/notes?limit=2")
+
+        # then
+        self.assertEqual(cold.status_code, HTTPStatus.OK)
+        self.assertEqual(cold.headers["X-DB-Queries"], "2")
+        self.assertEqual(warm.headers["X-DB-Queries"], "1")
+        self.assertEqual(warm.content, cold.content)
+        self.assertIn("db;dur=", warm.headers["Server-Timing"])
+
+    def test_get_notes_summary_view(self) -> None:
+        # given
+        with self.app.app_context():
+            db.session.add(Note(title="Long note", content="word " * 100))
+            db.session.commit()
+
+        # when
+        res = requests.get(APP_URL + "/api/v1/notes?view=summary&limit=1")
+
+        # then
+        self.assertEqual(res.status_code, HTTPStatus.OK)
+        note = res.json()["notes"][0]
+        self.assertNotIn("content", note)
+        self.assertEqual(note["title"], "Long note")
+        self.assertLessEqual(len(note["content_preview"]), 160)
+        self.assertTrue(note["content_preview"].endswith("word\u2026"))
+
+    def test_get_notes_invalid_view(self) -> None:
+        # when
+        res = requests.get(APP_URL + "/api/v1/notes?view=compact")
+
+        # then
+        self.assertEqual(res.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(res.json(), {"error": "Invalid view parameter"})
+
     def test_get_notes_max_limit_exceeded(self) -> None:
         # when
         res = requests.get(url=APP_URL + f"/api/v1/notes?limit=9999")
@@ -435,6 +482,87 @@ class TestNotesRoutes(TestCase):
         self.assertEqual(res.status_code, HTTPStatus.BAD_REQUEST)
         self.assertEqual(res.json(), {"error": "last_id must be a positive integer"})
 
+    def test_get_notes_changes_since_token(self) -> None:
+        # given
+        # Older than the settle window of the sync.
+        created_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+            minutes=1
+        )
+        with self.app.app_context():
+            for i in range(1, 6):
+                db.session.add(
+                    Note(
+                        title=f"Note {i}",
+                        content=f"Content {i}",
+                        created_at=created_at,
+                    )
+                )
+            db.session.commit()
+            ids = [note.id for note in Note.query.order_by(Note.id.asc()).all()]
+
+        # when
+        first = requests.get(APP_URL + "/api/v1/notes/changes?since=0&limit=3")
+        first_data = first.json()
+        second = requests.get(
+            APP_URL + f"/api/v1/notes/changes?since={first_data['next_since']}&limit=3"
+        )
+        second_data = second.json()
+
+        # then
+        self.assertEqual(first.status_code, HTTPStatus.OK)
+        self.assertEqual([note["id"] for note in first_data["notes"]], ids[:3])
+        self.assertTrue(first_data["has_more"])
+        self.assertEqual(first_data["next_since"], ids[2])
+        self.assertEqual(second.status_code, HTTPStatus.OK)
+        self.assertEqual([note["id"] for note in second_data["notes"]], ids[3:])
+        self.assertFalse(second_data["has_more"])
+        self.assertEqual(second_data["next_since"], ids[4])
+
+    def test_get_notes_changes_holds_back_new_notes(self) -> None:
+        # given
+        with self.app.app_context():
+            db.session.add(
+                Note(
+                    title="Old note",
+                    content="Content",
+                    created_at=datetime.datetime.now(datetime.timezone.utc)
+                    - datetime.timedelta(minutes=1),
+                )
+            )
+            db.session.add(Note(title="New note", content="Content"))
+            db.session.commit()
+            old_id, _ = [note.id for note in Note.query.order_by(Note.id.asc()).all()]
+
+        # when
+        res = requests.get(APP_URL + "/api/v1/notes/changes?since=0")
+
+        # then
+        self.assertEqual(res.status_code, HTTPStatus.OK)
+        self.assertEqual([note["id"] for note in res.json()["notes"]], [old_id])
+        self.assertEqual(res.json()["next_since"], old_id)
+        self.assertFalse(res.json()["has_more"])
+
+    def test_get_notes_changes_invalid_since(self) -> None:
+        # when
+        res_invalid = requests.get(APP_URL + "/api/v1/notes/changes?since=abc")
+        res_negative = requests.get(APP_URL + "/api/v1/notes/changes?since=-1")
+
+        # then
+        self.assertEqual(res_invalid.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(res_invalid.json(), {"error": "Invalid since parameter"})
+        self.assertEqual(res_negative.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(
+            res_negative.json(), {"error": "since must be a non-negative integer"}
+        )
+
+    def test_get_notes_changes_max_limit_exceeded(self) -> None:
+        # when
+        res = requests.get(APP_URL + "/api/v1/notes/changes?limit=9999")
+
+        # then
+        self.assertEqual(res.status_code, HTTPStatus.CONFLICT)
+        self.assertEqual(res.json(), {"error": "Max limit exceeded"})
+
     def test_rate_limit_exceeded(self) -> None:
         # given
         with self.app.app_context():
@@ -0,0 +1,70 @@
+from http import HTTPStatus
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from infrastructure.resilience.circuit_breaker import CircuitOpenError
+from routes.stats import register_stats_routes
+
+
+class TestStatsRoutes(TestCase):
+    def setUp(self) -> None:
+        self.app = Flask(__name__)
+
+        self.mysql_repository = MagicMock()
+        self.redis_repository = MagicMock()
+
+        register_stats_routes(
+            self.app, self.mysql_repository, self.redis_repository, MagicMock()
+        )
+
+        self.client = self.app.test_client()
+
+    def test_get_stats_success(self) -> None:
+        # given
+        self.redis_repository.get_notes_stats.return_value = (3, {})
+        self.mysql_repository.get_daily_stats.return_value = {}
+
+        # when
+        response = self.client.get("/api/v1/notes/stats?days=1")
+
+        # then
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        data = response.get_json()
+        self.assertEqual(data["total"], 3)
+        self.assertEqual(len(data["per_day"]), 1)
+        self.assertEqual(data["per_day"][0]["count"], 0)
+
+    def test_get_stats_invalid_days(self) -> None:
+        for days in ("abc", "0", "-1"):
+            response = self.client.get(f"/api/v1/notes/stats?days={days}")
+            self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_get_stats_max_days_exceeded(self) -> None:
+        response = self.client.get("/api/v1/notes/stats?days=1000")
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+
+    def test_get_stats_internal_error(self) -> None:
+        # given
+        self.redis_repository.get_notes_stats.side_effect = RuntimeError("boom")
+
+        # when
+        response = self.client.get("/api/v1/notes/stats")
+
+        # then
+        self.assertEqual(response.status_code, HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def test_get_stats_dependency_unavailable(self) -> None:
+        # given
+        self.redis_repository.get_notes_stats.return_value = None
+        self.mysql_repository.get_daily_stats.side_effect = CircuitOpenError(
+            "mysql is unavailable", 7
+        )
+
+        # when
+        response = self.client.get("/api/v1/notes/stats?days=1")
+
+        # then
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertEqual(response.headers["Retry-After"], "7")
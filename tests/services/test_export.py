@@ -0,0 +1,114 @@
+import csv
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from services.export import export_partition, plan_partitions, write_manifest
+
+
+def _row(note_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=note_id,
+        title=f"Title {note_id}",
+        content="Some content",
+        created_at=datetime(2025, 11, 3, 12, 0, 0),
+        comment=None,
+    )
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self) -> None:
+        self.repo = MagicMock()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_plan_partitions_covers_range(self) -> None:
+        self.assertEqual(plan_partitions(1, 10, 3), [(1, 4), (5, 8), (9, 10)])
+        self.assertEqual(plan_partitions(5, 6, 4), [(5, 5), (6, 6)])
+        self.assertEqual(plan_partitions(7, 7, 8), [(7, 7)])
+
+    def test_export_partition_ndjson(self) -> None:
+        # given
+        self.repo.iter_notes_by_id_range.return_value = iter([_row(1), _row(2)])
+
+        # when
+        shard = export_partition(self.repo, self.tmp_dir.name, 3, 1, 10, "ndjson")
+
+        # then
+        path = os.path.join(self.tmp_dir.name, "notes-0003.ndjson.gz")
+        with gzip.open(path, "rt", encoding="utf-8") as shard_file:
+            records = [json.loads(line) for line in shard_file]
+        with open(path, "rb") as shard_file:
+            expected_sha256 = hashlib.sha256(shard_file.read()).hexdigest()
+
+        self.assertEqual(
+            shard,
+            {
+                "file": "notes-0003.ndjson.gz",
+                "first_id": 1,
+                "last_id": 10,
+                "rows": 2,
+                "sha256": expected_sha256,
+            },
+        )
+        self.assertEqual(
+            records[0],
+            {
+                "id": 1,
+                "title": "Title 1",
+                "content": "Some content",
+                "created_at": "2025-11-03T12:00:00Z",
+                "comment": None,
+            },
+        )
+        self.repo.iter_notes_by_id_range.assert_called_once_with(1, 10, None)
+
+    def test_export_partition_csv(self) -> None:
+        # given
+        self.repo.iter_notes_by_id_range.return_value = iter([_row(5)])
+
+        # when
+        shard = export_partition(self.repo, self.tmp_dir.name, 0, 5, 5, "csv")
+
+        # then
+        path = os.path.join(self.tmp_dir.name, shard["file"])
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as shard_file:
+            rows = list(csv.DictReader(shard_file))
+        self.assertEqual(shard["rows"], 1)
+        self.assertEqual(rows[0]["id"], "5")
+        self.assertEqual(rows[0]["created_at"], "2025-11-03T12:00:00Z")
+
+    def test_write_manifest(self) -> None:
+        # given
+        shards = [
+            {"file": "notes-0001.ndjson.gz", "rows": 2},
+            {"file": "notes-0000.ndjson.gz", "rows": 3},
+        ]
+
+        # when
+        manifest = write_manifest(self.tmp_dir.name, shards, "ndjson", 10, None, 42)
+
+        # then
+        with open(
+            os.path.join(self.tmp_dir.name, "manifest.json"), encoding="utf-8"
+        ) as manifest_file:
+            self.assertEqual(json.load(manifest_file), manifest)
+        self.assertEqual(manifest["rows"], 5)
+        self.assertEqual(manifest["max_id"], 42)
+        self.assertEqual(manifest["since_id"], 10)
+        self.assertEqual(
+            [shard["file"] for shard in manifest["shards"]],
+            ["notes-0000.ndjson.gz", "notes-0001.ndjson.gz"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,10 @@
+import json
 import unittest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock
 
+from flask import Flask, jsonify
+
 from services.notes import (
     get_note,
     NotFoundError,
@@ -11,16 +14,38 @@ from services.notes import (
     MAX_TITLE_LEN,
     MIN_CONTENT_LEN,
     MAX_CONTENT_LEN,
-    get_all_notes,
     MAX_LIMIT,
     MaxLimitExceededError,
+    import_notes,
+    MAX_SYNC_LIMIT,
+    get_note_json,
+    get_all_notes_json,
+    get_notes_since_json,
+    get_note_summaries_json,
+    _to_dict,
 )
 from models.models import Note
+from models.records import NoteSummary
 
 
 class TestNote(unittest.TestCase):
     def setUp(self) -> None:
         self.repo = MagicMock()
+        self.redis_repository = MagicMock()
+        self.redis_repository.get_note_fragments.return_value = {}
+        self.repo.get_first_unsettled_id.return_value = None
+
+    def _get_all_notes(self, limit: int | None, last_id: int | None = None) -> dict:
+        page: dict = json.loads(
+            get_all_notes_json(self.repo, self.redis_repository, limit, last_id)
+        )
+        return page
+
+    def _get_notes_since(self, since: int, limit: int | None = None) -> dict:
+        page: dict = json.loads(
+            get_notes_since_json(self.repo, self.redis_repository, since, limit)
+        )
+        return page
 
     def test_get_note_success(self) -> None:
         # given
@@ -91,6 +116,34 @@ class TestNote(unittest.TestCase):
         self.assertEqual(added_note.content, "Valid content")
         self.assertEqual(added_note.comment, "Valid comment")
 
+    def test_add_note_updates_counters_and_publishes_event(self) -> None:
+        # given
+        redis_repository = MagicMock()
+        self.repo.add.return_value = 123
+
+        # when
+        add_note(
+            self.repo,
+            "Valid title",
+            "Valid content",
+            redis_repository=redis_repository,
+        )
+
+        # then
+        added_note = self.repo.add.call_args[0][0]
+        redis_repository.increment_notes_count.assert_called_once_with(
+            added_note.created_at.date()
+        )
+        redis_repository.publish_note_created.assert_called_once_with(
+            {
+                "id": 123,
+                "title": "Valid title",
+                "content": "Valid content",
+                "created_at": added_note.created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "comment": None,
+            }
+        )
+
     def test_add_note_invalid_title_raises(self) -> None:
         with self.assertRaises(ValidationError) as context:
             add_note(self.repo, "", "Some content")
@@ -141,10 +194,11 @@ class TestNote(unittest.TestCase):
             ),
         ]
         has_more = True
-        self.repo.get_notes.return_value = notes, has_more
+        self.repo.get_note_ids.return_value = [note.id for note in notes], has_more
+        self.repo.get_by_ids.return_value = notes
 
         # when
-        result = get_all_notes(self.repo, limit=None)
+        result = self._get_all_notes(None)
 
         # then
         expected = {
@@ -168,17 +222,18 @@ class TestNote(unittest.TestCase):
         }
 
         self.assertEqual(result, expected)
-        self.repo.get_notes.assert_called_once_with(5, None)
+        self.repo.get_note_ids.assert_called_once_with(5, None)
 
     def test_get_all_notes_returns_empty_list(self) -> None:
         # given
         notes: list[Note] = []
         has_more = False
 
-        self.repo.get_notes.return_value = notes, has_more
+        self.repo.get_note_ids.return_value = [note.id for note in notes], has_more
+        self.repo.get_by_ids.return_value = notes
 
         # when
-        result = get_all_notes(self.repo, None)
+        result = self._get_all_notes(None)
 
         # then
         expected = {
@@ -186,7 +241,7 @@ class TestNote(unittest.TestCase):
             "has_more": has_more,
         }
         self.assertEqual(result, expected)
-        self.repo.get_notes.assert_called_once_with(5, None)
+        self.repo.get_note_ids.assert_called_once_with(5, None)
 
     def test_get_all_notes_with_limit(self) -> None:
         # given
@@ -232,35 +287,293 @@ class TestNote(unittest.TestCase):
             ],
             "has_more": has_more,
         }
-        self.repo.get_notes.return_value = notes, has_more
+        self.repo.get_note_ids.return_value = [note.id for note in notes], has_more
+        self.repo.get_by_ids.return_value = notes
 
         # when
-        result = get_all_notes(self.repo, limit=4)
+        result = self._get_all_notes(4)
 
         # then
         self.assertEqual(result, expected)
-        self.repo.get_notes.assert_called_once_with(4, None)
+        self.repo.get_note_ids.assert_called_once_with(4, None)
 
     def test_get_all_notes_with_last_id(self) -> None:
         # given
-        self.repo.get_notes.return_value = [], False
+        self.repo.get_note_ids.return_value = [], False
 
         # when
-        result = get_all_notes(self.repo, limit=5, last_id=100)
+        result = self._get_all_notes(5, last_id=100)
 
         # then
         expected = {
             "notes": [],
             "has_more": False,
         }
-        self.repo.get_notes.assert_called_once_with(5, 100)
+        self.repo.get_note_ids.assert_called_once_with(5, 100)
         self.assertEqual(result, expected)
 
     def test_get_all_notes_raises_if_limit_exceeds_max(self) -> None:
         # given / when / then
         with self.assertRaises(MaxLimitExceededError):
-            get_all_notes(self.repo, limit=MAX_LIMIT + 1)
-            self.repo.get_notes.assert_not_called()
+            self._get_all_notes(MAX_LIMIT + 1)
+            self.repo.get_note_ids.assert_not_called()
+
+    def test_get_notes_since_returns_next_token(self) -> None:
+        # given
+        created_at = datetime(2025, 11, 3, 12, 0, 0, tzinfo=timezone.utc)
+        notes = [
+            Note(
+                id=note_id,
+                title=f"Title {note_id}",
+                content=f"Content {note_id}",
+                created_at=created_at,
+            )
+            for note_id in (11, 12)
+        ]
+        self.repo.get_note_ids_since.return_value = [11, 12], True
+        self.repo.get_by_ids.return_value = notes
+
+        # when
+        result = self._get_notes_since(10, limit=2)
+
+        # then
+        self.assertEqual([note["id"] for note in result["notes"]], [11, 12])
+        self.assertTrue(result["has_more"])
+        self.assertEqual(result["next_since"], 12)
+        self.repo.get_note_ids_since.assert_called_once_with(10, 2)
+
+    def test_get_notes_since_holds_back_unsettled_notes(self) -> None:
+        # given
+        created_at = datetime(2025, 11, 3, 12, 0, 0, tzinfo=timezone.utc)
+        self.repo.get_note_ids_since.return_value = [11, 12, 13], True
+        self.repo.get_first_unsettled_id.return_value = 12
+        self.repo.get_by_ids.return_value = [
+            Note(id=11, title="Title 11", content="Content 11", created_at=created_at)
+        ]
+
+        # when
+        result = self._get_notes_since(10, limit=3)
+
+        # then
+        self.assertEqual([note["id"] for note in result["notes"]], [11])
+        self.assertFalse(result["has_more"])
+        self.assertEqual(result["next_since"], 11)
+        since, up_to, created_after = self.repo.get_first_unsettled_id.call_args.args
+        self.assertEqual((since, up_to), (10, 13))
+        self.assertAlmostEqual(
+            created_after.timestamp(),
+            (datetime.now(timezone.utc) - timedelta(seconds=5)).timestamp(),
+            delta=5,
+        )
+        self.repo.get_by_ids.assert_called_once_with([11])
+
+    def test_get_notes_since_keeps_token_when_up_to_date(self) -> None:
+        # given
+        self.repo.get_note_ids_since.return_value = [], False
+
+        # when
+        result = self._get_notes_since(42)
+
+        # then
+        self.assertEqual(result, {"notes": [], "has_more": False, "next_since": 42})
+        self.repo.get_note_ids_since.assert_called_once_with(42, 500)
+
+    def test_get_notes_since_raises_if_limit_exceeds_max(self) -> None:
+        with self.assertRaises(MaxLimitExceededError):
+            self._get_notes_since(0, limit=MAX_SYNC_LIMIT + 1)
+        self.repo.get_note_ids_since.assert_not_called()
+
+    def test_get_note_json_serves_cached_fragment(self) -> None:
+        # given
+        redis_repository = MagicMock()
+        redis_repository.get_note_fragments.return_value = {7: b'{"id":7}'}
+
+        # when
+        result = get_note_json(self.repo, redis_repository, 7)
+
+        # then
+        self.assertEqual(result, b'{"id":7}\n')
+        self.repo.get_by_id.assert_not_called()
+
+    def test_get_note_json_renders_and_caches_on_miss(self) -> None:
+        # given
+        redis_repository = MagicMock()
+        redis_repository.get_note_fragments.return_value = {}
+        note = Note(
+            id=7,
+            title="Zażółć",
+            content="Content",
+            created_at=datetime(2025, 11, 3, 12, 0, 0, tzinfo=timezone.utc),
+            comment="Comment",
+        )
+        self.repo.get_by_id.return_value = note
+
+        # when
+        result = get_note_json(self.repo, redis_repository, 7)
+
+        # then
+        with Flask(__name__).app_context():
+            expected = jsonify(get_note(self.repo, 7)).get_data()
+        self.assertEqual(result, expected)
+        redis_repository.set_note_fragments.assert_called_once_with(
+            {7: expected.rstrip(b"\n")}
+        )
+
+    def test_list_json_is_identical_to_jsonify(self) -> None:
+        # given
+        created_at = datetime(2025, 11, 3, 12, 0, 0, tzinfo=timezone.utc)
+        notes = [
+            Note(
+                id=note_id,
+                title=f'Title "{note_id}"',
+                content="Content\n<b>ünïcode</b>",
+                created_at=created_at,
+                comment=None if note_id % 2 else "Comment",
+            )
+            for note_id in (3, 2, 1)
+        ]
+        redis_repository = MagicMock()
+        cached: dict[int, bytes] = {}
+        redis_repository.get_note_fragments.side_effect = lambda ids: {
+            note_id: cached[note_id] for note_id in ids if note_id in cached
+        }
+        redis_repository.set_note_fragments.side_effect = cached.update
+        self.repo.get_note_ids.return_value = [3, 2], True
+        self.repo.get_note_ids_since.return_value = [1, 2, 3], False
+        self.repo.get_by_ids.side_effect = lambda ids: [
+            note for note in notes if note.id in ids
+        ][::-1]
+
+        # when
+        page = get_all_notes_json(self.repo, redis_repository, limit=2)
+        changes = get_notes_since_json(self.repo, redis_repository, 0)
+
+        # then
+        with Flask(__name__).app_context():
+            self.assertEqual(
+                page,
+                jsonify(
+                    {"notes": [_to_dict(note) for note in notes[:2]], "has_more": True}
+                ).get_data(),
+            )
+            self.assertEqual(
+                changes,
+                jsonify(
+                    {
+                        "notes": [_to_dict(note) for note in notes[::-1]],
+                        "has_more": False,
+                        "next_since": 3,
+                    }
+                ).get_data(),
+            )
+        self.repo.get_by_ids.assert_any_call([3, 2])
+        self.repo.get_by_ids.assert_called_with([1])
+
+    def test_list_json_with_empty_page(self) -> None:
+        # given
+        redis_repository = MagicMock()
+        self.repo.get_note_ids.return_value = [], False
+        self.repo.get_note_ids_since.return_value = [], False
+        redis_repository.get_note_fragments.return_value = {}
+
+        # when / then
+        self.assertEqual(
+            get_all_notes_json(self.repo, redis_repository, None),
+            b'{"has_more":false,"notes":[]}\n',
+        )
+        self.assertEqual(
+            get_notes_since_json(self.repo, redis_repository, 5),
+            b'{"has_more":false,"next_since":5,"notes":[]}\n',
+        )
+        self.repo.get_by_ids.assert_not_called()
+
+    def test_note_summaries_json_renders_previews(self) -> None:
+        # given
+        created_at = datetime(2025, 11, 3, 12, 0, 0, tzinfo=timezone.utc)
+        self.repo.get_note_summaries.return_value = (
+            [
+                NoteSummary(
+                    id=2,
+                    title="Title 2",
+                    content_preview="Content 2",
+                    created_at=created_at,
+                    comment=None,
+                )
+            ],
+            True,
+        )
+
+        # when
+        result = get_note_summaries_json(self.repo, 1, 3)
+
+        # then
+        self.assertEqual(
+            result,
+            b'{"has_more":true,"notes":[{"comment":null,'
+            b'"content_preview":"Content 2","created_at":"2025-11-03T12:00:00Z",'
+            b'"id":2,"title":"Title 2"}]}\n',
+        )
+        self.repo.get_note_summaries.assert_called_once_with(1, 3)
+
+    def test_import_notes_inserts_in_batches(self) -> None:
+        # given
+        counters = MagicMock()
+        on_batch = MagicMock()
+        records = [
+            {"title": f"Title {i}", "content": "Valid content"} for i in range(5)
+        ]
+
+        # when
+        import_notes(self.repo, records, on_batch, counters=counters, batch_size=2)
+
+        # then
+        self.assertEqual(
+            [len(call.args[0]) for call in self.repo.add_many.call_args_list],
+            [2, 2, 1],
+        )
+        self.assertEqual(
+            [call.args for call in on_batch.call_args_list],
+            [(2, []), (2, []), (1, [])],
+        )
+        self.assertEqual(counters.increment_notes_counts.call_count, 3)
+
+    def test_import_notes_rejects_invalid_records(self) -> None:
+        # given
+        on_batch = MagicMock()
+        records: list[object] = [
+            {"title": "Valid title", "content": "Valid content", "comment": ""},
+            {"title": "12", "content": "Valid content"},
+            "not a json object",
+            {
+                "title": "Valid title",
+                "content": "Valid content",
+                "created_at": "2025-11-03T15:30:00+02:00",
+            },
+            {"title": "Valid title", "content": "Valid content", "created_at": "x"},
+        ]
+
+        # when
+        import_notes(self.repo, records, on_batch)
+
+        # then
+        rows = self.repo.add_many.call_args[0][0]
+        self.assertEqual(len(rows), 2)
+        self.assertIsNone(rows[0]["comment"])
+        self.assertEqual(rows[1]["created_at"], datetime(2025, 11, 3, 13, 30))
+
+        imported, rejected = on_batch.call_args[0]
+        self.assertEqual(imported, 2)
+        self.assertEqual(
+            rejected,
+            [
+                (
+                    records[1],
+                    f"Title must be between {MIN_TITLE_LEN} and {MAX_TITLE_LEN} characters",
+                ),
+                (records[2], "Invalid record"),
+                (records[4], "created_at must be an RFC3339 string"),
+            ],
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from services.notes import MaxLimitExceededError
+from services.stats import MAX_STATS_DAYS, get_stats, reconcile_stats
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self) -> None:
+        self.repo = MagicMock()
+        self.counters = MagicMock()
+        self.today = datetime.now(timezone.utc).date()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def test_get_stats_served_from_counters(self) -> None:
+        # given
+        self.counters.get_notes_stats.return_value = (
+            42,
+            {self.yesterday: 3, self.today: 1},
+        )
+
+        # when
+        result = get_stats(self.repo, self.counters, days=2)
+
+        # then
+        expected = {
+            "total": 42,
+            "per_day": [
+                {"date": self.yesterday.isoformat(), "count": 3},
+                {"date": self.today.isoformat(), "count": 1},
+            ],
+        }
+        self.assertEqual(result, expected)
+        self.counters.get_notes_stats.assert_called_once_with(
+            [self.yesterday, self.today]
+        )
+        self.repo.get_daily_stats.assert_not_called()
+        self.repo.get_rollup_total.assert_not_called()
+
+    def test_get_stats_falls_back_to_rollup(self) -> None:
+        # given
+        self.counters.get_notes_stats.return_value = (None, {})
+        self.repo.get_daily_stats.return_value = {self.today: 1}
+        self.repo.get_rollup_total.return_value = 7
+
+        # when
+        result = get_stats(self.repo, self.counters, days=2)
+
+        # then
+        expected = {
+            "total": 7,
+            "per_day": [
+                {"date": self.yesterday.isoformat(), "count": 0},
+                {"date": self.today.isoformat(), "count": 1},
+            ],
+        }
+        self.assertEqual(result, expected)
+        self.repo.get_daily_stats.assert_called_once_with(self.yesterday, self.today)
+
+    def test_get_stats_when_redis_unavailable(self) -> None:
+        # given
+        self.counters.get_notes_stats.return_value = None
+        self.repo.get_daily_stats.return_value = {self.today: 5}
+        self.repo.get_rollup_total.return_value = 5
+
+        # when
+        result = get_stats(self.repo, self.counters, days=None)
+
+        # then
+        self.assertEqual(result["total"], 5)
+        self.assertEqual(len(result["per_day"]), 7)
+        self.assertEqual(
+            result["per_day"][-1], {"date": self.today.isoformat(), "count": 5}
+        )
+
+    def test_get_stats_raises_if_days_exceeds_max(self) -> None:
+        with self.assertRaises(MaxLimitExceededError):
+            get_stats(self.repo, self.counters, days=MAX_STATS_DAYS + 1)
+        self.counters.get_notes_stats.assert_not_called()
+
+    def test_reconcile_stats(self) -> None:
+        # given
+        self.repo.count_notes_by_day.return_value = {self.today: 2}
+        self.repo.count_notes.return_value = 12
+
+        # when
+        result = reconcile_stats(self.repo, self.counters, days=2)
+
+        # then
+        expected_per_day = {self.yesterday: 0, self.today: 2}
+        self.assertEqual(result, {"total": 12, "days": 2})
+        self.repo.count_notes_by_day.assert_called_once_with(self.yesterday, self.today)
+        self.repo.replace_daily_stats.assert_called_once_with(expected_per_day)
+        self.counters.set_notes_stats.assert_called_once_with(12, expected_per_day)
+
+    def test_reconcile_stats_all_days_recounts_in_chunks(self) -> None:
+        # given
+        first_day = self.today - timedelta(days=40)
+        self.repo.get_first_note_day.return_value = first_day
+        self.repo.count_notes_by_day.return_value = {}
+        self.repo.count_notes.return_value = 0
+
+        # when
+        result = reconcile_stats(self.repo, self.counters, days=2, all_days=True)
+
+        # then
+        self.assertEqual(result, {"total": 0, "days": 41})
+        self.assertEqual(
+            [call.args for call in self.repo.count_notes_by_day.call_args_list],
+            [
+                (first_day, first_day + timedelta(days=29)),
+                (first_day + timedelta(days=30), self.today - timedelta(days=2)),
+                (self.yesterday, self.today),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
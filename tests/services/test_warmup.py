@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import MagicMock
+
+from infrastructure.resilience.deadline import DeadlineExceededError, remaining_seconds
+from services.notes import DEFAULT_LIMIT, MAX_LIMIT
+from services.warmup import warm_up
+
+
+class TestWarmUp(unittest.TestCase):
+    def setUp(self) -> None:
+        self.repo = MagicMock()
+        self.redis_repo = MagicMock()
+        self.repo.open_connections.return_value = 8
+        self.redis_repo.open_connections.return_value = 4
+        self.repo.get_note_ids.side_effect = lambda limit, last_id=None: (
+            list(range(limit, 0, -1)),
+            True,
+        )
+        self.redis_repo.get_note_fragments.return_value = {}
+        self.repo.get_by_ids.return_value = []
+
+    def test_warm_up_opens_connections_and_preloads_notes(self) -> None:
+        # when
+        report = warm_up(
+            self.repo,
+            self.redis_repo,
+            connections=4,
+            preload_notes=20,
+            budget_seconds=5,
+        )
+
+        # then
+        self.assertTrue(report["completed"])
+        self.assertEqual(report["mysql_connections"], 8)
+        self.assertEqual(report["redis_connections"], 4)
+        self.assertEqual(report["notes_preloaded"], 20)
+        self.repo.open_connections.assert_called_once_with(4)
+        self.redis_repo.open_connections.assert_called_once_with(4)
+        self.assertEqual(
+            [call.args[0] for call in self.repo.get_note_ids.call_args_list],
+            [DEFAULT_LIMIT, MAX_LIMIT, 20],
+        )
+        self.redis_repo.get_note_fragments.assert_called_with(list(range(20, 0, -1)))
+        self.repo.get_by_id.assert_called_once_with(20)
+        self.repo.get_notes_since.assert_called_once_with(20, 1)
+
+    def test_warm_up_runs_within_budget(self) -> None:
+        # given
+        budgets: list[float | None] = []
+        self.repo.open_connections.side_effect = lambda count: budgets.append(
+            remaining_seconds()
+        )
+
+        # when
+        warm_up(self.repo, self.redis_repo, 4, 20, budget_seconds=2)
+
+        # then
+        remaining = budgets[0]
+        if remaining is None:
+            self.fail("No deadline during warm-up")
+        self.assertLessEqual(remaining, 2)
+        self.assertIsNone(remaining_seconds())
+
+    def test_failed_step_ends_warm_up(self) -> None:
+        # given
+        self.redis_repo.open_connections.side_effect = DeadlineExceededError()
+
+        # when
+        report = warm_up(self.repo, self.redis_repo, 4, 20, budget_seconds=0.1)
+
+        # then
+        self.assertFalse(report["completed"])
+        self.assertEqual(report["error"], "Request deadline exceeded")
+        self.assertEqual(report["mysql_connections"], 8)
+        self.repo.get_note_ids.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()